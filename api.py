@@ -0,0 +1,258 @@
+import math
+from datetime import date, timedelta
+
+from flask import Blueprint, jsonify, request, session
+
+from data_version import conditional_on_data
+from finance import (calculate_health_score, get_score_description, calculate_net_worth, calculate_budget,
+                     calculate_running_balance, generate_insights)
+from overview import fetch_overview
+import population_stats
+import search_index
+import simulator
+import spending_cube
+import due_index
+from projection import MAX_MONTHS, MIN_MONTHS, SOURCE_SHEETS, cached_projection
+from recurrence import user_bills
+from sheets import SHEET_NAMES
+
+# Versioned JSON API. Every endpoint is a handler taking a payload dict and
+# returning a dict, so the same handlers serve single calls and /batch.
+api_v1 = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+MAX_BATCH_SIZE = 20
+MAX_SEARCH_RESULTS = 200
+# Bound on numeric inputs, so sums and products of them stay finite
+MAX_NUMBER = 1e15
+HANDLERS = {}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _number(payload, name, signed=False):
+    try:
+        value = float(payload.get(name) or 0)
+    except (TypeError, ValueError):
+        raise ApiError(f'{name} must be a number')
+    if not math.isfinite(value):
+        raise ApiError(f'{name} must be a finite number')
+    if abs(value) > MAX_NUMBER:
+        raise ApiError(f'{name} must be at most {MAX_NUMBER:.0e} in size')
+    if value < 0 and not signed:
+        raise ApiError(f'{name} must not be negative')
+    return value
+
+
+def _date(payload, name, default):
+    if not payload.get(name):
+        return default
+    try:
+        return date.fromisoformat(payload[name])
+    except (TypeError, ValueError):
+        raise ApiError(f'{name} must be a date (YYYY-MM-DD)')
+
+
+def _user_email():
+    email = session.get('user_email', '')
+    if not email:
+        raise ApiError('Not signed in', 401)
+    return email
+
+
+def _dispatch(handler, payload):
+    if not isinstance(payload, dict):
+        return {'error': 'Request body must be a JSON object'}, 400
+    try:
+        return handler(payload), 200
+    except ApiError as e:
+        return {'error': e.message}, e.status
+
+
+def _payload():
+    if request.method == 'POST':
+        return request.get_json(silent=True) or {}
+    return request.args.to_dict()
+
+
+def endpoint(path, methods=('GET', 'POST'), sheets=()):
+    def decorator(handler):
+        def view():
+            body, status = _dispatch(handler, _payload())
+            return jsonify(body), status
+        view.__name__ = handler.__name__
+        if sheets:
+            view = conditional_on_data(*sheets)(view)
+        api_v1.add_url_rule(path, handler.__name__, view, methods=list(methods))
+        HANDLERS[path] = handler
+        return handler
+    return decorator
+
+
+@endpoint('/health-score')
+def health_score(payload):
+    data = {name: _number(payload, name) for name in ('income_revenue', 'expenses_costs', 'debt_loan', 'debt_interest_rate')}
+    if data['debt_interest_rate'] > 100:
+        raise ApiError('debt_interest_rate must be at most 100')
+    score = calculate_health_score(data)
+    return {'score': score, 'description': get_score_description(score)}
+
+
+@endpoint('/net-worth')
+def net_worth(payload):
+    return {'net_worth': calculate_net_worth(_number(payload, 'assets'), _number(payload, 'liabilities'))}
+
+
+@endpoint('/budget')
+def budget(payload):
+    values = [_number(payload, name) for name in ('monthly_income', 'housing_expenses', 'food_expenses', 'transport_expenses', 'other_expenses')]
+    total_expenses, savings = calculate_budget(*values)
+    return {'total_expenses': total_expenses, 'savings': savings}
+
+
+@endpoint('/expenses', methods=('GET',), sheets=(SHEET_NAMES['expense_tracker'],))
+def expenses(payload):
+    email = _user_email()
+    rows, balance = calculate_running_balance(email)
+    return {
+        'balance': balance,
+        'expenses': [{'id': r['ID'], 'amount': float(r['Amount']), 'category': r['Category'], 'date': r['Date'], 'description': r['Description'], 'running_balance': r['Running Balance']} for r in rows],
+        'insights': generate_insights(email)
+    }
+
+
+def _search(kind, payload):
+    email = _user_email()
+    try:
+        filters = search_index.parse_filters(payload)
+    except ValueError as e:
+        raise ApiError(str(e))
+    # One extra row tells the client the results were cut short
+    rows = search_index.search(kind, email, filters, limit=MAX_SEARCH_RESULTS + 1)
+    return rows[:MAX_SEARCH_RESULTS], len(rows) > MAX_SEARCH_RESULTS
+
+
+@endpoint('/expenses/search', methods=('GET',), sheets=(SHEET_NAMES['expense_tracker'],))
+def search_expenses(payload):
+    rows, truncated = _search('expenses', payload)
+    return {'expenses': [{'id': r['ID'], 'amount': float(r['Amount']), 'category': r['Category'], 'date': r['Date'], 'description': r['Description']} for r in rows],
+            'truncated': truncated}
+
+
+@endpoint('/spending', methods=('GET',), sheets=(SHEET_NAMES['expense_tracker'],))
+def spending(payload):
+    email = _user_email()
+    today = date.today()
+    end = _date(payload, 'end', today)
+    start = _date(payload, 'start', end - timedelta(days=89))
+    bucket = payload.get('bucket') or 'month'
+    if bucket not in spending_cube.BUCKETS:
+        raise ApiError(f"bucket must be one of {', '.join(spending_cube.BUCKETS)}")
+    if start > end:
+        raise ApiError('start must not be after end')
+    if bucket == 'day' and (end - start).days >= spending_cube.MAX_BUCKETS:
+        raise ApiError(f'At most {spending_cube.MAX_BUCKETS} days per request')
+    cube = spending_cube.get_cube(email)
+    category = payload.get('category') or None
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'total': round(cube.total(start, end, category), 2),
+        'by_category': {name: round(total, 2) for name, total in cube.by_category(start, end).items()},
+        'series': cube.series(start, end, bucket, category)
+    }
+
+
+@endpoint('/bills', methods=('GET',), sheets=(SHEET_NAMES['bill_planner'], SHEET_NAMES['bill_recurrence']))
+def bills(payload):
+    email = _user_email()
+    rows = user_bills(email)
+    rows.sort(key=lambda x: x['Due Date'])
+    return {'bills': [{'id': r['ID'], 'name': r['Bill Name'], 'amount': float(r['Amount']), 'due_date': r['Due Date'], 'status': r['Status']} for r in rows]}
+
+
+@endpoint('/bills/search', methods=('GET',), sheets=(SHEET_NAMES['bill_planner'], SHEET_NAMES['bill_recurrence']))
+def search_bills(payload):
+    rows, truncated = _search('bills', payload)
+    return {'bills': [{'id': r['ID'], 'name': r['Bill Name'], 'amount': float(r['Amount']), 'due_date': r['Due Date'], 'status': r['Status']} for r in rows],
+            'truncated': truncated}
+
+
+@endpoint('/bills/upcoming', methods=('GET',), sheets=(SHEET_NAMES['bill_planner'], SHEET_NAMES['bill_recurrence']))
+def upcoming_bills(payload):
+    email = _user_email()
+    n = int(_number(payload, 'n') or 5)
+    if n > 50:
+        raise ApiError('n must be at most 50')
+    return {'bills': [{key: bill[key] for key in ('id', 'name', 'amount', 'due_date')} for bill in due_index.next_bills(email, n)]}
+
+
+@endpoint('/overview', methods=('GET',))
+def overview(payload):
+    return fetch_overview(_user_email())
+
+
+@endpoint('/projection', methods=('GET',), sheets=tuple(SHEET_NAMES[key] for key in SOURCE_SHEETS))
+def projection(payload):
+    email = _user_email()
+    months = int(_number(payload, 'months') or 12)
+    if not MIN_MONTHS <= months <= MAX_MONTHS:
+        raise ApiError(f'months must be between {MIN_MONTHS} and {MAX_MONTHS}')
+    rates = {name: _number(payload, name, signed=True) for name in ('income_growth', 'expense_growth')}
+    if any(abs(rate) >= 1 for rate in rates.values()):
+        raise ApiError('Growth rates are monthly fractions between -1 and 1')
+    return cached_projection(email, months, _number(payload, 'starting_balance', signed=True), **rates)
+
+
+@endpoint('/simulate/health-score', methods=('POST',))
+def simulate_health_score(payload):
+    # Side-effect free: evaluates the score over a grid, nothing is written.
+    try:
+        return simulator.simulate_health_score(payload)
+    except simulator.SimulationError as e:
+        raise ApiError(str(e))
+
+
+@endpoint('/simulate/budget', methods=('POST',))
+def simulate_budget(payload):
+    try:
+        return simulator.simulate_budget(payload)
+    except simulator.SimulationError as e:
+        raise ApiError(str(e))
+
+
+@endpoint('/population')
+def population(payload):
+    metric = payload.get('metric', '')
+    if metric not in population_stats.METRICS and metric not in population_stats.CATEGORICAL:
+        raise ApiError('Unknown metric')
+    segments = {field: payload.get(field) for field in population_stats.SEGMENT_FIELDS}
+    body = {'summary': population_stats.summary(metric, population_stats.segment_names(segments)[0])}
+    if payload.get('value') not in (None, '') and metric in population_stats.METRICS:
+        body['comparison'] = population_stats.compare(metric, _number(payload, 'value', signed=True), segments)
+    return body
+
+
+@api_v1.route('/batch', methods=['POST'])
+def batch():
+    # {"requests": [{"path": "/health-score", "body": {...}}, ...]} is answered
+    # in one round trip with {"responses": [{"status": 200, "body": {...}}, ...]}.
+    body = request.get_json(silent=True)
+    calls = body.get('requests') if isinstance(body, dict) else None
+    if not isinstance(calls, list) or not calls:
+        return jsonify({'error': 'requests must be a non-empty list'}), 400
+    if len(calls) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} requests per batch'}), 400
+    responses = []
+    for call in calls:
+        handler = HANDLERS.get(call.get('path')) if isinstance(call, dict) else None
+        if handler is None:
+            responses.append({'status': 404, 'body': {'error': 'Unknown path'}})
+            continue
+        body, status = _dispatch(handler, call.get('body') or {})
+        responses.append({'status': status, 'body': body})
+    return jsonify({'responses': responses})
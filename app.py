@@ -4,50 +4,43 @@ import json
 import re
 from datetime import datetime, timedelta
 from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
-from flask_wtf import FlaskForm
-from wtforms import StringField, FloatField, SelectField, TextAreaField, EmailField, SubmitField
+from wtforms import StringField, FloatField, IntegerField, SelectField, TextAreaField, EmailField, SubmitField
 from wtforms.validators import DataRequired, Email, Optional, NumberRange
-from translations import translations
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from dateutil.parser import parse
-from dateutil import parser
+from translation_catalogs import catalogs
 import random
-
-# Initialize Flask app with custom template and static folders
-# Set template_folder to 'ficore_templates' to match repository structure
-# Set static_folder to 'static' to point to the static assets directory
-app = Flask(__name__, template_folder='ficore_templates', static_folder='static')
-app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'your-secret-key')
-app.config['SESSION_COOKIE_SECURE'] = True
-app.config['SESSION_COOKIE_HTTPONLY'] = True
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+import assets
+import page_cache
+from page_cache import cached_page
+from data_version import conditional_on_data
+import shared_cache
+import async_sheets
+import batch_scoring
+import idempotency
+import population_stats
+import profiler
+import recurrence
+import schema_migration
+import search_index
+import spending_anomalies
+import spending_cube
+import template_cache
+import translation_catalogs
+import due_index
+from columnar import get_columns
+from idempotency import IdempotentForm, idempotent
+from shared_cache import append_row, update_row
+from sheets import SHEET_NAMES, PREDETERMINED_HEADERS, ensure_sheet_and_headers
+from api import api_v1
+import overview as overview_sources
+from finance import calculate_health_score, get_score_description, calculate_net_worth, calculate_recommended_fund, score_quiz, calculate_budget, suggest_category, calculate_running_balance, generate_insights
+
+# dateutil is imported lazily inside parse_natural_date so gunicorn workers
+# boot without loading it; sheets.py does the same for the Sheets stack.
 
 # Constants
-SCOPES = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-SPREADSHEET_ID = 'your-spreadsheet-id'
-CREDENTIALS_FILE = 'credentials.json'
 FEEDBACK_FORM_URL = 'https://forms.gle/your-feedback-form'
 WAITLIST_FORM_URL = 'https://forms.gle/your-waitlist-form'
 CONSULTANCY_FORM_URL = 'https://forms.gle/your-consultancy-form'
-SHEET_NAMES = {
-    'submissions': 'Submissions',
-    'net_worth': 'NetWorth',
-    'emergency_fund': 'EmergencyFund',
-    'quiz': 'Quiz',
-    'budget': 'Budget',
-    'expense_tracker': 'ExpenseTracker',
-    'bill_planner': 'BillPlanner'
-}
-PREDETERMINED_HEADERS = {
-    'Submissions': ['ID', 'First Name', 'Last Name', 'Email', 'Phone Number', 'Language', 'Business Name', 'User Type', 'Income/Revenue', 'Expenses/Costs', 'Debt/Loan', 'Debt Interest Rate', 'Timestamp'],
-    'NetWorth': ['ID', 'First Name', 'Email', 'Language', 'Assets', 'Liabilities', 'Net Worth', 'Timestamp'],
-    'EmergencyFund': ['ID', 'First Name', 'Email', 'Language', 'Monthly Expenses', 'Recommended Fund', 'Timestamp'],
-    'Quiz': ['ID', 'First Name', 'Email', 'Language', 'Q1', 'Q2', 'Q3', 'Q4', 'Q5', 'Score', 'Personality Type', 'Timestamp'],
-    'Budget': ['ID', 'First Name', 'Email', 'Language', 'Monthly Income', 'Housing Expenses', 'Food Expenses', 'Transport Expenses', 'Other Expenses', 'Savings', 'Timestamp'],
-    'ExpenseTracker': ['ID', 'User Email', 'Amount', 'Category', 'Date', 'Description', 'Timestamp'],
-    'BillPlanner': ['ID', 'User Email', 'Bill Name', 'Amount', 'Due Date', 'Status', 'Timestamp']
-}
 CATEGORIES = [
     ('Food and Groceries', 'Food and Groceries'),
     ('Transport', 'Transport'),
@@ -57,28 +50,8 @@ CATEGORIES = [
     ('Other', 'Other')
 ]
 
-# Google Sheets Setup
-def get_sheets_client():
-    creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_FILE, SCOPES)
-    client = gspread.authorize(creds)
-    return client
-
-def ensure_sheet_and_headers(sheet_name, headers):
-    client = get_sheets_client()
-    spreadsheet = client.open_by_key(SPREADSHEET_ID)
-    try:
-        worksheet = spreadsheet.worksheet(sheet_name)
-    except gspread.exceptions.WorksheetNotFound:
-        worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=len(headers))
-        worksheet.append_row(headers)
-    existing_headers = worksheet.row_values(1)
-    if existing_headers != headers:
-        worksheet.clear()
-        worksheet.append_row(headers)
-    return worksheet
-
 # Forms
-class SubmissionForm(FlaskForm):
+class SubmissionForm(IdempotentForm):
     first_name = StringField('First Name', validators=[DataRequired()])
     last_name = StringField('Last Name', validators=[Optional()])
     email = EmailField('Email', validators=[DataRequired(), Email()])
@@ -93,7 +66,7 @@ class SubmissionForm(FlaskForm):
     debt_interest_rate = FloatField('Debt Interest Rate (%)', validators=[DataRequired(), NumberRange(min=0, max=100)])
     submit = SubmitField('Submit')
 
-class NetWorthForm(FlaskForm):
+class NetWorthForm(IdempotentForm):
     first_name = StringField('First Name', validators=[DataRequired()])
     email = EmailField('Email', validators=[DataRequired(), Email()])
     language = SelectField('Language', choices=[('English', 'English'), ('Hausa', 'Hausa')], validators=[DataRequired()])
@@ -101,14 +74,14 @@ class NetWorthForm(FlaskForm):
     liabilities = FloatField('Liabilities', validators=[DataRequired(), NumberRange(min=0)])
     submit = SubmitField('Get your net worth instantly!')
 
-class EmergencyFundForm(FlaskForm):
+class EmergencyFundForm(IdempotentForm):
     first_name = StringField('First Name', validators=[DataRequired()])
     email = EmailField('Email', validators=[DataRequired(), Email()])
     language = SelectField('Language', choices=[('English', 'English'), ('Hausa', 'Hausa')], validators=[DataRequired()])
     monthly_expenses = FloatField('Monthly Expenses', validators=[DataRequired(), NumberRange(min=0)])
     submit = SubmitField('Calculate Your Recommended Fund Size')
 
-class QuizForm(FlaskForm):
+class QuizForm(IdempotentForm):
     first_name = StringField('First Name', validators=[DataRequired()])
     email = EmailField('Email', validators=[DataRequired(), Email()])
     language = SelectField('Language', choices=[('English', 'English'), ('Hausa', 'Hausa')], validators=[DataRequired()])
@@ -119,7 +92,7 @@ class QuizForm(FlaskForm):
     q5 = SelectField('Question 5', choices=[('Yes', 'Yes'), ('No', 'No')], validators=[DataRequired()])
     submit = SubmitField('Uncover Your Financial Style')
 
-class BudgetForm(FlaskForm):
+class BudgetForm(IdempotentForm):
     first_name = StringField('First Name', validators=[DataRequired()])
     email = EmailField('Email', validators=[DataRequired(), Email()])
     auto_email = EmailField('Confirm Email', validators=[DataRequired(), Email()])
@@ -131,119 +104,133 @@ class BudgetForm(FlaskForm):
     other_expenses = FloatField('Other Expenses', validators=[DataRequired(), NumberRange(min=0)])
     submit = SubmitField('Start Planning Your Budget!')
 
-class ExpenseForm(FlaskForm):
+class ExpenseForm(IdempotentForm):
     amount = FloatField('Amount', validators=[DataRequired(), NumberRange(min=0)])
     category = SelectField('Category', choices=CATEGORIES, validators=[DataRequired()])
     date = StringField('Date', validators=[DataRequired()])
     description = TextAreaField('Description', validators=[Optional()])
     submit = SubmitField('Submit Expense')
 
-class BillForm(FlaskForm):
+class BillForm(IdempotentForm):
     bill_name = StringField('Bill Name', validators=[DataRequired()])
     amount = FloatField('Amount', validators=[DataRequired(), NumberRange(min=0)])
     due_date = StringField('Due Date', validators=[DataRequired()])
     status = SelectField('Status', choices=[('Pending', 'Pending'), ('Paid', 'Paid')], validators=[DataRequired()])
+    recurrence = SelectField('Recurrence', choices=[('None', 'Does not repeat'), ('Weekly', 'Weekly'), ('Monthly', 'Monthly'), ('Custom', 'Every N days')], default='None', validators=[Optional()])
+    interval = IntegerField('Repeat every', default=1, validators=[Optional(), NumberRange(min=1, max=365)])
+    end_date = StringField('End Date', validators=[Optional()])
     submit = SubmitField('Submit Bill')
 
 # Helper Functions
-def calculate_health_score(form_data):
-    income = form_data.get('income_revenue', 0)
-    expenses = form_data.get('expenses_costs', 0)
-    debt = form_data.get('debt_loan', 0)
-    interest_rate = form_data.get('debt_interest_rate', 0)
-    
-    savings_ratio = (income - expenses) / income if income > 0 else 0
-    debt_to_income = debt / income if income > 0 else 1
-    score = 100 * (0.5 * savings_ratio - 0.3 * debt_to_income - 0.2 * (interest_rate / 100))
-    return max(0, min(100, round(score)))
-
-def get_score_description(score):
-    if score >= 80:
-        return translations['English']['Strong Financial Health']
-    elif score >= 50:
-        return translations['English']['Stable Finances']
-    elif score >= 20:
-        return translations['English']['Financial Strain']
-    else:
-        return translations['English']['Urgent Attention Needed']
-
-def suggest_category(description):
-    if not description:
-        return 'Other'
-    description = description.lower()
-    if any(keyword in description for keyword in ['food', 'groceries', 'market']):
-        return 'Food and Groceries'
-    elif any(keyword in description for keyword in ['transport', 'fuel', 'bus', 'taxi']):
-        return 'Transport'
-    elif any(keyword in description for keyword in ['rent', 'mortgage', 'housing']):
-        return 'Housing'
-    elif any(keyword in description for keyword in ['electricity', 'water', 'internet']):
-        return 'Utilities'
-    elif any(keyword in description for keyword in ['movie', 'concert', 'entertainment']):
-        return 'Entertainment'
-    return 'Other'
-
 def parse_natural_date(date_str):
+    from dateutil.parser import parse
     try:
-        parsed_date = parse(date_str, fuzzy=True)
+        with profiler.span('dateutil parse'):
+            parsed_date = parse(date_str, fuzzy=True)
         return parsed_date.strftime('%Y-%m-%d')
     except ValueError:
         return datetime.now().strftime('%Y-%m-%d')
 
-def calculate_running_balance(email):
-    worksheet = ensure_sheet_and_headers(SHEET_NAMES['expense_tracker'], PREDETERMINED_HEADERS['ExpenseTracker'])
-    records = worksheet.get_all_records()
-    user_expenses = [r for r in records if r['User Email'] == email]
-    user_expenses.sort(key=lambda x: datetime.strptime(x['Date'], '%Y-%m-%d'))
-    balance = 0
-    for expense in user_expenses:
-        balance -= float(expense['Amount'])
-        expense['Running Balance'] = balance
-    return user_expenses, balance
-
-def generate_insights(email):
-    expenses, balance = calculate_running_balance(email)
-    if not expenses:
-        return []
-    categories = {}
-    for expense in expenses:
-        cat = expense['Category']
-        categories[cat] = categories.get(cat, 0) + float(expense['Amount'])
-    total_spent = sum(categories.values())
-    insights = []
-    for cat, amount in categories.items():
-        percentage = (amount / total_spent) * 100 if total_spent > 0 else 0
-        if percentage > 30:
-            insights.append(f"You spent {percentage:.1f}% of your expenses on {cat}. Consider reviewing this category for savings.")
-    if balance < 0:
-        insights.append("Your running balance is negative. Prioritize reducing expenses or increasing income.")
-    return insights
+def save_bill(form, user_email):
+    # Recurring bills are stored once as a rule; their occurrences are
+    # generated on read and only materialized when paid.
+    parsed_due_date = parse_natural_date(form.due_date.data)
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    bill_id = str(uuid.uuid4())
+    since = search_index.current_version('bills', user_email)
+    if form.recurrence.data in recurrence.FREQUENCIES[1:]:
+        rule = {
+            'ID': bill_id,
+            'User Email': user_email,
+            'Bill Name': form.bill_name.data,
+            'Amount': form.amount.data,
+            'Start Date': parsed_due_date,
+            'Frequency': form.recurrence.data,
+            'Interval': form.interval.data or 1,
+            'End Date': parse_natural_date(form.end_date.data) if form.end_date.data else '',
+            'Timestamp': timestamp
+        }
+        worksheet = ensure_sheet_and_headers(SHEET_NAMES['bill_recurrence'], PREDETERMINED_HEADERS['BillRecurrence'])
+        append_row(worksheet, list(rule.values()), user_email)
+        first_id = recurrence.occurrence_id(bill_id, datetime.strptime(parsed_due_date, '%Y-%m-%d').date())
+        due_index.track_new_rule(rule, paid=[first_id] if form.status.data == 'Paid' else [])
+        if form.status.data != 'Paid':
+            search_index.apply_change('bills', user_email, since, added=recurrence.rule_bills(rule))
+            return
+        bill_id = first_id
+    bill = {
+        'ID': bill_id,
+        'User Email': user_email,
+        'Bill Name': form.bill_name.data,
+        'Amount': form.amount.data,
+        'Due Date': parsed_due_date,
+        'Status': form.status.data,
+        'Timestamp': timestamp
+    }
+    worksheet = ensure_sheet_and_headers(SHEET_NAMES['bill_planner'], PREDETERMINED_HEADERS['BillPlanner'])
+    append_row(worksheet, list(bill.values()), user_email)
+    if '@' not in bill_id:
+        due_index.track_bill(bill)
+        search_index.apply_change('bills', user_email, since, added=[bill])
+    else:
+        # The paid first occurrence replaces its generated row
+        search_index.apply_change('bills', user_email, since, added=recurrence.rule_bills(rule) + [bill])
+
+def search_rows(kind, user_email):
+    # IDs matching the page's search filters, or None when it has none
+    if not user_email or not any(request.args.get(name) for name in search_index.FILTERS):
+        return None
+    try:
+        filters = search_index.parse_filters(request.args)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return None
+    return {row['ID'] for row in search_index.search(kind, user_email, filters)}
+
+# Routes are collected here and bound to an app instance in create_app()
+_routes = []
+_error_handlers = []
+
+def route(rule, **options):
+    def decorator(view_func):
+        _routes.append((rule, view_func, options))
+        return view_func
+    return decorator
+
+def errorhandler(code):
+    def decorator(handler):
+        _error_handlers.append((code, handler))
+        return handler
+    return decorator
 
 # Routes
-@app.route('/')
+@route('/')
+@cached_page
 def index():
     language = session.get('language', 'English')
-    return render_template('landing.html', language=language, translations=translations[language], FEEDBACK_FORM_URL=FEEDBACK_FORM_URL)
+    return render_template('landing.html', language=language, translations=catalogs[language], FEEDBACK_FORM_URL=FEEDBACK_FORM_URL)
 
-@app.route('/set_language', methods=['POST'])
+@route('/set_language', methods=['POST'])
 def set_language():
     language = request.form.get('language', 'English')
     session['language'] = language
     return redirect(url_for('index'))
 
-@app.route('/financial_health')
+@route('/financial_health')
+@cached_page
 def financial_health():
     language = session.get('language', 'English')
     form = SubmissionForm()
-    return render_template('index.html', form=form, language=language, translations=translations[language])
+    return render_template('index.html', form=form, language=language, translations=catalogs[language])
 
-@app.route('/submit', methods=['POST'])
+@route('/submit', methods=['POST'])
+@idempotent
 def submit():
     form = SubmissionForm()
     language = session.get('language', 'English')
     if form.validate_on_submit():
         if form.email.data != form.auto_email.data:
-            flash(translations[language]['Emails Do Not Match'], 'error')
+            flash(catalogs[language]['Emails Do Not Match'], 'error')
             return redirect(url_for('financial_health'))
         worksheet = ensure_sheet_and_headers(SHEET_NAMES['submissions'], PREDETERMINED_HEADERS['Submissions'])
         submission_id = str(uuid.uuid4())
@@ -263,10 +250,12 @@ def submit():
             form.debt_interest_rate.data,
             timestamp
         ]
-        worksheet.append_row(data)
+        append_row(worksheet, data, form.email.data)
         health_score = calculate_health_score(form.data)
         score_description = get_score_description(health_score)
-        flash(translations[language]['Submission Success'], 'success')
+        population_stats.record('health_score', health_score, {'language': form.language.data, 'user_type': form.user_type.data})
+        session['user_type'] = form.user_type.data
+        flash(catalogs[language]['Submission Success'], 'success')
         return redirect(url_for('dashboard', health_score=health_score, score_description=score_description))
     else:
         for field, errors in form.errors.items():
@@ -274,20 +263,24 @@ def submit():
                 flash(error, 'error')
         return redirect(url_for('financial_health'))
 
-@app.route('/dashboard')
+# Not conditional: the rank and peer figures move with every submission
+@route('/dashboard')
 def dashboard():
     language = session.get('language', 'English')
     health_score = request.args.get('health_score', type=int, default=0)
     score_description = request.args.get('score_description', '')
-    return render_template('dashboard.html', health_score=health_score, score_description=score_description, language=language, translations=translations[language])
+    peers = population_stats.compare('health_score', health_score, {'language': language, 'user_type': session.get('user_type')})
+    return render_template('dashboard.html', health_score=health_score, score_description=score_description, rank=peers['rank'], total_users=max(peers['count'], 1), peers=peers, language=language, translations=catalogs[language])
 
-@app.route('/net_worth', methods=['GET', 'POST'])
+@route('/net_worth', methods=['GET', 'POST'])
+@cached_page
+@idempotent
 def net_worth():
     language = session.get('language', 'English')
     form = NetWorthForm()
     if form.validate_on_submit():
         worksheet = ensure_sheet_and_headers(SHEET_NAMES['net_worth'], PREDETERMINED_HEADERS['NetWorth'])
-        net_worth = form.assets.data - form.liabilities.data
+        net_worth = calculate_net_worth(form.assets.data, form.liabilities.data)
         submission_id = str(uuid.uuid4())
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         data = [
@@ -300,18 +293,21 @@ def net_worth():
             net_worth,
             timestamp
         ]
-        worksheet.append_row(data)
-        flash(translations[language]['Submission Success'], 'success')
+        append_row(worksheet, data, form.email.data)
+        population_stats.record('net_worth', net_worth, {'language': form.language.data})
+        flash(catalogs[language]['Submission Success'], 'success')
         return redirect(url_for('dashboard'))
-    return render_template('net_worth_form.html', form=form, language=language, translations=translations[language])
+    return render_template('net_worth_form.html', form=form, language=language, translations=catalogs[language])
 
-@app.route('/emergency_fund', methods=['GET', 'POST'])
+@route('/emergency_fund', methods=['GET', 'POST'])
+@cached_page
+@idempotent
 def emergency_fund():
     language = session.get('language', 'English')
     form = EmergencyFundForm()
     if form.validate_on_submit():
         worksheet = ensure_sheet_and_headers(SHEET_NAMES['emergency_fund'], PREDETERMINED_HEADERS['EmergencyFund'])
-        recommended_fund = form.monthly_expenses.data * 6
+        recommended_fund = calculate_recommended_fund(form.monthly_expenses.data)
         submission_id = str(uuid.uuid4())
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         data = [
@@ -323,27 +319,21 @@ def emergency_fund():
             recommended_fund,
             timestamp
         ]
-        worksheet.append_row(data)
-        flash(translations[language]['Submission Success'], 'success')
+        append_row(worksheet, data, form.email.data)
+        population_stats.record('emergency_fund', recommended_fund, {'language': form.language.data})
+        flash(catalogs[language]['Submission Success'], 'success')
         return redirect(url_for('dashboard'))
-    return render_template('emergency_fund_form.html', form=form, language=language, translations=translations[language])
+    return render_template('emergency_fund_form.html', form=form, language=language, translations=catalogs[language])
 
-@app.route('/quiz', methods=['GET', 'POST'])
+@route('/quiz', methods=['GET', 'POST'])
+@cached_page
+@idempotent
 def quiz():
     language = session.get('language', 'English')
     form = QuizForm()
     if form.validate_on_submit():
         worksheet = ensure_sheet_and_headers(SHEET_NAMES['quiz'], PREDETERMINED_HEADERS['Quiz'])
-        score = sum(1 for q in ['q1', 'q2', 'q3', 'q4', 'q5'] if form[q].data == 'Yes')
-        personality_types = {
-            5: 'Financial Guru',
-            4: 'Prudent Planner',
-            3: 'Balanced Budgeter',
-            2: 'Casual Spender',
-            1: 'Risky Rover',
-            0: 'Free Spirit'
-        }
-        personality = personality_types.get(score, 'Balanced Budgeter')
+        score, personality = score_quiz([form[q].data for q in ['q1', 'q2', 'q3', 'q4', 'q5']])
         submission_id = str(uuid.uuid4())
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         data = [
@@ -360,22 +350,24 @@ def quiz():
             personality,
             timestamp
         ]
-        worksheet.append_row(data)
-        flash(translations[language]['Submission Success'], 'success')
+        append_row(worksheet, data, form.email.data)
+        population_stats.record_category('personality', personality, {'language': form.language.data})
+        flash(catalogs[language]['Submission Success'], 'success')
         return redirect(url_for('dashboard'))
-    return render_template('quiz_form.html', form=form, language=language, translations=translations[language])
+    return render_template('quiz_form.html', form=form, language=language, translations=catalogs[language])
 
-@app.route('/budget', methods=['GET', 'POST'])
+@route('/budget', methods=['GET', 'POST'])
+@cached_page
+@idempotent
 def budget():
     language = session.get('language', 'English')
     form = BudgetForm()
     if form.validate_on_submit():
         if form.email.data != form.auto_email.data:
-            flash(translations[language]['Emails Do Not Match'], 'error')
+            flash(catalogs[language]['Emails Do Not Match'], 'error')
             return redirect(url_for('budget'))
         worksheet = ensure_sheet_and_headers(SHEET_NAMES['budget'], PREDETERMINED_HEADERS['Budget'])
-        total_expenses = sum([form.housing_expenses.data, form.food_expenses.data, form.transport_expenses.data, form.other_expenses.data])
-        savings = form.monthly_income.data - total_expenses
+        total_expenses, savings = calculate_budget(form.monthly_income.data, form.housing_expenses.data, form.food_expenses.data, form.transport_expenses.data, form.other_expenses.data)
         submission_id = str(uuid.uuid4())
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         data = [
@@ -391,12 +383,16 @@ def budget():
             savings,
             timestamp
         ]
-        worksheet.append_row(data)
-        flash(translations[language]['Submission Success'], 'success')
+        append_row(worksheet, data, form.email.data)
+        if form.monthly_income.data:
+            population_stats.record('savings_ratio', savings / form.monthly_income.data, {'language': form.language.data})
+        flash(catalogs[language]['Submission Success'], 'success')
         return redirect(url_for('dashboard'))
-    return render_template('budget_form.html', form=form, language=language, translations=translations[language])
+    return render_template('budget_form.html', form=form, language=language, translations=catalogs[language])
 
-@app.route('/expense_tracker', methods=['GET', 'POST'])
+@route('/expense_tracker', methods=['GET', 'POST'])
+@conditional_on_data(SHEET_NAMES['expense_tracker'])
+@idempotent
 def expense_tracker():
     language = session.get('language', 'English')
     form = ExpenseForm()
@@ -424,26 +420,35 @@ def expense_tracker():
         
         # Save to Google Sheets
         worksheet = ensure_sheet_and_headers(SHEET_NAMES['expense_tracker'], PREDETERMINED_HEADERS['ExpenseTracker'])
-        worksheet.append_row(list(expense.values()))
+        since = spending_cube.current_version(user_email)
+        search_since = search_index.current_version('expenses', user_email)
+        append_row(worksheet, list(expense.values()), user_email)
+        spending_cube.apply_change(user_email, since, added=expense)
+        search_index.apply_change('expenses', user_email, search_since, added=[expense])
         
-        flash(translations[language]['Submission Success'], 'success')
+        flash(catalogs[language]['Submission Success'], 'success')
+        for alert in spending_anomalies.record(user_email, since, added=expense):
+            flash(spending_anomalies.message(alert, language), 'warning')
         return redirect(url_for('expense_tracker'))
     
     # Retrieve expenses from session or Google Sheets
     expenses = session.get('expenses', [])
     if not expenses and user_email:
-        worksheet = ensure_sheet_and_headers(SHEET_NAMES['expense_tracker'], PREDETERMINED_HEADERS['ExpenseTracker'])
-        records = worksheet.get_all_records()
-        expenses = [r for r in records if r['User Email'] == user_email]
+        columns = get_columns('expense_tracker')
+        expenses = [columns.row(row) for row in columns.rows_for(user_email)]
         session['expenses'] = expenses
         session.modified = True
     
-    insights = generate_insights(user_email) if user_email else []
+    insights = generate_insights(user_email, language=language) if user_email else []
     expenses, balance = calculate_running_balance(user_email)
+    search = search_rows('expenses', user_email)
+    if search is not None:
+        expenses = [e for e in expenses if e['ID'] in search]
     
-    return render_template('expense_tracker_form.html', form=form, expenses=expenses, balance=balance, insights=insights, language=language, translations=translations[language])
+    return render_template('expense_tracker_form.html', form=form, expenses=expenses, balance=balance, insights=insights, search=request.args, language=language, translations=catalogs[language])
 
-@app.route('/expense_submit', methods=['POST'])
+@route('/expense_submit', methods=['POST'])
+@idempotent
 def expense_submit():
     language = session.get('language', 'English')
     form = ExpenseForm()
@@ -471,9 +476,15 @@ def expense_submit():
         
         # Save to Google Sheets
         worksheet = ensure_sheet_and_headers(SHEET_NAMES['expense_tracker'], PREDETERMINED_HEADERS['ExpenseTracker'])
-        worksheet.append_row(list(expense.values()))
+        since = spending_cube.current_version(user_email)
+        search_since = search_index.current_version('expenses', user_email)
+        append_row(worksheet, list(expense.values()), user_email)
+        spending_cube.apply_change(user_email, since, added=expense)
+        search_index.apply_change('expenses', user_email, search_since, added=[expense])
         
-        flash(translations[language]['Submission Success'], 'success')
+        flash(catalogs[language]['Submission Success'], 'success')
+        for alert in spending_anomalies.record(user_email, since, added=expense):
+            flash(spending_anomalies.message(alert, language), 'warning')
     else:
         for field, errors in form.errors.items():
             for error in errors:
@@ -481,13 +492,15 @@ def expense_submit():
     
     return redirect(url_for('expense_tracker'))
 
-@app.route('/expense_edit/<id>', methods=['GET', 'POST'])
+@route('/expense_edit/<id>', methods=['GET', 'POST'])
+@idempotent
 def expense_edit(id):
     language = session.get('language', 'English')
     form = ExpenseForm()
     user_email = session.get('user_email', '')
     
     worksheet = ensure_sheet_and_headers(SHEET_NAMES['expense_tracker'], PREDETERMINED_HEADERS['ExpenseTracker'])
+    # Read fresh rows here: updates address rows by their position in the sheet
     records = worksheet.get_all_records()
     expense = next((r for r in records if r['ID'] == id and r['User Email'] == user_email), None)
     
@@ -525,69 +538,54 @@ def expense_edit(id):
         # Update Google Sheets
         for row_idx, row in enumerate(records, start=2):
             if row['ID'] == id:
-                worksheet.update(f'A{row_idx}:G{row_idx}', [list(updated_expense.values())])
+                since = spending_cube.current_version(user_email)
+                search_since = search_index.current_version('expenses', user_email)
+                update_row(worksheet, f'A{row_idx}:G{row_idx}', [list(updated_expense.values())], user_email)
+                spending_cube.apply_change(user_email, since, added=updated_expense, removed=expense)
+                search_index.apply_change('expenses', user_email, search_since, added=[updated_expense])
+                for alert in spending_anomalies.record(user_email, since, added=updated_expense, removed=expense):
+                    flash(spending_anomalies.message(alert, language), 'warning')
                 break
         
         flash('Expense updated successfully!', 'success')
         return redirect(url_for('expense_tracker'))
     
-    return render_template('expense_edit_form.html', form=form, expense_id=id, language=language, translations=translations[language])
+    return render_template('expense_edit_form.html', form=form, expense_id=id, language=language, translations=catalogs[language])
 
-@app.route('/bill_planner', methods=['GET', 'POST'])
+@route('/bill_planner', methods=['GET', 'POST'])
+@conditional_on_data(SHEET_NAMES['bill_planner'], SHEET_NAMES['bill_recurrence'])
+@idempotent
 def bill_planner():
     language = session.get('language', 'English')
     form = BillForm()
     user_email = session.get('user_email', '')
     
     if form.validate_on_submit():
-        parsed_due_date = parse_natural_date(form.due_date.data)
-        bill_id = str(uuid.uuid4())
-        bill = {
-            'ID': bill_id,
-            'User Email': user_email,
-            'Bill Name': form.bill_name.data,
-            'Amount': form.amount.data,
-            'Due Date': parsed_due_date,
-            'Status': form.status.data,
-            'Timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        worksheet = ensure_sheet_and_headers(SHEET_NAMES['bill_planner'], PREDETERMINED_HEADERS['BillPlanner'])
-        worksheet.append_row(list(bill.values()))
+        save_bill(form, user_email)
         
-        flash(translations[language]['Submission Success'], 'success')
+        flash(catalogs[language]['Submission Success'], 'success')
         return redirect(url_for('bill_planner'))
     
-    worksheet = ensure_sheet_and_headers(SHEET_NAMES['bill_planner'], PREDETERMINED_HEADERS['BillPlanner'])
-    records = worksheet.get_all_records()
-    bills = [r for r in records if r['User Email'] == user_email]
-    bills.sort(key=lambda x: datetime.strptime(x['Due Date'], '%Y-%m-%d'))
+    bills = recurrence.user_bills(user_email)
+    search = search_rows('bills', user_email)
+    if search is not None:
+        bills = [b for b in bills if b['ID'] in search]
+    # Due dates are stored as ISO strings, which sort chronologically
+    bills.sort(key=lambda x: x['Due Date'])
     
-    return render_template('bill_planner_form.html', form=form, bills=bills, language=language, translations=translations[language])
+    return render_template('bill_planner_form.html', form=form, bills=bills, search=request.args, language=language, translations=catalogs[language])
 
-@app.route('/bill_submit', methods=['POST'])
+@route('/bill_submit', methods=['POST'])
+@idempotent
 def bill_submit():
     language = session.get('language', 'English')
     form = BillForm()
     user_email = session.get('user_email', '')
     
     if form.validate_on_submit():
-        parsed_due_date = parse_natural_date(form.due_date.data)
-        bill_id = str(uuid.uuid4())
-        bill = {
-            'ID': bill_id,
-            'User Email': user_email,
-            'Bill Name': form.bill_name.data,
-            'Amount': form.amount.data,
-            'Due Date': parsed_due_date,
-            'Status': form.status.data,
-            'Timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        worksheet = ensure_sheet_and_headers(SHEET_NAMES['bill_planner'], PREDETERMINED_HEADERS['BillPlanner'])
-        worksheet.append_row(list(bill.values()))
+        save_bill(form, user_email)
         
-        flash(translations[language]['Submission Success'], 'success')
+        flash(catalogs[language]['Submission Success'], 'success')
     else:
         for field, errors in form.errors.items():
             for error in errors:
@@ -595,13 +593,15 @@ def bill_submit():
     
     return redirect(url_for('bill_planner'))
 
-@app.route('/bill_edit/<id>', methods=['GET', 'POST'])
+@route('/bill_edit/<id>', methods=['GET', 'POST'])
+@idempotent
 def bill_edit(id):
     language = session.get('language', 'English')
     form = BillForm()
     user_email = session.get('user_email', '')
     
     worksheet = ensure_sheet_and_headers(SHEET_NAMES['bill_planner'], PREDETERMINED_HEADERS['BillPlanner'])
+    # Read fresh rows here: updates address rows by their position in the sheet
     records = worksheet.get_all_records()
     bill = next((r for r in records if r['ID'] == id and r['User Email'] == user_email), None)
     
@@ -629,23 +629,40 @@ def bill_edit(id):
         
         for row_idx, row in enumerate(records, start=2):
             if row['ID'] == id:
-                worksheet.update(f'A{row_idx}:G{row_idx}', [list(updated_bill.values())])
+                since = search_index.current_version('bills', user_email)
+                update_row(worksheet, f'A{row_idx}:G{row_idx}', [list(updated_bill.values())], user_email)
+                search_index.apply_change('bills', user_email, since, added=[updated_bill])
                 break
+        due_index.track_bill(updated_bill)
         
         flash('Bill updated successfully!', 'success')
         return redirect(url_for('bill_planner'))
     
-    return render_template('bill_edit_form.html', form=form, bill_id=id, language=language, translations=translations[language])
+    return render_template('bill_edit_form.html', form=form, bill_id=id, language=language, translations=catalogs[language])
 
-@app.route('/bill_complete/<id>', methods=['POST'])
+@route('/bill_complete/<id>', methods=['POST'])
 def bill_complete(id):
     language = session.get('language', 'English')
     user_email = session.get('user_email', '')
     
     worksheet = ensure_sheet_and_headers(SHEET_NAMES['bill_planner'], PREDETERMINED_HEADERS['BillPlanner'])
+    # Read fresh rows here: updates address rows by their position in the sheet
     records = worksheet.get_all_records()
     bill = next((r for r in records if r['ID'] == id and r['User Email'] == user_email), None)
     
+    if not bill and '@' in id:
+        # Paying a recurring occurrence materializes it
+        bill = recurrence.find_occurrence(user_email, id)
+        if bill:
+            bill['Status'] = 'Paid'
+            bill['Timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            since = search_index.current_version('bills', user_email)
+            append_row(worksheet, list(bill.values()), user_email)
+            search_index.apply_change('bills', user_email, since, added=[bill])
+            due_index.mark_paid(id)
+            flash('Bill marked as paid!', 'success')
+            return redirect(url_for('bill_planner'))
+    
     if not bill:
         flash('Bill not found or unauthorized access.', 'error')
         return redirect(url_for('bill_planner'))
@@ -655,23 +672,86 @@ def bill_complete(id):
     
     for row_idx, row in enumerate(records, start=2):
         if row['ID'] == id:
-            worksheet.update(f'A{row_idx}:G{row_idx}', [list(bill.values())])
+            since = search_index.current_version('bills', user_email)
+            update_row(worksheet, f'A{row_idx}:G{row_idx}', [list(bill.values())], user_email)
+            search_index.apply_change('bills', user_email, since, added=[bill])
             break
+    due_index.mark_paid(id)
     
     flash('Bill marked as paid!', 'success')
     return redirect(url_for('bill_planner'))
 
+@route('/overview')
+async def overview():
+    language = session.get('language', 'English')
+    user_email = session.get('user_email', '')
+    sections = await overview_sources.fetch_overview_async(user_email) if user_email else {}
+    return render_template('overview.html', overview=sections, language=language, translations=catalogs[language])
+
 # Error Handling
-@app.errorhandler(404)
+@errorhandler(404)
 def page_not_found(e):
     language = session.get('language', 'English')
-    return render_template('404.html', language=language, translations=translations[language]), 404
+    return render_template('404.html', language=language, translations=catalogs[language]), 404
 
-@app.errorhandler(500)
+@errorhandler(500)
 def internal_server_error(e):
     language = session.get('language', 'English')
-    flash(translations[language]['Error processing form'], 'error')
+    flash(catalogs[language]['Error processing form'], 'error')
     return redirect(url_for('index'))
 
+def create_app(config=None):
+    # Initialize Flask app with custom template and static folders
+    # Set template_folder to 'ficore_templates' to match repository structure
+    # Set static_folder to 'static' to point to the static assets directory
+    app = Flask(__name__, template_folder='ficore_templates', static_folder='static')
+    app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'your-secret-key')
+    # Plain-HTTP local runs (load tests against the Sheets emulator) opt out
+    app.config['SESSION_COOKIE_SECURE'] = os.environ.get('SESSION_COOKIE_SECURE', '1') != '0'
+    app.config['SESSION_COOKIE_HTTPONLY'] = True
+    app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+    if config:
+        app.config.update(config)
+
+    # Fingerprinted, precompressed static assets served with far-future caching
+    assets.init_app(app)
+    # Compiled, memory-mapped translation catalogs (flask compile-translations)
+    translation_catalogs.init_app(app)
+    # Cache tier shared by all workers (SQLite by default, Redis via CACHE_TYPE)
+    shared_cache.init_app(app)
+    # Bounded I/O pool behind the async Sheets calls
+    async_sheets.init_app(app)
+    # Per-source deadline for the concurrent per-user overview fan-out
+    overview_sources.init_app(app)
+    # Dedupe window for repeated form submissions
+    idempotency.init_app(app)
+    # Sheet header migrations and the migrate-sheets command
+    schema_migration.init_app(app)
+    # Due-date index and the send-bill-reminders command
+    due_index.init_app(app)
+    # Incremental population statistics for peer comparisons
+    population_stats.init_app(app)
+    # Incremental batch scoring of submissions (flask score-submissions)
+    batch_scoring.init_app(app)
+    # Opt-in per-request sampling profiler (PROFILE_TOKEN / PROFILE_SAMPLE_RATE)
+    profiler.init_app(app)
+    # Rendered-page cache for language-specific pages (keyed by template version)
+    page_cache.init_app(app)
+
+    for rule, view_func, options in _routes:
+        app.add_url_rule(rule, view_func=view_func, **options)
+    # Compact JSON endpoints for the PWA frontend
+    app.register_blueprint(api_v1)
+    for code, handler in _error_handlers:
+        app.register_error_handler(code, handler)
+    # Persistent bytecode cache and template warm-up (flask compile-templates);
+    # last, once every filter and global is registered
+    template_cache.init_app(app)
+    return app
+
+# Module-level instance for `gunicorn app:app`; with preload_app the master
+# builds it once and forked workers share it copy-on-write.
+app = create_app()
+
 if __name__ == '__main__':
     app.run(debug=True)
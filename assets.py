@@ -0,0 +1,229 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import abort, request, send_file, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Static asset pipeline: content-hashed filenames, precompressed variants and
+# immutable caching. Templates keep calling url_for('static', filename=...);
+# the helper below rewrites those URLs to the fingerprinted copies.
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.webmanifest', '.txt', '.xml', '.ico')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+# Classes toggled at runtime by Bootstrap's JS or our own scripts that never
+# appear literally in a template.
+SAFELIST_CLASSES = {'show', 'showing', 'hide', 'fade', 'collapse', 'collapsing', 'active', 'disabled', 'was-validated', 'is-valid', 'is-invalid', 'modal-open', 'modal-backdrop', 'modal-static', 'offcanvas-backdrop', 'tooltip', 'tooltip-inner', 'tooltip-arrow', 'popover', 'popover-arrow', 'popover-header', 'popover-body', 'bs-tooltip-auto', 'bs-tooltip-top', 'bs-tooltip-bottom', 'bs-tooltip-start', 'bs-tooltip-end', 'bs-popover-auto', 'dropdown-menu-end', 'carousel-item-next', 'carousel-item-prev', 'carousel-item-start', 'carousel-item-end', 'alert-dismissible'}
+
+_CLASS_TOKEN_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_-]*')
+_DYNAMIC_PREFIX_RE = re.compile(r'([A-Za-z_][A-Za-z0-9_-]*-)\{\{')
+_SELECTOR_CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][_a-zA-Z0-9-]*)')
+_NOT_PSEUDO_RE = re.compile(r':not\([^()]*\)')
+
+
+def fingerprint_name(filename, content):
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    root, ext = os.path.splitext(filename)
+    return f'{root}.{digest}{ext}'
+
+
+def collect_used_classes(template_folder, extra_files=()):
+    # Over-approximate: every identifier-like token in the templates counts as
+    # a used class, and "prefix-{{ expr }}" keeps every class with that prefix.
+    tokens, prefixes = set(SAFELIST_CLASSES), set()
+    paths = [os.path.join(template_folder, name) for name in sorted(os.listdir(template_folder)) if name.endswith('.html')]
+    for path in list(paths) + list(extra_files):
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        tokens.update(_CLASS_TOKEN_RE.findall(text))
+        prefixes.update(_DYNAMIC_PREFIX_RE.findall(text))
+    return tokens, tuple(prefixes)
+
+
+def _split_blocks(css):
+    # Yields (prelude, body) for "prelude{body}" blocks and (statement, None)
+    # for top-level statements such as @charset or @import.
+    i, start, n = 0, 0, len(css)
+    while i < n:
+        ch = css[i]
+        if ch in '"\'':
+            end = css.find(ch, i + 1)
+            while end != -1 and css[end - 1] == '\\':
+                end = css.find(ch, end + 1)
+            i = n if end == -1 else end + 1
+            continue
+        if css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        if ch == ';':
+            statement = css[start:i + 1].strip()
+            if statement:
+                yield statement, None
+            start = i = i + 1
+            continue
+        if ch == '{':
+            prelude = css[start:i].strip()
+            depth, j = 1, i + 1
+            while j < n and depth:
+                if css[j] in '"\'':
+                    end = css.find(css[j], j + 1)
+                    j = n if end == -1 else end + 1
+                    continue
+                if css[j] == '{':
+                    depth += 1
+                elif css[j] == '}':
+                    depth -= 1
+                j += 1
+            yield prelude, css[i + 1:j - 1]
+            start = i = j
+            continue
+        i += 1
+
+
+def _selector_used(selector, used, prefixes):
+    classes = _SELECTOR_CLASS_RE.findall(_NOT_PSEUDO_RE.sub('', selector))
+    return all(cls in used or cls.startswith(prefixes) for cls in classes)
+
+
+def purge_css(css, used, prefixes=()):
+    out = []
+    for prelude, body in _split_blocks(css):
+        if body is None:
+            out.append(prelude)
+        elif prelude.startswith(('@media', '@supports', '@layer', '@container')):
+            inner = purge_css(body, used, prefixes)
+            if inner:
+                out.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            out.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [s for s in prelude.split(',') if _selector_used(s, used, prefixes)]
+            if selectors:
+                out.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(out)
+
+
+def _source_files(static_folder, build_dir):
+    build_dir = os.path.abspath(build_dir)
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != build_dir)
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _sources_signature(static_folder, template_folder, build_dir):
+    parts = []
+    for name, path in _source_files(static_folder, build_dir):
+        stat = os.stat(path)
+        parts.append(f'{name}:{stat.st_size}:{stat.st_mtime_ns}')
+    for name in sorted(os.listdir(template_folder)):
+        stat = os.stat(os.path.join(template_folder, name))
+        parts.append(f'templates/{name}:{stat.st_size}:{stat.st_mtime_ns}')
+    parts.append(f'brotli:{brotli is not None}')
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+def build_assets(static_folder, template_folder, build_dir, purge=('css/bootstrap.min.css',)):
+    used, prefixes = collect_used_classes(template_folder, [path for name, path in _source_files(static_folder, build_dir) if name.endswith('.js') and not name.endswith('.min.js')])
+    files = {}
+    for name, path in _source_files(static_folder, build_dir):
+        with open(path, 'rb') as f:
+            content = f.read()
+        if name in purge:
+            content = purge_css(content.decode('utf-8'), used, prefixes).encode('utf-8')
+        hashed = fingerprint_name(name, content)
+        target = os.path.join(build_dir, hashed)
+        if not os.path.exists(target):
+            _write(target, content)
+        if name.endswith(COMPRESSIBLE_EXTENSIONS):
+            if not os.path.exists(target + '.gz'):
+                _write(target + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None and not os.path.exists(target + '.br'):
+                _write(target + '.br', brotli.compress(content, quality=11))
+        files[name] = hashed
+    manifest = {'signature': _sources_signature(static_folder, template_folder, build_dir), 'files': files}
+    _write(os.path.join(build_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def load_manifest(static_folder, template_folder, build_dir, purge=('css/bootstrap.min.css',)):
+    # Reuse the previous build when nothing changed; only stat() calls needed.
+    try:
+        with open(os.path.join(build_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('signature') == _sources_signature(static_folder, template_folder, build_dir):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return build_assets(static_folder, template_folder, build_dir, purge)
+
+
+def init_app(app):
+    app.config.setdefault('ASSETS_ENABLED', True)
+    app.config.setdefault('ASSETS_BUILD_DIR', os.path.join(app.root_path, 'build', 'assets'))
+    app.config.setdefault('ASSETS_PURGE_CSS', ['css/bootstrap.min.css'])
+    app.config.setdefault('ASSETS_URL_PATH', '/assets')
+    build_dir = app.config['ASSETS_BUILD_DIR']
+    template_folder = os.path.join(app.root_path, app.template_folder)
+    files = {}
+    if app.config['ASSETS_ENABLED']:
+        files = load_manifest(app.static_folder, template_folder, build_dir, tuple(app.config['ASSETS_PURGE_CSS']))['files']
+    app.extensions['assets'] = files
+    hashed_names = set(files.values())
+
+    def serve_asset(filename):
+        if filename not in hashed_names:
+            abort(404)
+        path = os.path.join(build_dir, filename)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+        for candidate, suffix in ENCODINGS:
+            if request.accept_encodings[candidate] > 0 and os.path.exists(path + suffix):
+                encoding, path = candidate, path + suffix
+                break
+        response = send_file(path, mimetype=mimetype, max_age=31536000, etag=True, conditional=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+    app.add_url_rule(f"{app.config['ASSETS_URL_PATH']}/<path:filename>", 'assets', serve_asset)
+
+    def asset_url_for(endpoint, **values):
+        if endpoint == 'static' and values.get('filename') in files:
+            endpoint, values['filename'] = 'assets', files[values['filename']]
+        return url_for(endpoint, **values)
+
+    app.jinja_env.globals['url_for'] = asset_url_for
+    app.jinja_env.globals['asset_url'] = lambda filename: asset_url_for('static', filename=filename)
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        manifest = build_assets(app.static_folder, template_folder, build_dir, tuple(app.config['ASSETS_PURGE_CSS']))
+        print(f"Built {len(manifest['files'])} assets into {build_dir}")
+
+
+if __name__ == '__main__':
+    root = os.path.dirname(os.path.abspath(__file__))
+    result = build_assets(os.path.join(root, 'static'), os.path.join(root, 'ficore_templates'), os.path.join(root, 'build', 'assets'))
+    print(f"Built {len(result['files'])} assets")
@@ -0,0 +1,51 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+# asyncio facade over the Sheets storage. gspread has no async API, so calls
+# run on a bounded I/O pool whose threads each keep a pooled, authorized
+# client; the rate limiter in sheets still caps what actually goes out. The
+# caller's contextvars (and with them the Flask app context) follow each call.
+
+
+class AsyncSheets:
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sheets-io')
+        return self._executor
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, context.run, func, *args)
+
+    async def gather(self, calls, timeout):
+        # calls maps a name to a zero-argument function; each gets its own
+        # deadline and reports 'ok', 'timeout' or 'error' without failing the rest.
+        async def settle(name, func):
+            try:
+                return {'status': 'ok', 'data': await asyncio.wait_for(self.run(func), timeout)}
+            except asyncio.TimeoutError:
+                return {'status': 'timeout', 'data': None}
+            except Exception as e:
+                current_app.logger.warning('Sheets call %s failed: %s', name, e)
+                return {'status': 'error', 'data': None}
+        names = list(calls)
+        results = await asyncio.gather(*(settle(name, calls[name]) for name in names))
+        return dict(zip(names, results))
+
+
+def get_async_sheets():
+    return current_app.extensions['async_sheets']
+
+
+def init_app(app):
+    app.config.setdefault('SHEETS_IO_THREADS', 16)
+    app.extensions['async_sheets'] = AsyncSheets(app.config['SHEETS_IO_THREADS'])
@@ -0,0 +1,259 @@
+import bisect
+import json
+import os
+import time
+import uuid
+
+import click
+
+from shared_cache import cache, publish_invalidation
+from sheets import PREDETERMINED_HEADERS, SHEET_NAMES, ensure_sheet_and_headers
+
+# Incremental batch scoring, replacing the notebook's full recompute. The job
+# reads Submissions from a row watermark onwards, a chunk at a time, scores
+# each new submission (a person's latest submission is their score) and
+# merges it into a ranking kept sorted by score, so only ranks from the
+# highest moved position down can change. Scores use the notebook's formula,
+# so FicoreAIResults keeps publishing on the same scale. Changed rows of FicoreAIResults
+# are written with one batched update per chunk to rows assigned once per
+# person, which makes a repeated chunk harmless; people with a new or changed
+# score are queued a score report in the shared cache, like bill reminders.
+#
+# State is checkpointed to a JSON file after every chunk, with the reports
+# still to queue, so a run that dies part-way resumes from the last chunk.
+#
+#   flask score-submissions [--chunk-size 200] [--no-notify]
+
+SUBMISSIONS = SHEET_NAMES['submissions']
+RESULTS = SHEET_NAMES['score_results']
+COLUMNS = PREDETERMINED_HEADERS[SUBMISSIONS]
+QUEUE_TAIL_KEY = 'score_reports:tail'
+RUNNING_KEY = 'score_submissions:running'
+# The run lock is refreshed after every chunk
+RUN_LOCK_TIMEOUT = 600
+REPORT_TTL = 30 * 24 * 3600
+
+
+class ScoringInProgress(Exception):
+    pass
+
+
+def _column(index):
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _number(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def new_state():
+    # scores: email -> [score, submission ID]; rows: email -> results row;
+    # written: email -> [score, rank] as last written; notified: email -> score
+    return {'watermark': 0, 'scores': {}, 'rows': {}, 'written': {}, 'notified': {}, 'next_row': 2, 'outbox': []}
+
+
+def load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, state):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(state, f)
+    os.replace(temporary, path)
+
+
+def adopt_results(state, worksheet):
+    # First run: rows already in the results sheet (from the notebook) are
+    # reused for the same people instead of duplicated
+    values = worksheet.get_all_values()
+    for offset, row in enumerate(values[1:], start=2):
+        if row and row[0] and row[0] not in state['rows']:
+            state['rows'][row[0]] = offset
+            state['written'][row[0]] = [_number(row[1] if len(row) > 1 else 0), int(_number(row[2] if len(row) > 2 else 0))]
+    state['next_row'] = max(len(values) + 1, 2)
+
+
+class Ranking:
+    # (-score, email), ascending: best first, ties by email
+    def __init__(self, scores):
+        self.keys = sorted((-score, email) for email, (score, _) in scores.items())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def move(self, email, old_score, score):
+        # Returns the lowest position whose rank may have changed
+        moved = len(self.keys)
+        if old_score is not None:
+            position = bisect.bisect_left(self.keys, (-old_score, email))
+            del self.keys[position]
+            moved = position
+        position = bisect.bisect_left(self.keys, (-score, email))
+        self.keys.insert(position, (-score, email))
+        return min(moved, position)
+
+    def ranks_from(self, position):
+        # Competition ranking (1, 2, 2, 4) for every entry from `position` on
+        if position >= len(self.keys):
+            return
+        rank = bisect.bisect_left(self.keys, (self.keys[position][0],)) + 1
+        previous = self.keys[position][0]
+        for index in range(position, len(self.keys)):
+            key, email = self.keys[index]
+            if key != previous:
+                rank, previous = index + 1, key
+            yield email, -key, rank
+
+
+def _clip(value):
+    return min(max(value, 0.0), 1.0)
+
+
+def score_row(record):
+    # The notebook's score: cash flow, debt-to-income and interest burden
+    # (20% counts as the maximum), each on a 0-1 scale, weighted 0.333
+    income = _number(record.get('Income/Revenue'))
+    safe_income = income or 1e-10
+    cash_flow = _clip((income - _number(record.get('Expenses/Costs'))) / safe_income)
+    debt_to_income = 1 - _clip(_number(record.get('Debt/Loan')) / safe_income)
+    interest = 1 - _clip(max(_number(record.get('Debt Interest Rate')), 0.0) / 20)
+    return round((cash_flow * 0.333 + debt_to_income * 0.333 + interest * 0.333) * 100, 2)
+
+
+def merge_chunk(state, ranking, records):
+    # Latest submission per person wins; returns (changed rows, reports)
+    latest = {}
+    for record in records:
+        email = str(record.get('Email') or '').strip()
+        if email:
+            latest[email] = record
+    lowest = len(ranking)
+    for email, record in latest.items():
+        score = score_row(record)
+        previous = state['scores'].get(email)
+        lowest = min(lowest, ranking.move(email, previous[0] if previous else None, score))
+        state['scores'][email] = [score, str(record.get('ID') or '')]
+    changed, ranks = [], {}
+    for email, score, rank in ranking.ranks_from(lowest):
+        ranks[email] = rank
+        if state['written'].get(email) != [score, rank]:
+            changed.append((email, score, rank))
+    reports = []
+    for email, record in latest.items():
+        score = state['scores'][email][0]
+        if state['notified'].get(email) == score:
+            continue
+        reports.append({'email': email, 'submission': state['scores'][email][1], 'first_name': record.get('First Name', ''),
+                        'language': record.get('Language') or 'English', 'score': score, 'rank': ranks[email], 'total_users': len(ranking)})
+    return changed, reports
+
+
+def write_results(worksheet, state, changed):
+    # Rows are assigned before writing, so replaying a chunk rewrites the
+    # same cells instead of appending them again
+    for email, _, _ in changed:
+        if email not in state['rows']:
+            state['rows'][email] = state['next_row']
+            state['next_row'] += 1
+    if not changed:
+        return
+    if state['next_row'] - 1 > worksheet.row_count:
+        worksheet.add_rows(state['next_row'] - 1 - worksheet.row_count)
+    worksheet.batch_update([{'range': f"A{state['rows'][email]}:C{state['rows'][email]}", 'values': [[email, score, rank]]}
+                            for email, score, rank in changed])
+    for email, score, rank in changed:
+        state['written'][email] = [score, rank]
+
+
+def queue_reports(state):
+    # At most once per (person, submission): the marker survives a crash
+    # between queueing and the checkpoint that clears the outbox
+    queued = 0
+    for report in state['outbox']:
+        if cache.add(f"score_report:{report['email']}:{report['submission']}:{report['score']}", 1, timeout=REPORT_TTL):
+            position = cache.cache.inc(QUEUE_TAIL_KEY)
+            cache.set(f'score_reports:{position}', dict(report, queued_at=time.time()), timeout=REPORT_TTL)
+            queued += 1
+        state['notified'][report['email']] = report['score']
+    state['outbox'] = []
+    return queued
+
+
+def _refresh_lock(token):
+    if cache.get(RUNNING_KEY) != token:
+        raise ScoringInProgress('The run lock expired and another run took it')
+    cache.set(RUNNING_KEY, token, timeout=RUN_LOCK_TIMEOUT)
+
+
+def run(checkpoint_path, chunk_size=200, notify=True):
+    token = f'{os.getpid()}:{uuid.uuid4().hex}'
+    if not cache.add(RUNNING_KEY, token, timeout=RUN_LOCK_TIMEOUT):
+        raise ScoringInProgress('Another score-submissions run is in progress')
+    try:
+        submissions = ensure_sheet_and_headers(SUBMISSIONS, COLUMNS)
+        results = ensure_sheet_and_headers(RESULTS, PREDETERMINED_HEADERS[RESULTS])
+        state = load_checkpoint(checkpoint_path)
+        if state is None:
+            state = new_state()
+            adopt_results(state, results)
+        summary = {'submissions': 0, 'rows_written': 0, 'reports': queue_reports(state) if notify else 0}
+        ranking = Ranking(state['scores'])
+        last_column = _column(len(COLUMNS))
+        while True:
+            first = state['watermark'] + 2
+            values = list(submissions.get(f'A{first}:{last_column}{first + chunk_size - 1}', value_render_option='UNFORMATTED_VALUE'))
+            # gspread answers an empty range with [[]]
+            while values and not any(cell not in ('', None) for cell in values[-1]):
+                values.pop()
+            if not values:
+                break
+            rows = [row for row in values if any(cell not in ('', None) for cell in row)]
+            records = [dict(zip(COLUMNS, list(row) + [''] * (len(COLUMNS) - len(row)))) for row in rows]
+            changed, reports = merge_chunk(state, ranking, records)
+            write_results(results, state, changed)
+            state['watermark'] += len(values)
+            if notify:
+                state['outbox'].extend(reports)
+            else:
+                state['notified'].update((report['email'], report['score']) for report in reports)
+            save_checkpoint(checkpoint_path, state)
+            summary['submissions'] += len(rows)
+            summary['rows_written'] += len(changed)
+            if notify:
+                summary['reports'] += queue_reports(state)
+                save_checkpoint(checkpoint_path, state)
+            if len(values) < chunk_size:
+                break
+            _refresh_lock(token)
+        if summary['rows_written']:
+            publish_invalidation(RESULTS)
+        return summary
+    finally:
+        if cache.get(RUNNING_KEY) == token:
+            cache.delete(RUNNING_KEY)
+
+
+def init_app(app):
+    # Kept out of the temp directory: the checkpoint remembers who has been
+    # sent a report, and losing it on a reboot would report to everyone again
+    app.config.setdefault('SCORING_CHECKPOINT_PATH', os.environ.get('SCORING_CHECKPOINT_PATH', os.path.join(app.instance_path, 'scoring_checkpoint.json')))
+
+    @app.cli.command('score-submissions')
+    @click.option('--chunk-size', default=200, show_default=True, help='Submissions read and written per checkpoint.')
+    @click.option('--no-notify', is_flag=True, help='Update scores without queueing score reports (for a backfill).')
+    def score_submissions_command(chunk_size, no_notify):
+        summary = run(app.config['SCORING_CHECKPOINT_PATH'], chunk_size, notify=not no_notify)
+        print(f"Scored {summary['submissions']} submissions, wrote {summary['rows_written']} result rows, queued {summary['reports']} reports")
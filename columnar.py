@@ -0,0 +1,133 @@
+import sys
+from array import array
+from datetime import date, datetime
+
+from shared_cache import cached_generation
+import sheets
+from sheets import PREDETERMINED_HEADERS, SHEET_NAMES
+
+# Columnar copy of a sheet for aggregations. Amounts are parsed once into
+# array('d'), dates into int32 day ordinals and repeated labels (emails,
+# categories, statuses) into small integer codes, so a cached generation is a
+# handful of flat buffers instead of a dict per row, and per-user queries
+# read a precomputed list of row offsets already sorted by date. Columns are
+# built straight from the sheet's values, never from the cached records, so a
+# sheet served as columns does not also keep a dict per row in the cache.
+
+AMOUNT, DATE, CODE, TEXT = 'amount', 'date', 'code', 'text'
+NO_DATE = 0
+
+SCHEMAS = {
+    'expense_tracker': {
+        'ID': TEXT, 'User Email': CODE, 'Amount': AMOUNT, 'Category': CODE,
+        'Date': DATE, 'Description': TEXT, 'Timestamp': TEXT
+    },
+    'bill_planner': {
+        'ID': TEXT, 'User Email': CODE, 'Bill Name': TEXT, 'Amount': AMOUNT,
+        'Due Date': DATE, 'Status': CODE, 'Timestamp': TEXT
+    },
+}
+USER_FIELD = 'User Email'
+SORT_FIELDS = {'expense_tracker': 'Date', 'bill_planner': 'Due Date'}
+
+
+def _amount(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _ordinal(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').toordinal()
+    except (TypeError, ValueError):
+        return NO_DATE
+
+
+class ColumnarSheet:
+    def __init__(self, records, schema, sort_field=None):
+        self._build({name: [record.get(name, '') for record in records] for name in schema}, len(records), schema, sort_field)
+
+    @classmethod
+    def from_values(cls, values, schema, sort_field=None):
+        # values as returned by get_all_values: the header row, then the rows
+        header, rows = (values[0], values[1:]) if values else ([], [])
+        raw = {}
+        for name in schema:
+            index = header.index(name) if name in header else None
+            raw[name] = [row[index] if index is not None and index < len(row) else '' for row in rows]
+        sheet = cls.__new__(cls)
+        sheet._build(raw, len(rows), schema, sort_field)
+        return sheet
+
+    def _build(self, raw, length, schema, sort_field):
+        self.schema = schema
+        self.columns = {}
+        self.labels = {}
+        codes = {}
+        for name, kind in schema.items():
+            values = raw[name]
+            if kind == AMOUNT:
+                self.columns[name] = array('d', map(_amount, values))
+            elif kind == DATE:
+                self.columns[name] = array('i', map(_ordinal, values))
+            elif kind == CODE:
+                labels, lookup = [], {}
+                for value in values:
+                    if value not in lookup:
+                        lookup[value] = len(labels)
+                        labels.append(sys.intern(str(value)))
+                self.columns[name] = array('H' if len(labels) < 1 << 16 else 'I', [lookup[value] for value in values])
+                self.labels[name], codes[name] = labels, lookup
+            else:
+                self.columns[name] = [str(value) for value in values]
+        self.length = length
+
+        # Row offsets per user, ordered by date and then by sheet position
+        self.by_user = {}
+        users = self.columns[USER_FIELD]
+        order = range(self.length)
+        if sort_field:
+            dates = self.columns[sort_field]
+            order = sorted(order, key=dates.__getitem__)
+        for row in order:
+            self.by_user.setdefault(users[row], array('I')).append(row)
+        self._user_codes = codes[USER_FIELD]
+
+    def __len__(self):
+        return self.length
+
+    def rows_for(self, email):
+        code = self._user_codes.get(email)
+        return self.by_user.get(code, array('I')) if code is not None else array('I')
+
+    def label(self, name, row):
+        return self.labels[name][self.columns[name][row]]
+
+    def value(self, name, row):
+        kind = self.schema[name]
+        raw = self.columns[name][row]
+        if kind == CODE:
+            return self.labels[name][raw]
+        if kind == DATE:
+            return date.fromordinal(raw).isoformat() if raw != NO_DATE else ''
+        return raw
+
+    def row(self, row):
+        return {name: self.value(name, row) for name in self.schema}
+
+    def numpy(self, name):
+        # Zero-copy view of a numeric column
+        import numpy as np
+        return np.frombuffer(self.columns[name], dtype=self.columns[name].typecode)
+
+
+def load_columns(sheet_key):
+    sheet_name = SHEET_NAMES[sheet_key]
+    values = sheets.ensure_sheet_and_headers(sheet_name, PREDETERMINED_HEADERS[sheet_name]).get_all_values()
+    return ColumnarSheet.from_values(values, SCHEMAS[sheet_key], SORT_FIELDS.get(sheet_key))
+
+
+def get_columns(sheet_key):
+    return cached_generation('columns', SHEET_NAMES[sheet_key], lambda: load_columns(sheet_key))
@@ -0,0 +1,45 @@
+import functools
+import hashlib
+from datetime import datetime, timezone
+
+from flask import current_app, request, session
+
+from page_cache import csrf_validity_window
+from shared_cache import get_data_version
+
+
+def conditional_on_data(*sheet_names):
+    # Answers GETs with 304 Not Modified, before the view touches Sheets or
+    # renders anything, when the client's copy matches the user's data version.
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or session.get('_flashes'):
+                return view_func(*args, **kwargs)
+            email = session.get('user_email', '')
+            versions = [get_data_version(sheet_name, email) for sheet_name in sheet_names]
+            fingerprint = ':'.join([
+                request.endpoint, email, session.get('language', 'English'),
+                current_app.extensions['template_version'], request.query_string.decode('latin-1'),
+                csrf_validity_window(), *map(str, versions)
+            ])
+            etag = hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:32]
+            last_modified = datetime.fromtimestamp(max(versions) // 1_000_000, timezone.utc) if versions else None
+            if request.if_none_match:
+                not_modified = etag in request.if_none_match
+            else:
+                not_modified = bool(last_modified and request.if_modified_since and request.if_modified_since >= last_modified)
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view_func(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Cookie')
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,279 @@
+import heapq
+import time
+from datetime import date, datetime, timedelta
+
+from shared_cache import LeaseTimeout, cache, clear_stale, is_stale, lease, mark_stale
+import recurrence
+from sheets import get_sheet_records
+
+# Due-date index over every pending bill. Heaps of (due date, key) give the
+# next N bills for a user and the reminder sweep in O(k log n) instead of a
+# full-sheet scan and sort. Edits and payments never search the heaps: they
+# replace the entry in `entries` and stale heap items are dropped when they
+# surface (lazy deletion). A recurring rule has one entry, its next unpaid
+# occurrence, which moves forward as occurrences are paid or reminded.
+#
+# The index lives in the shared cache with a version counter; each process
+# keeps a local copy and reloads it only when another worker changed it. If
+# the cache loses it, it is rebuilt from the sheets. Sent reminders are also
+# recorded per occurrence under keys that never expire, so a rebuilt index
+# does not remind anyone twice.
+
+INDEX_KEY = 'due_index'
+VERSION_KEY = 'due_index:version'
+QUEUE_TAIL_KEY = 'reminders:tail'
+REMINDED_KEY = 'reminded:{}@{}'
+LAST_DATE = date(9000, 1, 1)
+
+
+class DueIndex:
+    def __init__(self):
+        self.entries = {}
+        self.by_user = {}
+        self.reminders = []
+        # Occurrences paid ahead of a rule's tracked due date
+        self.paid = {}
+
+    def _current(self, item):
+        entry = self.entries.get(item[1])
+        return entry is not None and entry['due'] == item[0] and not entry['reminded']
+
+    def upsert(self, key, due, email, name, amount, rule=None):
+        entry = self.entries.get(key)
+        if entry and entry['due'] == due and entry['email'] == email:
+            entry.update(name=name, amount=amount)
+            return
+        self.entries[key] = {'due': due, 'email': email, 'name': name, 'amount': amount, 'rule': rule, 'reminded': False}
+        heapq.heappush(self.by_user.setdefault(email, []), (due, key))
+        heapq.heappush(self.reminders, (due, key))
+        self._maybe_compact()
+
+    def remove(self, key):
+        self.entries.pop(key, None)
+
+    def bill(self, key):
+        entry = self.entries[key]
+        bill_id = recurrence.occurrence_id(key, datetime.strptime(entry['due'], '%Y-%m-%d').date()) if entry['rule'] else key
+        return {'id': bill_id, 'name': entry['name'], 'amount': entry['amount'], 'due_date': entry['due'], 'email': entry['email']}
+
+    def next_for(self, email, n):
+        # k smallest of a binary heap without popping: walk it with a
+        # frontier heap of indices, so the cost is O(k log k) plus stale items.
+        heap = self.by_user.get(email, [])
+        result, frontier = [], [(heap[0], 0)] if heap else []
+        while frontier and len(result) < n:
+            item, index = heapq.heappop(frontier)
+            entry = self.entries.get(item[1])
+            if entry is not None and entry['due'] == item[0] and entry['email'] == email:
+                result.append(self.bill(item[1]))
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return result
+
+    def pop_due(self, until, limit):
+        due = []
+        while self.reminders and len(due) < limit and self.reminders[0][0] <= until:
+            item = heapq.heappop(self.reminders)
+            if self._current(item):
+                self.entries[item[1]]['reminded'] = True
+                due.append(item[1])
+        return due
+
+    def _maybe_compact(self):
+        # Rebuild the heaps once stale items outnumber live entries
+        live = len(self.entries)
+        if len(self.reminders) > 2 * live + 64:
+            self.reminders = [(e['due'], key) for key, e in self.entries.items() if not e['reminded']]
+            heapq.heapify(self.reminders)
+            self.by_user = {}
+            for key, e in self.entries.items():
+                self.by_user.setdefault(e['email'], []).append((e['due'], key))
+            for heap in self.by_user.values():
+                heapq.heapify(heap)
+
+
+def _next_occurrence(rule, after, paid):
+    # First unpaid occurrence of a rule on or after `after`; the generator is
+    # lazy, so this stops after at most len(paid) + 1 occurrences.
+    for due in recurrence.occurrences(rule, after, LAST_DATE):
+        if recurrence.occurrence_id(rule['ID'], due) not in paid:
+            return due
+    return None
+
+
+def track_rule(index, rule, after):
+    paid = index.paid.get(rule['ID'], set())
+    due = _next_occurrence(rule, after, paid)
+    if due is None:
+        index.remove(rule['ID'])
+        index.paid.pop(rule['ID'], None)
+        return
+    index.upsert(rule['ID'], due.isoformat(), rule['User Email'], rule['Bill Name'], rule['Amount'], rule=rule)
+    remaining = {bill_id for bill_id in paid if bill_id.partition('@')[2] > due.isoformat()}
+    if remaining:
+        index.paid[rule['ID']] = remaining
+    else:
+        index.paid.pop(rule['ID'], None)
+
+
+def build(today=None):
+    today = today or date.today()
+    index = DueIndex()
+    for bill in get_sheet_records('bill_planner'):
+        if bill['Status'] == 'Pending' and bill.get('Due Date'):
+            index.upsert(bill['ID'], bill['Due Date'], bill['User Email'], bill['Bill Name'], bill['Amount'])
+        elif bill['Status'] == 'Paid' and '@' in bill['ID']:
+            index.paid.setdefault(bill['ID'].partition('@')[0], set()).add(bill['ID'])
+    for rule in get_sheet_records('bill_recurrence'):
+        track_rule(index, rule, today - timedelta(days=recurrence.LOOKBACK_DAYS))
+    keys = list(index.entries)
+    sent = cache.get_many(*(REMINDED_KEY.format(key, index.entries[key]['due']) for key in keys))
+    for key, was_sent in zip(keys, sent):
+        if was_sent:
+            _skip_reminded(index, key)
+    return index
+
+
+def _skip_reminded(index, key):
+    # Marks an entry a sweep already reminded; a rule moves on to its next
+    # occurrence not reminded yet
+    while key in index.entries:
+        entry = index.entries[key]
+        if not cache.get(REMINDED_KEY.format(key, entry['due'])):
+            return
+        if not entry['rule']:
+            entry['reminded'] = True
+            return
+        track_rule(index, entry['rule'], datetime.strptime(entry['due'], '%Y-%m-%d').date() + timedelta(days=1))
+
+
+_local = {'version': None, 'index': None}
+
+
+def _store(index):
+    cache.set(INDEX_KEY, index, timeout=0)
+    cache.cache.inc(VERSION_KEY)
+
+
+def get_index():
+    version = cache.get(VERSION_KEY)
+    if version is None or _local['version'] != version or _local['index'] is None:
+        index = cache.get(INDEX_KEY) if version is not None else None
+        if index is None or is_stale(INDEX_KEY):
+            try:
+                with lease(INDEX_KEY):
+                    index = None if is_stale(INDEX_KEY) else cache.get(INDEX_KEY)
+                    if index is None:
+                        clear_stale(INDEX_KEY)
+                        index = build()
+                    _store(index)
+            except LeaseTimeout:
+                # Answer from a private build rather than wait any longer
+                return build()
+            version = cache.get(VERSION_KEY)
+        _local.update(version=version, index=index)
+    return _local['index']
+
+
+def update(mutate, rebuild=False):
+    # Read-modify-write of the shared index under a lease. Without a stored
+    # index there is nothing to keep current: the next reader builds it from
+    # the sheets, which already include this write, unless `rebuild` asks
+    # for it to be built here first. A write that cannot get the lease marks
+    # the index stale so the next reader rebuilds it.
+    try:
+        with lease(INDEX_KEY):
+            index = cache.get(INDEX_KEY)
+            if index is None or is_stale(INDEX_KEY):
+                if not rebuild:
+                    return None
+                clear_stale(INDEX_KEY)
+                index = build()
+            result = mutate(index)
+            _store(index)
+    except LeaseTimeout:
+        mark_stale(INDEX_KEY)
+        cache.cache.inc(VERSION_KEY)
+        return None
+    _local.update(version=None, index=None)
+    return result
+
+
+def track_bill(bill):
+    if bill['Status'] == 'Pending':
+        update(lambda index: index.upsert(bill['ID'], bill['Due Date'], bill['User Email'], bill['Bill Name'], bill['Amount']))
+    else:
+        update(lambda index: index.remove(bill['ID']))
+
+
+def track_new_rule(rule, paid=()):
+    start = datetime.strptime(rule['Start Date'], '%Y-%m-%d').date()
+
+    def mutate(index):
+        if paid:
+            index.paid[rule['ID']] = set(paid)
+        track_rule(index, rule, start)
+    update(mutate)
+
+
+def mark_paid(bill_id):
+    rule_id, _, due = bill_id.partition('@')
+
+    def mutate(index):
+        if not due:
+            index.remove(bill_id)
+            return
+        index.paid.setdefault(rule_id, set()).add(bill_id)
+        entry = index.entries.get(rule_id)
+        if entry and entry['rule'] and entry['due'] == due:
+            track_rule(index, entry['rule'], datetime.strptime(due, '%Y-%m-%d').date() + timedelta(days=1))
+    update(mutate)
+
+
+def next_bills(email, n=5):
+    return get_index().next_for(email, n)
+
+
+def enqueue(batch):
+    position = cache.cache.inc(QUEUE_TAIL_KEY)
+    cache.set(f'reminders:{position}', {'queued_at': time.time(), 'reminders': batch}, timeout=7 * 24 * 3600)
+    return position
+
+
+def sweep(today=None, lead_days=3, batch_size=100):
+    # Pop every bill due within `lead_days` (overdue ones included) and
+    # enqueue reminders in batches. Recurring rules move on to their next
+    # occurrence, so each occurrence is reminded once.
+    today = today or date.today()
+    until = (today + timedelta(days=lead_days)).isoformat()
+
+    def pop(index):
+        batches = []
+        while True:
+            keys = index.pop_due(until, batch_size)
+            if not keys:
+                return batches
+            batch = [index.bill(key) for key in keys]
+            cache.set_many({REMINDED_KEY.format(key, index.entries[key]['due']): 1 for key in keys}, timeout=0)
+            for key in keys:
+                entry = index.entries[key]
+                if entry['rule']:
+                    track_rule(index, entry['rule'], datetime.strptime(entry['due'], '%Y-%m-%d').date() + timedelta(days=1))
+            batches.append(batch)
+
+    # After a restart or an eviction the index is built from the sheets first
+    batches = update(pop, rebuild=True)
+    if batches is None:
+        raise LeaseTimeout(INDEX_KEY)
+    return [enqueue(batch) for batch in batches]
+
+
+def init_app(app):
+    app.config.setdefault('BILL_REMINDER_LEAD_DAYS', 3)
+    app.config.setdefault('BILL_REMINDER_BATCH_SIZE', 100)
+
+    @app.cli.command('send-bill-reminders')
+    def send_bill_reminders_command():
+        queued = sweep(lead_days=app.config['BILL_REMINDER_LEAD_DAYS'], batch_size=app.config['BILL_REMINDER_BATCH_SIZE'])
+        print(f'Queued {len(queued)} reminder batches')
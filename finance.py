@@ -0,0 +1,105 @@
+from datetime import date
+
+from translation_catalogs import catalogs
+from columnar import get_columns
+import spending_anomalies
+import spending_cube
+
+# Financial calculations shared by the HTML routes and the JSON API.
+def calculate_health_score(form_data):
+    income = form_data.get('income_revenue', 0)
+    expenses = form_data.get('expenses_costs', 0)
+    debt = form_data.get('debt_loan', 0)
+    interest_rate = form_data.get('debt_interest_rate', 0)
+    
+    savings_ratio = (income - expenses) / income if income > 0 else 0
+    debt_to_income = debt / income if income > 0 else 1
+    score = 100 * (0.5 * savings_ratio - 0.3 * debt_to_income - 0.2 * (interest_rate / 100))
+    return max(0, min(100, round(score)))
+
+def get_score_description(score):
+    if score >= 80:
+        return catalogs['English']['Strong Financial Health']
+    elif score >= 50:
+        return catalogs['English']['Stable Finances']
+    elif score >= 20:
+        return catalogs['English']['Financial Strain']
+    else:
+        return catalogs['English']['Urgent Attention Needed']
+
+def calculate_net_worth(assets, liabilities):
+    return assets - liabilities
+
+def calculate_recommended_fund(monthly_expenses):
+    # Six months of expenses
+    return monthly_expenses * 6
+
+PERSONALITY_TYPES = {
+    5: 'Financial Guru',
+    4: 'Prudent Planner',
+    3: 'Balanced Budgeter',
+    2: 'Casual Spender',
+    1: 'Risky Rover',
+    0: 'Free Spirit'
+}
+
+def score_quiz(answers):
+    score = sum(1 for answer in answers if answer == 'Yes')
+    return score, PERSONALITY_TYPES.get(score, 'Balanced Budgeter')
+
+def calculate_budget(monthly_income, housing, food, transport, other):
+    total_expenses = sum([housing, food, transport, other])
+    return total_expenses, monthly_income - total_expenses
+
+def suggest_category(description):
+    if not description:
+        return 'Other'
+    description = description.lower()
+    if any(keyword in description for keyword in ['food', 'groceries', 'market']):
+        return 'Food and Groceries'
+    elif any(keyword in description for keyword in ['transport', 'fuel', 'bus', 'taxi']):
+        return 'Transport'
+    elif any(keyword in description for keyword in ['rent', 'mortgage', 'housing']):
+        return 'Housing'
+    elif any(keyword in description for keyword in ['electricity', 'water', 'internet']):
+        return 'Utilities'
+    elif any(keyword in description for keyword in ['movie', 'concert', 'entertainment']):
+        return 'Entertainment'
+    return 'Other'
+
+def calculate_running_balance(email):
+    columns = get_columns('expense_tracker')
+    offsets = columns.rows_for(email)
+    amounts = columns.columns['Amount']
+    user_expenses = []
+    balance = 0
+    for row in offsets:
+        balance -= amounts[row]
+        expense = columns.row(row)
+        expense['Running Balance'] = balance
+        user_expenses.append(expense)
+    return user_expenses, balance
+
+def generate_insights(email, today=None, language='English'):
+    strings = catalogs[language]
+    cube = spending_cube.get_cube(email)
+    if not cube.days:
+        return []
+    today = today or date.today()
+    categories = cube.by_category()
+    balance = -sum(categories.values())
+    total_spent = sum(categories.values())
+    insights = spending_anomalies.recent_messages(email, today, language)
+    for cat, amount in categories.items():
+        percentage = (amount / total_spent) * 100 if total_spent > 0 else 0
+        if percentage > 30:
+            insights.append(strings['Category Share Insight'].format(percentage=percentage, category=strings.get(cat, cat)))
+    for cat, (current, previous) in spending_cube.month_over_month(cube, today).items():
+        change = (current - previous) / previous * 100 if previous > 0 else 0
+        if change >= 25:
+            insights.append(strings['Month Increase Insight'].format(change=change, category=strings.get(cat, cat)))
+        elif change <= -25:
+            insights.append(strings['Month Decrease Insight'].format(change=-change, category=strings.get(cat, cat)))
+    if balance < 0:
+        insights.append(strings['Negative Balance Insight'])
+    return insights
@@ -1,8 +1,26 @@
+import os
+
 bind = "0.0.0.0:10000"
-workers = 2
-worker_class = "sync"
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+# Threaded workers keep hundreds of requests in flight while they wait on
+# Google Sheets; outbound calls are still capped by the limiter in sheets.py.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", "100"))
 timeout = 30
 keepalive = 2
 loglevel = "info"
 accesslog = "-"
 errorlog = "-"
+# Import the app once in the master so workers fork with it already loaded
+# and share its memory copy-on-write instead of importing it per worker.
+preload_app = True
+
+
+def when_ready(server):
+    # Startup report of the template warm-up the preloaded app did
+    import template_cache
+    from app import app
+    report = app.extensions.get('template_warmup')
+    if report:
+        for line in template_cache.report_lines(report):
+            server.log.info(line)
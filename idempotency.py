@@ -0,0 +1,98 @@
+import functools
+import hashlib
+import time
+import uuid
+
+from flask import current_app, flash, g, redirect, request, session
+from flask_wtf import FlaskForm
+from wtforms import HiddenField
+
+import profiler
+from shared_cache import cache
+
+# Idempotent form submissions. Every rendered form carries a fresh key, and a
+# POST is claimed in the shared cache under (endpoint, key, payload) before
+# the view writes anything. A double-click, browser retry or reload within the
+# TTL is answered with the first submission's redirect and flashes instead of
+# appending another row.
+
+FIELD_NAME = 'idempotency_key'
+KEY_PLACEHOLDER = '__ficore_idempotency_placeholder__'
+PENDING = 'pending'
+
+
+def issue_key():
+    # Cached page shells are rendered with a placeholder that page_cache
+    # swaps for a fresh key per request.
+    return g.get(FIELD_NAME) or uuid.uuid4().hex
+
+
+def fill_keys(body):
+    parts = body.split(KEY_PLACEHOLDER)
+    return parts[0] + ''.join(issue_key() + part for part in parts[1:])
+
+
+class IdempotentForm(FlaskForm):
+    idempotency_key = HiddenField(default=issue_key)
+
+    def validate(self, extra_validators=None):
+        with profiler.span('form validation'):
+            return super().validate(extra_validators)
+
+
+def init_app(app):
+    app.config.setdefault('IDEMPOTENCY_TTL', 600)
+    app.config.setdefault('IDEMPOTENCY_WAIT', 5.0)
+
+
+def _fingerprint():
+    # The same key with a different payload is a new submission, e.g. a form
+    # re-filled from a page the browser revalidated with a 304.
+    skip = {FIELD_NAME, current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token')}
+    fields = sorted((k, v) for k, v in request.form.items(multi=True) if k not in skip)
+    payload = repr((session.get('user_email', ''), request.view_args, fields))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def _wait_for_outcome(cache_key):
+    deadline = time.monotonic() + current_app.config['IDEMPOTENCY_WAIT']
+    while time.monotonic() < deadline:
+        outcome = cache.get(cache_key)
+        if outcome != PENDING:
+            return outcome
+        time.sleep(0.05)
+    return None
+
+
+def _replay(outcome):
+    for category, message in outcome['flashes']:
+        flash(message, category)
+    return redirect(outcome['location'], outcome['status'])
+
+
+def idempotent(view_func):
+    @functools.wraps(view_func)
+    def wrapper(*args, **kwargs):
+        key = request.form.get(FIELD_NAME) or request.headers.get('Idempotency-Key')
+        if request.method != 'POST' or not key:
+            return view_func(*args, **kwargs)
+        ttl = current_app.config['IDEMPOTENCY_TTL']
+        cache_key = f'idem:{request.endpoint}:{key}:{_fingerprint()}'
+        if not cache.add(cache_key, PENDING, timeout=ttl):
+            outcome = _wait_for_outcome(cache_key)
+            if outcome is None:
+                return 'Submission already in progress', 409
+            return _replay(outcome)
+        flashed = len(session.get('_flashes', []))
+        try:
+            response = current_app.make_response(view_func(*args, **kwargs))
+        except Exception:
+            cache.delete(cache_key)
+            raise
+        if response.status_code in (301, 302, 303, 307, 308):
+            cache.set(cache_key, {'location': response.location, 'status': response.status_code, 'flashes': session.get('_flashes', [])[flashed:]}, timeout=ttl)
+        else:
+            # Re-rendered forms (validation errors) wrote nothing to replay
+            cache.delete(cache_key)
+        return response
+    return wrapper
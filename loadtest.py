@@ -0,0 +1,200 @@
+import argparse
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import requests
+
+from sheets_emulator import SheetsEmulator, serve
+
+# Load generator for the full stack. Virtual users walk a weighted mix of the
+# app's pages, form posts and API calls against a running app, or against
+# gunicorn started here once per --gunicorn configuration, with Sheets served
+# by the local emulator so no quota is spent. Reports throughput and latency
+# percentiles per route and per configuration. The app's own outbound limit
+# (SHEETS_REQUESTS_PER_MINUTE, 300 by default) still applies; raise it to
+# measure the stack rather than the limiter.
+#
+#   python loadtest.py --emulator --latency lognormal:80:0.6 \
+#       --gunicorn workers=2,threads=100 --gunicorn workers=4,worker_class=sync,threads=1
+
+HIDDEN_FIELD = re.compile(r'<input[^>]*name="(csrf_token|idempotency_key)"[^>]*value="([^"]*)"')
+
+
+def _hidden_fields(html):
+    return dict(HIDDEN_FIELD.findall(html))
+
+
+def _post_form(session, base, path, fields):
+    page = session.get(base + path)
+    return session.post(base + path, data=dict(_hidden_fields(page.text), **fields), allow_redirects=False)
+
+
+def _person():
+    email = f'load-{uuid.uuid4().hex[:8]}@example.com'
+    return {'first_name': 'Load', 'email': email, 'auto_email': email, 'language': 'English'}
+
+
+def post_net_worth(session, base):
+    return _post_form(session, base, '/net_worth', dict(_person(), assets=random.randint(1000, 90000), liabilities=random.randint(0, 50000)))
+
+
+def post_budget(session, base):
+    return _post_form(session, base, '/budget', dict(
+        _person(), monthly_income=random.randint(50000, 400000), housing_expenses=random.randint(10000, 80000),
+        food_expenses=random.randint(5000, 60000), transport_expenses=random.randint(1000, 30000), other_expenses=random.randint(0, 20000)))
+
+
+def post_emergency_fund(session, base):
+    return _post_form(session, base, '/emergency_fund', dict(_person(), monthly_expenses=random.randint(20000, 200000)))
+
+
+def api_health_score(session, base):
+    return session.post(base + '/api/v1/health-score', json={'income_revenue': random.randint(1000, 90000), 'expenses_costs': random.randint(0, 50000), 'debt_loan': 0, 'debt_interest_rate': 0})
+
+
+def _get(path):
+    return lambda session, base: session.get(base + path)
+
+
+# (name, weight, request); mostly page views, with a steady trickle of writes
+MIX = [
+    ('GET /', 30, _get('/')),
+    ('GET /financial_health', 15, _get('/financial_health')),
+    ('GET /net_worth', 10, _get('/net_worth')),
+    ('GET /budget', 10, _get('/budget')),
+    ('GET /quiz', 5, _get('/quiz')),
+    ('POST /net_worth', 6, post_net_worth),
+    ('POST /budget', 6, post_budget),
+    ('POST /emergency_fund', 3, post_emergency_fund),
+    ('POST /api/v1/health-score', 15, api_health_score),
+]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_load(base, duration, concurrency, mix=MIX):
+    names, weights, calls = zip(*[(name, weight, call) for name, weight, call in mix])
+    results = {name: [] for name in names}
+    failures = {name: 0 for name in names}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def user():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            index = random.choices(range(len(names)), weights)[0]
+            start = time.perf_counter()
+            try:
+                failed = calls[index](session, base).status_code >= 500
+            except requests.RequestException:
+                failed = True
+            elapsed = time.perf_counter() - start
+            with lock:
+                results[names[index]].append(elapsed)
+                failures[names[index]] += failed
+
+    threads = [threading.Thread(target=user) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.monotonic() - started
+
+    report = {}
+    for name in names:
+        latencies = sorted(results[name])
+        report[name] = {
+            'requests': len(latencies), 'failures': failures[name],
+            'p50': percentile(latencies, 0.5), 'p95': percentile(latencies, 0.95), 'p99': percentile(latencies, 0.99),
+            'max': latencies[-1] if latencies else 0.0
+        }
+    everything = sorted(latency for values in results.values() for latency in values)
+    report['total'] = {
+        'requests': len(everything), 'failures': sum(failures.values()), 'throughput': len(everything) / wall,
+        'p50': percentile(everything, 0.5), 'p95': percentile(everything, 0.95), 'p99': percentile(everything, 0.99),
+        'max': everything[-1] if everything else 0.0
+    }
+    return report
+
+
+def print_report(label, report):
+    print(f"\n== {label}: {report['total']['throughput']:.1f} req/s")
+    print(f"{'route':30} {'requests':>9} {'failed':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, row in report.items():
+        print(f"{name:30} {row['requests']:9d} {row['failures']:7d} {row['p50'] * 1000:8.1f} {row['p95'] * 1000:8.1f} {row['p99'] * 1000:8.1f} {row['max'] * 1000:8.1f}")
+
+
+def parse_gunicorn(spec):
+    # "workers=4,worker_class=gthread,threads=50" -> GUNICORN_* environment
+    env = {}
+    for item in spec.split(','):
+        name, _, value = item.partition('=')
+        env[f'GUNICORN_{name.strip().upper()}'] = value.strip()
+    return env
+
+
+def wait_until_up(base, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(base + '/', timeout=2).status_code < 500:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'{base} did not come up within {timeout}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive a realistic request mix through the app and report throughput and tail latency')
+    parser.add_argument('--target', default='http://127.0.0.1:10000', help='base URL of a running app (ignored with --gunicorn)')
+    parser.add_argument('--gunicorn', action='append', default=[], help='start gunicorn with this configuration, e.g. workers=2,threads=100; repeatable')
+    parser.add_argument('--port', type=int, default=10100, help='port for the gunicorn started here')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--emulator', action='store_true', help='serve Sheets from an in-process emulator')
+    parser.add_argument('--latency', default='lognormal:80:0.6', help='emulator latency distribution')
+    parser.add_argument('--quota-per-minute', type=int, default=0, help='emulator quota (0: unlimited)')
+    parser.add_argument('--sheets-api-url', default=os.environ.get('SHEETS_API_URL', ''), help='an already running emulator')
+    args = parser.parse_args()
+
+    sheets_api_url = args.sheets_api_url
+    if args.emulator:
+        emulator = SheetsEmulator(args.latency, args.quota_per_minute)
+        server = serve(emulator, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        sheets_api_url = f'http://127.0.0.1:{server.server_port}'
+
+    if not args.gunicorn:
+        print_report(args.target, run_load(args.target, args.duration, args.concurrency))
+        return
+
+    base = f'http://127.0.0.1:{args.port}'
+    for spec in args.gunicorn:
+        env = dict(os.environ, SESSION_COOKIE_SECURE='0', **parse_gunicorn(spec))
+        if sheets_api_url:
+            env['SHEETS_API_URL'] = sheets_api_url
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{args.port}', '--access-logfile', '/dev/null', 'app:app'],
+            env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+        try:
+            wait_until_up(base)
+            print_report(spec, run_load(base, args.duration, args.concurrency))
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import asyncio
+from functools import partial
+
+from flask import current_app
+
+from async_sheets import get_async_sheets
+from columnar import get_columns
+from recurrence import user_bills
+from sheets import get_sheet_records
+
+# Per-user overview across every tool sheet. Sources are awaited together on
+# the async Sheets I/O pool, so the page costs the slowest source rather than
+# the sum, and a source that misses the deadline is reported instead of blocking.
+
+
+def _latest(sheet_key, email, fields):
+    rows = [r for r in get_sheet_records(sheet_key) if r['Email'] == email]
+    if not rows:
+        return None
+    latest = max(rows, key=lambda r: r['Timestamp'])
+    return {name: latest[column] for name, column in fields.items()}
+
+
+def net_worth(email):
+    return _latest('net_worth', email, {'assets': 'Assets', 'liabilities': 'Liabilities', 'net_worth': 'Net Worth', 'timestamp': 'Timestamp'})
+
+
+def emergency_fund(email):
+    return _latest('emergency_fund', email, {'monthly_expenses': 'Monthly Expenses', 'recommended_fund': 'Recommended Fund', 'timestamp': 'Timestamp'})
+
+
+def quiz(email):
+    return _latest('quiz', email, {'score': 'Score', 'personality': 'Personality Type', 'timestamp': 'Timestamp'})
+
+
+def budget(email):
+    return _latest('budget', email, {'monthly_income': 'Monthly Income', 'savings': 'Savings', 'timestamp': 'Timestamp'})
+
+
+def expenses(email):
+    columns = get_columns('expense_tracker')
+    rows = columns.rows_for(email)
+    if not rows:
+        return None
+    amounts = columns.columns['Amount']
+    return {'count': len(rows), 'balance': -sum(amounts[row] for row in rows), 'latest_date': columns.value('Date', rows[-1])}
+
+
+def bills(email):
+    pending = sorted((r for r in user_bills(email) if r['Status'] == 'Pending'), key=lambda r: r['Due Date'])
+    if not pending:
+        return None
+    return {'pending': len(pending), 'pending_amount': sum(float(r['Amount']) for r in pending), 'next_due': pending[0]['Due Date'], 'next_bill': pending[0]['Bill Name']}
+
+
+SOURCES = {
+    'net_worth': net_worth,
+    'emergency_fund': emergency_fund,
+    'quiz': quiz,
+    'budget': budget,
+    'expenses': expenses,
+    'bills': bills
+}
+
+
+async def fetch_overview_async(email, timeout=None):
+    timeout = current_app.config['OVERVIEW_SOURCE_TIMEOUT'] if timeout is None else timeout
+    return await get_async_sheets().gather({name: partial(source, email) for name, source in SOURCES.items()}, timeout)
+
+
+def fetch_overview(email, timeout=None):
+    return asyncio.run(fetch_overview_async(email, timeout))
+
+
+def init_app(app):
+    app.config.setdefault('OVERVIEW_SOURCE_TIMEOUT', 5.0)
@@ -0,0 +1,106 @@
+import functools
+import hashlib
+import os
+import time
+from urllib.parse import urlencode
+
+from flask import current_app, g, request, session
+from flask_wtf.csrf import generate_csrf
+
+import idempotency
+from shared_cache import cache
+
+# Full-page cache for pages whose output only depends on the session language
+# and the per-request form tokens. Pages are rendered once per (endpoint,
+# language, template version) with placeholder tokens, and the real CSRF token
+# and fresh idempotency keys are spliced into the cached shell on every request.
+
+CSRF_PLACEHOLDER = '__ficore_csrf_placeholder__'
+
+
+def _csrf_field_name():
+    return current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token')
+
+
+def compute_template_version(app):
+    digest = hashlib.sha256()
+    template_folder = os.path.join(app.root_path, app.template_folder)
+    for name in sorted(os.listdir(template_folder)):
+        with open(os.path.join(template_folder, name), 'rb') as f:
+            digest.update(name.encode() + b'\0' + f.read())
+    with open(os.path.join(app.root_path, 'translations.py'), 'rb') as f:
+        digest.update(f.read())
+    for name, hashed in sorted(app.extensions.get('assets', {}).items()):
+        digest.update(f'{name}={hashed}'.encode())
+    return digest.hexdigest()[:16]
+
+
+def init_app(app):
+    app.config.setdefault('PAGE_CACHE_ENABLED', True)
+    app.extensions['template_version'] = app.config.get('TEMPLATE_VERSION') or compute_template_version(app)
+
+
+def _render_shell(view_func, args, kwargs):
+    field_name = _csrf_field_name()
+    setattr(g, field_name, CSRF_PLACEHOLDER)
+    setattr(g, idempotency.FIELD_NAME, idempotency.KEY_PLACEHOLDER)
+    try:
+        response = current_app.make_response(view_func(*args, **kwargs))
+    finally:
+        g.pop(field_name, None)
+        g.pop(idempotency.FIELD_NAME, None)
+    if response.status_code != 200 or response.direct_passthrough:
+        return None, response
+    body = response.get_data(as_text=True)
+    return {'body': body, 'mimetype': response.mimetype, 'digest': hashlib.sha256(body.encode('utf-8')).hexdigest()[:16]}, response
+
+
+def csrf_validity_window():
+    # The signed CSRF token in a page changes every request, so ETags of pages
+    # with forms are tied to the session's raw token and a window well inside
+    # the token's lifetime instead; a 304 never hands back an expired token.
+    generate_csrf()
+    time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600) or 3600
+    return f"{session[_csrf_field_name()]}:{int(time.time() // max(time_limit // 2, 1))}"
+
+
+def _etag(entry):
+    window = csrf_validity_window() if CSRF_PLACEHOLDER in entry['body'] else ''
+    return hashlib.sha256(f"{entry['digest']}:{window}".encode()).hexdigest()[:32]
+
+
+def cached_page(view_func=None, params=()):
+    # `params` names the query parameters the view reads. Only those, in a
+    # fixed order, are part of the key, so arbitrary query strings cannot
+    # add cache entries. Use as @cached_page or @cached_page(params=(...)).
+    if view_func is None:
+        return functools.partial(cached_page, params=tuple(params))
+
+    @functools.wraps(view_func)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET' or not current_app.config['PAGE_CACHE_ENABLED'] or session.get('_flashes'):
+            return view_func(*args, **kwargs)
+        language = session.get('language', 'English')
+        query = urlencode([(name, value) for name in sorted(params) for value in request.args.getlist(name)])
+        key = f"page:{request.endpoint}:{language}:{current_app.extensions['template_version']}:{query}"
+        entry = cache.get(key)
+        if entry is None:
+            entry, response = _render_shell(view_func, args, kwargs)
+            if entry is None:
+                return response
+            cache.set(key, entry)
+        etag = _etag(entry)
+        if etag in request.if_none_match:
+            response = current_app.response_class(status=304)
+        else:
+            body = entry['body']
+            if CSRF_PLACEHOLDER in body:
+                body = body.replace(CSRF_PLACEHOLDER, generate_csrf())
+            if idempotency.KEY_PLACEHOLDER in body:
+                body = idempotency.fill_keys(body)
+            response = current_app.response_class(body, mimetype=entry['mimetype'])
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Cookie')
+        return response
+    return wrapper
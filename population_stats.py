@@ -0,0 +1,228 @@
+import bisect
+import math
+
+from shared_cache import LeaseTimeout, cache, lease
+
+# Population statistics maintained incrementally on every submission, so
+# dashboards can compare a user with everyone else (or with people who share
+# their language and user type) without scanning a sheet. Each (metric,
+# segment) keeps a Welford mean/variance, a fixed-bucket histogram and P²
+# quantile estimators in the shared cache, updated under a lease; categorical
+# metrics keep counts.
+# Everything here is derived data: `flask rebuild-population-stats` replays
+# the sheets if the cache is lost.
+
+METRICS = {
+    'health_score': [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
+    'net_worth': [-10_000_000, -1_000_000, -100_000, 0, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000, 50_000_000, 100_000_000],
+    'emergency_fund': [0, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000, 50_000_000],
+    'savings_ratio': [-1.0, -0.5, -0.25, 0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.75, 1.0],
+}
+CATEGORICAL = ('personality',)
+QUANTILES = (0.25, 0.5, 0.75, 0.9)
+SEGMENT_FIELDS = ('language', 'user_type')
+MIN_PEERS = 20
+ALL = 'all'
+
+
+def segment_names(segments=None):
+    # Most specific first: language+user_type, then each field, then everyone.
+    present = [(field, segments[field]) for field in SEGMENT_FIELDS if segments and segments.get(field)]
+    names = []
+    if len(present) > 1:
+        names.append('|'.join(f'{field}={value}' for field, value in present))
+    names.extend(f'{field}={value}' for field, value in present)
+    names.append(ALL)
+    return names
+
+
+def _key(metric, segment):
+    return f'popstats:{metric}:{segment}'
+
+
+def _new_state(metric):
+    return {
+        'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': None, 'max': None,
+        'histogram': [0] * (len(METRICS[metric]) + 1),
+        'quantiles': {q: {'heights': [], 'positions': [1, 2, 3, 4, 5], 'desired': [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]} for q in QUANTILES}
+    }
+
+
+def _p2_add(sketch, q, x):
+    # P² algorithm (Jain & Chlamtac): five markers track the q-quantile in O(1)
+    # space without keeping the observations.
+    heights, positions, desired = sketch['heights'], sketch['positions'], sketch['desired']
+    if len(heights) < 5:
+        bisect.insort(heights, x)
+        return
+    if x < heights[0]:
+        heights[0] = x
+        k = 0
+    elif x >= heights[4]:
+        heights[4] = x
+        k = 3
+    else:
+        k = bisect.bisect_right(heights, x) - 1
+    for i in range(k + 1, 5):
+        positions[i] += 1
+    increments = (0, q / 2, q, (1 + q) / 2, 1)
+    for i in range(5):
+        desired[i] += increments[i]
+    for i in (1, 2, 3):
+        d = desired[i] - positions[i]
+        if (d >= 1 and positions[i + 1] - positions[i] > 1) or (d <= -1 and positions[i - 1] - positions[i] < -1):
+            d = 1 if d > 0 else -1
+            parabolic = heights[i] + d / (positions[i + 1] - positions[i - 1]) * (
+                (positions[i] - positions[i - 1] + d) * (heights[i + 1] - heights[i]) / (positions[i + 1] - positions[i])
+                + (positions[i + 1] - positions[i] - d) * (heights[i] - heights[i - 1]) / (positions[i] - positions[i - 1]))
+            if heights[i - 1] < parabolic < heights[i + 1]:
+                heights[i] = parabolic
+            else:
+                heights[i] += d * (heights[i + d] - heights[i]) / (positions[i + d] - positions[i])
+            positions[i] += d
+
+
+def _p2_value(sketch, q):
+    heights = sketch['heights']
+    if not heights:
+        return None
+    if len(heights) < 5:
+        return heights[min(len(heights) - 1, int(q * len(heights)))]
+    return heights[2]
+
+
+def _add(state, metric, x):
+    state['count'] += 1
+    delta = x - state['mean']
+    state['mean'] += delta / state['count']
+    state['m2'] += delta * (x - state['mean'])
+    state['min'] = x if state['min'] is None else min(state['min'], x)
+    state['max'] = x if state['max'] is None else max(state['max'], x)
+    state['histogram'][bisect.bisect_right(METRICS[metric], x)] += 1
+    for q, sketch in state['quantiles'].items():
+        _p2_add(sketch, q, x)
+
+
+def record(metric, value, segments=None):
+    # Under contention past the lease timeout a sample is dropped rather than
+    # written over another worker's update
+    if value is None or not math.isfinite(value):
+        return
+    for segment in segment_names(segments):
+        key = _key(metric, segment)
+        try:
+            with lease(key):
+                state = cache.get(key) or _new_state(metric)
+                _add(state, metric, float(value))
+                cache.set(key, state, timeout=0)
+        except LeaseTimeout:
+            continue
+
+
+def record_category(metric, category, segments=None):
+    for segment in segment_names(segments):
+        key = _key(metric, segment)
+        try:
+            with lease(key):
+                counts = cache.get(key) or {}
+                counts[category] = counts.get(category, 0) + 1
+                cache.set(key, counts, timeout=0)
+        except LeaseTimeout:
+            continue
+
+
+def summary(metric, segment=ALL):
+    state = cache.get(_key(metric, segment))
+    if metric in CATEGORICAL:
+        counts = state or {}
+        return {'segment': segment, 'count': sum(counts.values()), 'counts': counts}
+    if not state:
+        return {'segment': segment, 'count': 0}
+    return {
+        'segment': segment,
+        'count': state['count'],
+        'mean': state['mean'],
+        'stddev': math.sqrt(state['m2'] / (state['count'] - 1)) if state['count'] > 1 else 0.0,
+        'min': state['min'],
+        'max': state['max'],
+        'quantiles': {str(q): _p2_value(sketch, q) for q, sketch in state['quantiles'].items()},
+        'histogram': {'edges': METRICS[metric], 'counts': state['histogram']}
+    }
+
+
+def _fraction_below(state, metric, value):
+    # Histogram CDF, interpolated linearly inside the value's bucket.
+    edges, counts = METRICS[metric], state['histogram']
+    index = bisect.bisect_right(edges, value)
+    below = sum(counts[:index])
+    if 0 < index < len(edges):
+        low, high = edges[index - 1], edges[index]
+        below += counts[index] * (value - low) / (high - low)
+    return below / state['count']
+
+
+def compare(metric, value, segments=None):
+    # "You vs people like you": the most specific segment with enough peers.
+    names = segment_names(segments)
+    for segment in names:
+        state = cache.get(_key(metric, segment))
+        if state and (state['count'] >= MIN_PEERS or segment == ALL):
+            break
+    else:
+        return {'segment': ALL, 'count': 0, 'percentile': None, 'rank': 1, 'mean': None, 'median': None}
+    below = _fraction_below(state, metric, value)
+    return {
+        'segment': segment,
+        'count': state['count'],
+        'percentile': round(100 * below, 1),
+        'rank': max(1, min(state['count'], round(state['count'] * (1 - below)) + 1)),
+        'mean': state['mean'],
+        'median': _p2_value(state['quantiles'][0.5], 0.5)
+    }
+
+
+def _number(row, column):
+    try:
+        return float(row.get(column) or 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def observations():
+    # Every observation the sheets hold, in the shape the live hooks record.
+    from finance import calculate_health_score
+    from sheets import get_sheet_records
+    for row in get_sheet_records('submissions'):
+        score = calculate_health_score({
+            'income_revenue': _number(row, 'Income/Revenue') or 0, 'expenses_costs': _number(row, 'Expenses/Costs') or 0,
+            'debt_loan': _number(row, 'Debt/Loan') or 0, 'debt_interest_rate': _number(row, 'Debt Interest Rate') or 0})
+        yield 'health_score', score, {'language': row.get('Language'), 'user_type': row.get('User Type')}
+    for row in get_sheet_records('net_worth'):
+        yield 'net_worth', _number(row, 'Net Worth'), {'language': row.get('Language')}
+    for row in get_sheet_records('emergency_fund'):
+        yield 'emergency_fund', _number(row, 'Recommended Fund'), {'language': row.get('Language')}
+    for row in get_sheet_records('budget'):
+        income = _number(row, 'Monthly Income')
+        if income:
+            yield 'savings_ratio', (_number(row, 'Savings') or 0) / income, {'language': row.get('Language')}
+    for row in get_sheet_records('quiz'):
+        yield 'personality', row.get('Personality Type'), {'language': row.get('Language')}
+
+
+def rebuild():
+    replay = list(observations())
+    for metric, value, segments in replay:
+        for segment in segment_names(segments):
+            cache.delete(_key(metric, segment))
+    for metric, value, segments in replay:
+        if metric in CATEGORICAL:
+            record_category(metric, value, segments)
+        else:
+            record(metric, value, segments)
+    return len(replay)
+
+
+def init_app(app):
+    @app.cli.command('rebuild-population-stats')
+    def rebuild_population_stats_command():
+        print(f'Replayed {rebuild()} observations')
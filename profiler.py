@@ -0,0 +1,314 @@
+import contextlib
+import contextvars
+import hmac
+import json
+import os
+import queue
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from flask import g, request, template_rendered, before_render_template
+
+# Opt-in per-request sampling profiler. A request is profiled when it carries
+# X-Profile-Token matching PROFILE_TOKEN, or at random with PROFILE_SAMPLE_RATE.
+# While it runs, a background thread samples the request thread's stack every
+# PROFILE_INTERVAL_MS; code tags what it is doing with span() (Sheets calls,
+# template rendering, form validation, date parsing) and each sample is
+# filed under the spans open at that moment. Profiles are written to
+# PROFILE_DIR as speedscope JSON or collapsed stacks (flamegraph.pl and
+# friends), keeping the newest PROFILE_KEEP files. Serializing and writing
+# happen on a background thread, off the request.
+
+HEADER = 'X-Profile-Token'
+FORMATS = ('speedscope', 'collapsed')
+
+_active = contextvars.ContextVar('profile', default=None)
+_profiles = set()
+_lock = threading.Lock()
+_wake = threading.Event()
+_sampler = None
+# Finished profiles waiting to be written; when the writer falls this far
+# behind, new profiles are dropped
+WRITE_QUEUE_SIZE = 20
+_writes = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+_writer = None
+
+
+class Profile:
+    def __init__(self, name, interval):
+        self.name = name
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.finished = None
+        self.owner = threading.get_ident()
+        self.threads = {self.owner: []}
+        self.samples = []
+        self.events = []
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def open_span(self, name):
+        spans = self.threads.setdefault(threading.get_ident(), [])
+        spans.append(name)
+        self.events.append(('O', name, self.elapsed_ms(), threading.get_ident()))
+
+    def close_span(self, name):
+        thread = threading.get_ident()
+        spans = self.threads.get(thread)
+        if not spans or name not in spans:
+            return
+        # Spans opened inside this one and never closed (a template that
+        # raised) end here too, so the timeline stays nested
+        while spans:
+            closing = spans.pop()
+            self.events.append(('C', closing, self.elapsed_ms(), thread))
+            if closing == name:
+                break
+        # Other threads are only sampled while they are inside a span
+        if not spans and thread != self.owner:
+            del self.threads[thread]
+
+    def close_open_spans(self):
+        # Render spans of a template that raised outside any span()
+        spans = self.threads.get(self.owner)
+        if spans:
+            self.close_span(spans[0])
+
+    def sample(self, frames, skip):
+        at = self.elapsed_ms()
+        for thread, spans in list(self.threads.items()):
+            frame = frames.get(thread)
+            if frame is None or thread == skip:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, frame.f_lineno if not stack else code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append((at, tuple(spans), tuple(stack)))
+
+
+def _sample_forever():
+    while True:
+        with _lock:
+            profiles = list(_profiles)
+            if not profiles:
+                _wake.clear()
+        if not profiles:
+            # Idle until start() registers a profile
+            _wake.wait()
+            continue
+        frames = sys._current_frames()
+        for profile in profiles:
+            profile.sample(frames, threading.get_ident())
+        del frames
+        time.sleep(min(profile.interval for profile in profiles))
+
+
+def _ensure_sampler():
+    global _sampler
+    with _lock:
+        if _sampler is None or not _sampler.is_alive() or _sampler.pid != os.getpid():
+            _sampler = threading.Thread(target=_sample_forever, name='profiler-sampler', daemon=True)
+            _sampler.pid = os.getpid()
+            _sampler.start()
+
+
+def start(name, interval=0.005):
+    profile = Profile(name, interval)
+    _ensure_sampler()
+    with _lock:
+        _profiles.add(profile)
+    _wake.set()
+    return profile, _active.set(profile)
+
+
+def stop(profile, token):
+    with _lock:
+        _profiles.discard(profile)
+    _active.reset(token)
+    profile.finished = profile.elapsed_ms()
+    return profile
+
+
+@contextlib.contextmanager
+def span(name):
+    # Cheap no-op unless the current request is being profiled
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    profile.open_span(name)
+    try:
+        yield
+    finally:
+        profile.close_span(name)
+
+
+def _frame_name(frame):
+    name, filename, line = frame
+    return f'{name} ({os.path.basename(filename)}:{line})'
+
+
+def collapsed(profile):
+    counts = {}
+    for _, spans, stack in profile.samples:
+        key = ';'.join([f'[{s}]' for s in spans] + [_frame_name(frame) for frame in stack])
+        counts[key] = counts.get(key, 0) + 1
+    return ''.join(f'{key} {count}\n' for key, count in sorted(counts.items()))
+
+
+def speedscope(profile):
+    frames, index = [], {}
+
+    def frame_id(key, name, filename=None, line=None):
+        if key not in index:
+            index[key] = len(frames)
+            frames.append({'name': name, 'file': filename, 'line': line} if filename else {'name': name})
+        return index[key]
+
+    samples, weights = [], []
+    previous = 0.0
+    for at, spans, stack in profile.samples:
+        ids = [frame_id(('span', s), f'[{s}]') for s in spans]
+        ids += [frame_id(frame, frame[0], frame[1], frame[2]) for frame in stack]
+        samples.append(ids)
+        weights.append(round(at - previous, 3))
+        previous = at
+    # The evented profile is the request thread's span timeline; spans on
+    # pool threads overlap it and only show up in the samples
+    events = [{'type': kind, 'frame': frame_id(('span', name), f'[{name}]'), 'at': round(at, 3)}
+              for kind, name, at, thread in profile.events if thread == profile.owner]
+    end = round(profile.finished, 3)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': profile.name,
+        'exporter': 'ficore profiler',
+        'shared': {'frames': frames},
+        'profiles': [
+            {'type': 'sampled', 'name': f'{profile.name} (samples)', 'unit': 'milliseconds', 'startValue': 0, 'endValue': end, 'samples': samples, 'weights': weights},
+            {'type': 'evented', 'name': f'{profile.name} (spans)', 'unit': 'milliseconds', 'startValue': 0, 'endValue': end, 'events': events},
+        ]
+    }
+
+
+def filename_for(profile, output_format):
+    slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', profile.name)[:60]
+    stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{uuid.uuid4().hex[:6]}"
+    return f'{stem}.collapsed.txt' if output_format == 'collapsed' else f'{stem}.speedscope.json'
+
+
+def write(profile, directory, output_format, keep, filename=None):
+    os.makedirs(directory, exist_ok=True)
+    filename = filename or filename_for(profile, output_format)
+    body = collapsed(profile) if output_format == 'collapsed' else json.dumps(speedscope(profile))
+    with open(os.path.join(directory, filename), 'w') as f:
+        f.write(body)
+    # Bounded retention: oldest profiles go first
+    names = sorted((n for n in os.listdir(directory) if n.endswith(('.speedscope.json', '.collapsed.txt'))),
+                   key=lambda n: os.path.getmtime(os.path.join(directory, n)))
+    for old in names[:max(0, len(names) - keep)]:
+        with contextlib.suppress(OSError):
+            os.remove(os.path.join(directory, old))
+    return filename
+
+
+def _write_forever():
+    while True:
+        logger, *job = _writes.get()
+        try:
+            write(*job)
+        except Exception:
+            logger.exception('Could not write profile %s', job[-1])
+        finally:
+            _writes.task_done()
+
+
+def _ensure_writer():
+    global _writer
+    with _lock:
+        if _writer is None or not _writer.is_alive() or _writer.pid != os.getpid():
+            _writer = threading.Thread(target=_write_forever, name='profiler-writer', daemon=True)
+            _writer.pid = os.getpid()
+            _writer.start()
+
+
+def submit(profile, directory, output_format, keep, logger):
+    # Queues the profile for the writer thread; returns its file name, or
+    # None when the queue is full and the profile is dropped
+    filename = filename_for(profile, output_format)
+    _ensure_writer()
+    try:
+        _writes.put_nowait((logger, profile, directory, output_format, keep, filename))
+    except queue.Full:
+        logger.warning('Dropped profile %s: the profile writer is behind', filename)
+        return None
+    return filename
+
+
+def flush():
+    # Blocks until every queued profile is on disk
+    _writes.join()
+
+
+def _wanted(config):
+    token = config['PROFILE_TOKEN']
+    supplied = request.headers.get(HEADER)
+    if token and supplied and hmac.compare_digest(supplied, token):
+        return True
+    return config['PROFILE_SAMPLE_RATE'] > 0 and random.random() < config['PROFILE_SAMPLE_RATE']
+
+
+def init_app(app):
+    app.config.setdefault('PROFILE_TOKEN', os.environ.get('PROFILE_TOKEN', ''))
+    app.config.setdefault('PROFILE_SAMPLE_RATE', float(os.environ.get('PROFILE_SAMPLE_RATE', '0')))
+    app.config.setdefault('PROFILE_INTERVAL_MS', 5)
+    app.config.setdefault('PROFILE_DIR', os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'ficore_profiles')))
+    app.config.setdefault('PROFILE_FORMAT', 'speedscope')
+    app.config.setdefault('PROFILE_KEEP', 50)
+    if app.config['PROFILE_FORMAT'] not in FORMATS:
+        raise ValueError(f"PROFILE_FORMAT must be one of {', '.join(FORMATS)}")
+
+    @app.before_request
+    def start_profile():
+        if _wanted(app.config):
+            g._profile = start(f'{request.method} {request.path}', app.config['PROFILE_INTERVAL_MS'] / 1000)
+
+    @app.after_request
+    def finish_profile(response):
+        started = g.pop('_profile', None)
+        if started:
+            started[0].close_open_spans()
+            profile = stop(*started)
+            filename = submit(profile, app.config['PROFILE_DIR'], app.config['PROFILE_FORMAT'], app.config['PROFILE_KEEP'], app.logger)
+            if filename:
+                response.headers['X-Profile-Id'] = filename
+        return response
+
+    @app.teardown_request
+    def abandon_profile(exc):
+        # Requests that raised never reach after_request
+        started = g.pop('_profile', None)
+        if started:
+            started[0].close_open_spans()
+            stop(*started)
+
+    def render_started(sender, template, context, **extra):
+        profile = _active.get()
+        if profile is not None:
+            profile.open_span(f'render {template.name}')
+
+    def render_finished(sender, template, context, **extra):
+        profile = _active.get()
+        if profile is not None:
+            profile.close_span(f'render {template.name}')
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
@@ -0,0 +1,124 @@
+from datetime import date, datetime, timedelta
+
+from columnar import NO_DATE, get_columns
+from finance import calculate_recommended_fund
+from recurrence import user_bills
+from shared_cache import cache, get_data_version
+from sheets import SHEET_NAMES, get_sheet_records
+
+# Multi-month cash-flow projection. Income and planned spending come from the
+# user's latest Budget row; a category the user actually tracks in the
+# expense tracker is projected from its trailing monthly average instead, and
+# pending bills (recurring occurrences included) land in the month they fall
+# due. Month vectors are built with NumPy and the result is cached per user
+# data version, so it is recomputed only after one of the inputs changes.
+
+SOURCE_SHEETS = ('budget', 'expense_tracker', 'bill_planner', 'bill_recurrence', 'emergency_fund')
+MIN_MONTHS, MAX_MONTHS = 1, 24
+HISTORY_MONTHS = 6
+
+# Expense tracker categories feeding each Budget line
+BUDGET_LINES = {
+    'housing': ('Housing Expenses', ('Housing',)),
+    'food': ('Food Expenses', ('Food and Groceries',)),
+    'transport': ('Transport Expenses', ('Transport',)),
+    'other': ('Other Expenses', ('Utilities', 'Entertainment', 'Other')),
+}
+
+
+def _month_index(day, start):
+    return (day.year - start.year) * 12 + day.month - start.month
+
+
+def _month_label(start, offset):
+    year, month = divmod(start.month - 1 + offset, 12)
+    return f'{start.year + year:04d}-{month + 1:02d}'
+
+
+def _latest(sheet_key, email):
+    rows = [r for r in get_sheet_records(sheet_key) if r['Email'] == email]
+    return max(rows, key=lambda r: r['Timestamp']) if rows else None
+
+
+def _float(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def monthly_spend(email, today):
+    # Trailing average per budget line over the last complete months with
+    # tracked expenses; lines without history are left out.
+    totals, first_month = {}, None
+    columns = get_columns('expense_tracker')
+    dates, amounts = columns.columns['Date'], columns.columns['Amount']
+    for row in columns.rows_for(email):
+        offset = _month_index(date.fromordinal(dates[row]), today) if dates[row] != NO_DATE else 0
+        if not -HISTORY_MONTHS <= offset < 0:
+            continue
+        category = columns.label('Category', row)
+        for line, (_, categories) in BUDGET_LINES.items():
+            if category in categories:
+                totals[line] = totals.get(line, 0.0) + amounts[row]
+        first_month = offset if first_month is None else min(first_month, offset)
+    months = -first_month if first_month is not None else 1
+    return {line: total / months for line, total in totals.items()}
+
+
+def project(email, months=12, starting_balance=0.0, income_growth=0.0, expense_growth=0.0, today=None):
+    import numpy as np
+    today = today or date.today()
+    budget = _latest('budget', email)
+    income = _float(budget['Monthly Income']) if budget else 0.0
+    actual = monthly_spend(email, today)
+    lines = {line: actual.get(line, _float(budget[column]) if budget else 0.0) for line, (column, _) in BUDGET_LINES.items()}
+
+    offsets = np.arange(months)
+    income_path = income * (1 + income_growth) ** offsets
+    expense_paths = {line: amount * (1 + expense_growth) ** offsets for line, amount in lines.items()}
+    bills = np.zeros(months)
+    horizon_end = date(today.year + (today.month + months - 1) // 12, (today.month + months - 1) % 12 + 1, 1) - timedelta(days=1)
+    for row in user_bills(email, end=horizon_end, today=today):
+        due = _parse_date(row['Due Date']) if row['Status'] == 'Pending' else None
+        if due is not None and _month_index(due, today) < months:
+            # Overdue bills are due now
+            bills[max(0, _month_index(due, today))] += _float(row['Amount'])
+    savings = income_path - sum(expense_paths.values()) - bills
+    balance = starting_balance + np.cumsum(savings)
+
+    fund = _latest('emergency_fund', email)
+    target = _float(fund['Recommended Fund']) if fund else calculate_recommended_fund(sum(lines.values()))
+    attained = np.flatnonzero(balance >= target) if target > 0 else np.array([], dtype=int)
+    return {
+        'months': [_month_label(today, offset) for offset in range(months)],
+        'income': np.round(income_path, 2).tolist(),
+        'expenses': {line: np.round(path, 2).tolist() for line, path in expense_paths.items()},
+        'expense_sources': {line: 'expense_tracker' if line in actual else 'budget' for line in lines},
+        'bills': np.round(bills, 2).tolist(),
+        'savings': np.round(savings, 2).tolist(),
+        'balance': np.round(balance, 2).tolist(),
+        'emergency_fund': {
+            'target': round(target, 2),
+            'progress': np.round(np.clip(balance / target, 0, 1), 4).tolist() if target > 0 else [1.0] * months,
+            'attained_month': _month_label(today, int(attained[0])) if attained.size else None
+        }
+    }
+
+
+def cached_projection(email, months=12, starting_balance=0.0, income_growth=0.0, expense_growth=0.0):
+    today = date.today()
+    versions = ':'.join(str(get_data_version(SHEET_NAMES[key], email)) for key in SOURCE_SHEETS)
+    key = f'projection:{email}:{versions}:{today.isoformat()}:{months}:{starting_balance}:{income_growth}:{expense_growth}'
+    result = cache.get(key)
+    if result is None:
+        result = project(email, months, starting_balance, income_growth, expense_growth, today)
+        cache.set(key, result)
+    return result
@@ -0,0 +1,106 @@
+import calendar
+from datetime import date, datetime, timedelta
+
+from sheets import get_sheet_records
+
+# Recurring bills. A rule is stored once in the BillRecurrence sheet and its
+# occurrences are generated lazily over whichever date window is asked for.
+# Only paying an occurrence writes a BillPlanner row, with the ID
+# "<rule id>@<due date>", so the sheet grows with payments, not the calendar.
+
+FREQUENCIES = ('None', 'Weekly', 'Monthly', 'Custom')
+LOOKBACK_DAYS = 60
+HORIZON_DAYS = 90
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _interval(rule):
+    try:
+        return max(1, int(rule.get('Interval') or 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+def _nth(first, frequency, interval, n):
+    if frequency == 'Monthly':
+        year, month = divmod(first.month - 1 + n * interval, 12)
+        year += first.year
+        return date(year, month + 1, min(first.day, calendar.monthrange(year, month + 1)[1]))
+    step = 7 * interval if frequency == 'Weekly' else interval
+    return first + timedelta(days=n * step)
+
+
+def occurrences(rule, start, end):
+    # Due dates of a rule within [start, end], skipping straight to the window.
+    first = _parse_date(rule.get('Start Date'))
+    frequency = rule.get('Frequency')
+    if first is None or frequency not in FREQUENCIES[1:]:
+        return
+    last = min(end, _parse_date(rule.get('End Date')) or end)
+    interval = _interval(rule)
+    if frequency == 'Monthly':
+        n = max(0, ((start.year - first.year) * 12 + start.month - first.month) // interval - 1)
+    else:
+        n = max(0, (start - first).days // (7 * interval if frequency == 'Weekly' else interval))
+    while True:
+        due = _nth(first, frequency, interval, n)
+        if due > last:
+            return
+        if due >= start:
+            yield due
+        n += 1
+
+
+def occurrence_id(rule_id, due):
+    return f'{rule_id}@{due.isoformat()}'
+
+
+def find_occurrence(email, occurrence):
+    # The generated bill for "<rule id>@<due date>", if the user's rule has one then
+    rule_id, _, due = occurrence.partition('@')
+    due = _parse_date(due)
+    rule = next((r for r in get_sheet_records('bill_recurrence') if r['ID'] == rule_id and r['User Email'] == email), None)
+    if rule is None or due is None or due not in occurrences(rule, due, due):
+        return None
+    return _bill(rule, due)
+
+
+def _bill(rule, due):
+    return {
+        'ID': occurrence_id(rule['ID'], due),
+        'User Email': rule['User Email'],
+        'Bill Name': rule['Bill Name'],
+        'Amount': rule['Amount'],
+        'Due Date': due.isoformat(),
+        'Status': 'Pending',
+        'Timestamp': rule['Timestamp']
+    }
+
+
+def rule_bills(rule, today=None):
+    # A rule's generated occurrences in the default window
+    today = today or date.today()
+    return [_bill(rule, due) for due in occurrences(rule, today - timedelta(days=LOOKBACK_DAYS), today + timedelta(days=HORIZON_DAYS))]
+
+
+def user_bills(email, start=None, end=None, today=None):
+    # One-off bills plus recurring occurrences in the window; an occurrence
+    # already paid is represented by its materialized row.
+    today = today or date.today()
+    start = start or today - timedelta(days=LOOKBACK_DAYS)
+    end = end or today + timedelta(days=HORIZON_DAYS)
+    bills = [r for r in get_sheet_records('bill_planner') if r['User Email'] == email]
+    materialized = {r['ID'] for r in bills}
+    for rule in get_sheet_records('bill_recurrence'):
+        if rule['User Email'] != email:
+            continue
+        for due in occurrences(rule, start, end):
+            if occurrence_id(rule['ID'], due) not in materialized:
+                bills.append(_bill(rule, due))
+    return bills
@@ -0,0 +1,102 @@
+import hashlib
+from collections import namedtuple
+
+import click
+
+from shared_cache import cache
+
+# Header migrations for the Sheets tables. When a sheet's header row differs
+# from PREDETERMINED_HEADERS the existing rows are remapped to the new column
+# order (renames follow SHEET_COLUMN_RENAMES) and written back in one range
+# update instead of clearing the sheet. Columns that would be dropped with
+# their data need an explicit opt-in. Once a sheet matches, the header
+# fingerprint is recorded so later calls skip the header read entirely.
+
+Migration = namedtuple('Migration', 'sources added renamed dropped')
+
+
+class SchemaMigrationError(Exception):
+    pass
+
+
+def schema_version(headers):
+    return hashlib.sha1('\x1f'.join(headers).encode('utf-8')).hexdigest()[:12]
+
+
+def plan(existing, headers, renames=None):
+    # For each target column, the index of the existing column feeding it
+    renames = renames or {}
+    positions, renamed = {}, []
+    for index, name in enumerate(existing):
+        target = renames.get(name, name)
+        if target and target not in positions:
+            positions[target] = index
+            if target != name:
+                renamed.append((name, target))
+    sources = [positions.get(name) for name in headers]
+    used = set(sources)
+    added = [name for name, source in zip(headers, sources) if source is None]
+    dropped = [name for index, name in enumerate(existing) if name and index not in used]
+    return Migration(sources, added, renamed, dropped)
+
+
+def migrate(worksheet, existing, headers, renames=None, allow_destructive=False):
+    while existing and not existing[-1]:
+        existing = existing[:-1]
+    migration = plan(existing, headers, renames)
+    if migration.dropped and not allow_destructive:
+        raise SchemaMigrationError(
+            f"Migrating {worksheet.title} would drop the columns {', '.join(migration.dropped)}; "
+            'run `flask migrate-sheets --allow-destructive` to apply it')
+    if worksheet.col_count < len(headers):
+        worksheet.add_cols(len(headers) - worksheet.col_count)
+    if existing == headers[:len(existing)]:
+        # Columns added at the end: only the header row changes
+        worksheet.update(values=[headers], range_name='A1')
+        return migration
+    rows = worksheet.get_all_values(value_render_option='UNFORMATTED_VALUE')[1:]
+    # Blank out columns beyond the new width in the same write
+    padding = [''] * max(0, len(existing) - len(headers))
+    values = [headers + padding]
+    for row in rows:
+        values.append([row[source] if source is not None and source < len(row) else '' for source in migration.sources] + padding)
+    worksheet.update(values=values, range_name='A1')
+    return migration
+
+
+_verified = {}
+
+
+def _key(sheet_name):
+    return f'schema:{sheet_name}'
+
+
+def is_current(sheet_name, headers):
+    version = schema_version(headers)
+    if _verified.get(sheet_name) == version:
+        return True
+    if cache.get(_key(sheet_name)) == version:
+        _verified[sheet_name] = version
+        return True
+    return False
+
+
+def mark_current(sheet_name, headers):
+    _verified[sheet_name] = schema_version(headers)
+    cache.set(_key(sheet_name), _verified[sheet_name], timeout=0)
+
+
+def forget(sheet_name):
+    _verified.pop(sheet_name, None)
+    cache.delete(_key(sheet_name))
+
+
+def init_app(app):
+    @app.cli.command('migrate-sheets')
+    @click.option('--allow-destructive', is_flag=True, help='Apply migrations that drop columns with data.')
+    def migrate_sheets_command(allow_destructive):
+        from sheets import PREDETERMINED_HEADERS, ensure_sheet_and_headers
+        for sheet_name, headers in PREDETERMINED_HEADERS.items():
+            forget(sheet_name)
+            ensure_sheet_and_headers(sheet_name, headers, allow_destructive=allow_destructive)
+            print(f'{sheet_name}: schema {schema_version(headers)}')
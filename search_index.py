@@ -0,0 +1,184 @@
+import bisect
+import re
+from datetime import date
+
+from columnar import get_columns
+import recurrence
+from shared_cache import LeaseTimeout, cache, clear_stale, get_data_version, is_stale, lease, mark_stale
+
+# Per-user full-text search over expense descriptions and bill names. Each
+# user has an inverted index per kind (token -> row IDs) with a sorted
+# vocabulary, so a query term matches every token it prefixes with two
+# bisects, and the rows themselves for the category, status, amount and date
+# filters. Bills are indexed as the planner lists them: one-off bills and
+# every recurring occurrence in the planner's window, each with its own due
+# date and status, so a rule matches by name through its occurrences. Like
+# the spending cube, an index is cached with the data versions (and, for
+# bills, the day) it reflects; writes patch it in place and any other change
+# makes the next search rebuild it from the cached sheet records.
+
+KINDS = {
+    'expenses': {'sheets': ('ExpenseTracker',), 'text': 'Description', 'date': 'Date'},
+    'bills': {'sheets': ('BillPlanner', 'BillRecurrence'), 'text': 'Bill Name', 'date': 'Due Date'},
+}
+# Query-string parameters understood by parse_filters()
+FILTERS = ('q', 'category', 'status', 'min_amount', 'max_amount', 'start', 'end')
+TOKEN = re.compile(r'\w+')
+
+
+def tokens(text):
+    return {token.casefold() for token in TOKEN.findall(str(text or ''))}
+
+
+def _amount(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class SearchIndex:
+    def __init__(self, text_field, date_field, version=None):
+        self.text_field = text_field
+        self.date_field = date_field
+        self.rows = {}
+        self.postings = {}
+        self.vocabulary = []
+        self.version = version
+
+    def add(self, row):
+        self.remove(row['ID'])
+        self.rows[row['ID']] = row
+        for token in tokens(row[self.text_field]):
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = set()
+                bisect.insort(self.vocabulary, token)
+            ids.add(row['ID'])
+
+    def remove(self, row_id):
+        row = self.rows.pop(row_id, None)
+        if row is None:
+            return
+        for token in tokens(row[self.text_field]):
+            ids = self.postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(row_id)
+            if not ids:
+                del self.postings[token]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+
+    def _prefixed(self, prefix):
+        low = bisect.bisect_left(self.vocabulary, prefix)
+        high = bisect.bisect_left(self.vocabulary, prefix + '\U0010ffff', low)
+        matched = set()
+        for token in self.vocabulary[low:high]:
+            matched |= self.postings[token]
+        return matched
+
+    def search(self, query='', category=None, status=None, min_amount=None, max_amount=None, start=None, end=None, limit=None):
+        # Every query term must prefix some token of the row; newest first
+        candidates = None
+        for term in sorted(tokens(query), key=len, reverse=True):
+            matched = self._prefixed(term)
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return []
+        rows = self.rows.values() if candidates is None else [self.rows[row_id] for row_id in candidates]
+        low = start.isoformat() if start else None
+        high = end.isoformat() if end else None
+        found = []
+        for row in rows:
+            if category and row.get('Category') != category:
+                continue
+            if status and row.get('Status') != status:
+                continue
+            amount = _amount(row['Amount'])
+            if (min_amount is not None and amount < min_amount) or (max_amount is not None and amount > max_amount):
+                continue
+            day = str(row[self.date_field] or '')
+            if (low and day < low) or (high and day > high):
+                continue
+            found.append(row)
+        found.sort(key=lambda row: (str(row[self.date_field] or ''), row['ID']), reverse=True)
+        return found if limit is None else found[:limit]
+
+
+def _user_rows(kind, email):
+    if kind == 'expenses':
+        columns = get_columns('expense_tracker')
+        return [columns.row(row) for row in columns.rows_for(email)]
+    return recurrence.user_bills(email)
+
+
+def build(kind, email):
+    spec = KINDS[kind]
+    index = SearchIndex(spec['text'], spec['date'], current_version(kind, email))
+    for row in _user_rows(kind, email):
+        index.add(row)
+    return index
+
+
+def _key(kind, email):
+    return f'search:{kind}:{email}'
+
+
+def current_version(kind, email):
+    versions = tuple(get_data_version(sheet_name, email) for sheet_name in KINDS[kind]['sheets'])
+    # The occurrences listed move with the planner's window
+    return versions + (date.today().isoformat(),) if kind == 'bills' else versions
+
+
+def get_index(kind, email):
+    version = current_version(kind, email)
+    index = cache.get(_key(kind, email))
+    if index is None or index.version != version or is_stale(_key(kind, email)):
+        clear_stale(_key(kind, email))
+        index = build(kind, email)
+        cache.set(_key(kind, email), index)
+    return index
+
+
+def apply_change(kind, email, since, added=()):
+    # Patch the cached index for the rows one request wrote. `since` is the
+    # user's version read before the writes; an index that does not reflect
+    # it missed another change and is dropped instead.
+    try:
+        with lease(_key(kind, email)):
+            index = cache.get(_key(kind, email))
+            if index is None:
+                return
+            if index.version != since or is_stale(_key(kind, email)):
+                cache.delete(_key(kind, email))
+                return
+            for row in added:
+                # Re-adding an ID replaces the row it had
+                index.add(dict(row))
+            index.version = current_version(kind, email)
+            cache.set(_key(kind, email), index)
+    except LeaseTimeout:
+        mark_stale(_key(kind, email))
+
+
+def parse_filters(params):
+    # Query-string filters shared by the pages and the API; raises ValueError
+    # with a message fit to show the user
+    filters = {'query': (params.get('q') or '').strip()}
+    for name in ('category', 'status'):
+        filters[name] = params.get(name) or None
+    for name in ('min_amount', 'max_amount'):
+        try:
+            filters[name] = float(params[name]) if params.get(name) not in (None, '') else None
+        except (TypeError, ValueError):
+            raise ValueError(f'{name} must be a number')
+    for name in ('start', 'end'):
+        try:
+            filters[name] = date.fromisoformat(params[name]) if params.get(name) else None
+        except (TypeError, ValueError):
+            raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+    return filters
+
+
+def search(kind, email, filters, limit=None):
+    return get_index(kind, email).search(limit=limit, **filters)
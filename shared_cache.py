@@ -0,0 +1,266 @@
+import contextlib
+import math
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+
+from flask_caching import Cache
+from flask_caching.backends.base import BaseCache
+
+# Cache tier shared by every gunicorn worker on a host. The default backend is
+# a SQLite file in WAL mode; setting CACHE_TYPE=RedisCache (plus
+# CACHE_REDIS_URL) moves it to any Redis-protocol server instead. Writes go
+# through append_row()/update_row(), which publish an invalidation for the
+# sheet and the user so no worker keeps serving data another one replaced.
+cache = Cache()
+
+# Under the app's instance folder by default. Values are pickles, so the file
+# is created readable and writable by its owner only.
+SQLITE_FILENAME = 'cache.sqlite3'
+ALL_USERS = '*'
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, path, default_timeout=300, threshold=5000, **kwargs):
+        super().__init__(default_timeout=default_timeout, **kwargs)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), mode=0o700, exist_ok=True)
+        # SQLite gives its -wal and -shm files the database file's mode
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        self.threshold = threshold
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)')
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(path=config['CACHE_SQLITE_PATH'], threshold=config['CACHE_THRESHOLD'])
+        return cls(*args, **kwargs)
+
+    def _connection(self):
+        # One connection per thread and per process; forked workers must not
+        # reuse the master's handle.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _expires(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout > 0 else 0
+
+    def _prune(self, conn):
+        self._writes += 1
+        if self._writes % 100 == 0:
+            conn.execute('DELETE FROM cache WHERE expires != 0 AND expires <= ?', (time.time(),))
+            # Entries stored without a timeout (data versions, markers) are
+            # never evicted to make room
+            conn.execute('DELETE FROM cache WHERE key IN (SELECT key FROM cache WHERE expires != 0 ORDER BY expires LIMIT max((SELECT count(*) FROM cache) - ?, 0))', (self.threshold,))
+
+    def get(self, key):
+        row = self._connection().execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] and row[1] <= time.time()):
+            return None
+        return pickle.loads(row[0])
+
+    def set(self, key, value, timeout=None):
+        conn = self._connection()
+        conn.execute('INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)', (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires(timeout)))
+        self._prune(conn)
+        return True
+
+    def add(self, key, value, timeout=None):
+        conn = self._connection()
+        cursor = conn.execute(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache.expires != 0 AND cache.expires <= ?',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires(timeout), time.time()))
+        return cursor.rowcount > 0
+
+    def delete(self, key):
+        return self._connection().execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount > 0
+
+    def delete_if(self, key, value):
+        # Compare-and-delete in one statement
+        return self._connection().execute('DELETE FROM cache WHERE key = ? AND value = ?', (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))).rowcount > 0
+
+    def has(self, key):
+        return self.get(key) is not None
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+        return True
+
+    def inc(self, key, delta=1):
+        # Atomic across processes: the read and the write share one
+        # transaction. Like Redis INCRBY, a live entry keeps its expiry.
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+            live = row is not None and not (row[1] and row[1] <= time.time())
+            value = (pickle.loads(row[0]) if live else 0) + delta
+            expires = row[1] if live else self._expires(None)
+            conn.execute('INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)', (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return value
+
+
+def init_app(app):
+    app.config.setdefault('CACHE_TYPE', os.environ.get('CACHE_TYPE', 'shared_cache.SQLiteCache'))
+    app.config.setdefault('CACHE_SQLITE_PATH', os.environ.get('CACHE_SQLITE_PATH', os.path.join(app.instance_path, SQLITE_FILENAME)))
+    app.config.setdefault('CACHE_REDIS_URL', os.environ.get('CACHE_REDIS_URL'))
+    app.config.setdefault('CACHE_DEFAULT_TIMEOUT', 3600)
+    cache.init_app(app)
+
+
+class LeaseTimeout(Exception):
+    pass
+
+
+@contextlib.contextmanager
+def lease(key, timeout=5):
+    # Short exclusive lease for read-modify-write of a shared entry; a
+    # crashed holder's lease simply expires. Raises LeaseTimeout instead of
+    # running the body unleased, and only ever releases the caller's own
+    # lease: one that outlived its timeout may belong to someone else now.
+    lock = f'{key}:lease'
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + timeout
+    while not cache.add(lock, token, timeout=max(1, math.ceil(timeout))):
+        if time.monotonic() >= deadline:
+            raise LeaseTimeout(key)
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        _release(lock, token)
+
+
+def _release(lock, token):
+    delete_if = getattr(cache.cache, 'delete_if', None)
+    if delete_if is not None:
+        delete_if(lock, token)
+    elif cache.get(lock) == token:
+        cache.delete(lock)
+
+
+# A write that timed out on the lease of a derived entry marks it stale
+# instead of patching it; the next read rebuilds it from the sheets
+def mark_stale(key):
+    cache.set(f'{key}:stale', 1, timeout=0)
+
+
+def is_stale(key):
+    return cache.get(f'{key}:stale') is not None
+
+
+def clear_stale(key):
+    cache.delete(f'{key}:stale')
+
+
+# Data versions, in microseconds since the epoch. A bump moves the version to
+# at least the start of the next whole second, so it only ever grows and
+# doubles as a second-granular Last-Modified time. Bumps use the backend's
+# atomic inc() so concurrent writers never share a version. Versions are
+# stored without a timeout, and a high-water mark of every version handed out
+# lets a lost entry be reseeded above anything a client could have seen, even
+# when bursts of bumps ran it ahead of the clock. Each process also remembers
+# the highest version it saw, for when the whole cache is lost.
+HIGH_WATER_KEY = 'data_version:high'
+_seen = {'high': 0}
+
+
+def _version_key(sheet_name, email):
+    return f'data_version:{sheet_name}:{email}'
+
+
+def _now_us():
+    return time.time_ns() // 1000
+
+
+def _next_second(version):
+    return version - version % 1_000_000 + 1_000_000
+
+
+def _raise_high_water(version):
+    # Increments are atomic and the mark only grows, so adding the gap seen
+    # here never leaves it below `version`, however calls interleave
+    seen = cache.get(HIGH_WATER_KEY)
+    if seen is None:
+        cache.add(HIGH_WATER_KEY, 0, timeout=0)
+        seen = cache.get(HIGH_WATER_KEY) or 0
+    if version > seen:
+        cache.cache.inc(HIGH_WATER_KEY, version - seen)
+
+
+def get_data_version(sheet_name, email):
+    version = cache.get(_version_key(sheet_name, email))
+    if version is None:
+        seed = max(_now_us(), _next_second(max(cache.get(HIGH_WATER_KEY) or 0, _seen['high'])))
+        cache.add(_version_key(sheet_name, email), seed, timeout=0)
+        version = cache.get(_version_key(sheet_name, email)) or seed
+        _raise_high_water(version)
+    _seen['high'] = max(_seen['high'], version)
+    return version
+
+
+def bump_data_version(sheet_name, email):
+    current = get_data_version(sheet_name, email)
+    delta = max(_next_second(current), _now_us()) - current
+    version = cache.cache.inc(_version_key(sheet_name, email), delta)
+    _raise_high_water(version)
+    _seen['high'] = max(_seen['high'], version)
+    return version
+
+
+def publish_invalidation(sheet_name, email=None):
+    bump_data_version(sheet_name, ALL_USERS)
+    if email is not None:
+        bump_data_version(sheet_name, email)
+
+
+# Read-through record cache. Entries are keyed by the sheet's version, so an
+# invalidation published by any worker makes every worker miss; a small
+# per-process map avoids unpickling the same generation on every hit.
+_local_generations = {}
+
+
+def cached_generation(kind, sheet_name, loader):
+    generation = get_data_version(sheet_name, ALL_USERS)
+    local = _local_generations.get((kind, sheet_name))
+    if local is None or local[0] != generation:
+        key = f'{kind}:{sheet_name}:{generation}'
+        value = cache.get(key)
+        if value is None:
+            value = loader()
+            cache.set(key, value)
+        local = _local_generations[(kind, sheet_name)] = (generation, value)
+    return local[1]
+
+
+def cached_records(sheet_name, loader):
+    return [dict(record) for record in cached_generation('records', sheet_name, loader)]
+
+
+def append_row(worksheet, row, email=None):
+    result = worksheet.append_row(row)
+    publish_invalidation(worksheet.title, email)
+    return result
+
+
+def update_row(worksheet, range_name, values, email=None):
+    result = worksheet.update(range_name, values)
+    publish_invalidation(worksheet.title, email)
+    return result
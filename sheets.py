@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import profiler
+import schema_migration
+import shared_cache
+from shared_cache import cached_records
+
+# Google Sheets storage. gspread and oauth2client are imported lazily inside
+# the helpers so workers boot without loading the Sheets stack.
+SCOPES = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+SPREADSHEET_ID = 'your-spreadsheet-id'
+CREDENTIALS_FILE = 'credentials.json'
+SHEET_NAMES = {
+    'submissions': 'Submissions',
+    'net_worth': 'NetWorth',
+    'emergency_fund': 'EmergencyFund',
+    'quiz': 'Quiz',
+    'budget': 'Budget',
+    'expense_tracker': 'ExpenseTracker',
+    'bill_planner': 'BillPlanner',
+    'bill_recurrence': 'BillRecurrence',
+    'score_results': 'FicoreAIResults'
+}
+PREDETERMINED_HEADERS = {
+    'Submissions': ['ID', 'First Name', 'Last Name', 'Email', 'Phone Number', 'Language', 'Business Name', 'User Type', 'Income/Revenue', 'Expenses/Costs', 'Debt/Loan', 'Debt Interest Rate', 'Timestamp'],
+    'NetWorth': ['ID', 'First Name', 'Email', 'Language', 'Assets', 'Liabilities', 'Net Worth', 'Timestamp'],
+    'EmergencyFund': ['ID', 'First Name', 'Email', 'Language', 'Monthly Expenses', 'Recommended Fund', 'Timestamp'],
+    'Quiz': ['ID', 'First Name', 'Email', 'Language', 'Q1', 'Q2', 'Q3', 'Q4', 'Q5', 'Score', 'Personality Type', 'Timestamp'],
+    'Budget': ['ID', 'First Name', 'Email', 'Language', 'Monthly Income', 'Housing Expenses', 'Food Expenses', 'Transport Expenses', 'Other Expenses', 'Savings', 'Timestamp'],
+    'ExpenseTracker': ['ID', 'User Email', 'Amount', 'Category', 'Date', 'Description', 'Timestamp'],
+    'BillPlanner': ['ID', 'User Email', 'Bill Name', 'Amount', 'Due Date', 'Status', 'Timestamp'],
+    'BillRecurrence': ['ID', 'User Email', 'Bill Name', 'Amount', 'Start Date', 'Frequency', 'Interval', 'End Date', 'Timestamp'],
+    'FicoreAIResults': ['Email', 'FicoreAIScore', 'FicoreAIRank']
+}
+# Renamed columns, per sheet, as {'Old Header': 'New Header'}; migrations carry
+# the data over instead of treating it as a dropped plus an added column
+SHEET_COLUMN_RENAMES = {}
+# Header migrations that would drop columns with data need this opt-in
+SHEETS_ALLOW_DESTRUCTIVE_MIGRATION = os.environ.get('SHEETS_ALLOW_DESTRUCTIVE_MIGRATION') == '1'
+# One migration per sheet at a time, across workers; it rewrites every row
+MIGRATION_LEASE_TIMEOUT = 120
+
+# Outbound limits, per worker process
+SHEETS_REQUESTS_PER_MINUTE = int(os.environ.get('SHEETS_REQUESTS_PER_MINUTE', '300'))
+SHEETS_MAX_CONCURRENCY = int(os.environ.get('SHEETS_MAX_CONCURRENCY', '10'))
+SHEETS_LIMIT_TIMEOUT = float(os.environ.get('SHEETS_LIMIT_TIMEOUT', '10'))
+SHEETS_POOL_SIZE = int(os.environ.get('SHEETS_POOL_SIZE', '10'))
+# Base URL of a Sheets API stand-in (see sheets_emulator.py); requests go
+# there unauthenticated instead of to Google
+SHEETS_API_URL = os.environ.get('SHEETS_API_URL', '').rstrip('/')
+GOOGLE_SHEETS_URL = 'https://sheets.googleapis.com'
+
+class SheetsRateLimitExceeded(Exception):
+    pass
+
+class RateLimiter:
+    # Token bucket on the request rate plus a cap on in-flight requests. Every
+    # outbound Sheets call, from the sync and the async path, passes through it.
+    def __init__(self, requests_per_minute, max_concurrency, burst=None):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst or max(1, requests_per_minute // 6))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _take_token(self, deadline):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > deadline:
+                raise SheetsRateLimitExceeded('Sheets request rate limit reached')
+            time.sleep(wait)
+
+    @contextmanager
+    def limit(self, timeout=None):
+        deadline = time.monotonic() + (SHEETS_LIMIT_TIMEOUT if timeout is None else timeout)
+        self._take_token(deadline)
+        if not self.slots.acquire(timeout=max(0, deadline - time.monotonic())):
+            raise SheetsRateLimitExceeded('Too many concurrent Sheets requests')
+        try:
+            yield
+        finally:
+            self.slots.release()
+
+rate_limiter = RateLimiter(SHEETS_REQUESTS_PER_MINUTE, SHEETS_MAX_CONCURRENCY)
+
+_http_client_class = None
+
+def _rate_limited_http_client():
+    global _http_client_class
+    if _http_client_class is None:
+        from gspread.http_client import HTTPClient
+
+        class RateLimitedHTTPClient(HTTPClient):
+            def request(self, method, endpoint, *args, **kwargs):
+                if SHEETS_API_URL and endpoint.startswith(GOOGLE_SHEETS_URL):
+                    endpoint = SHEETS_API_URL + endpoint[len(GOOGLE_SHEETS_URL):]
+                with profiler.span(f'sheets {method.upper()}'), rate_limiter.limit():
+                    return super().request(method, endpoint, *args, **kwargs)
+
+        _http_client_class = RateLimitedHTTPClient
+    return _http_client_class
+
+# Authorized clients are kept per thread (and per process, so forked workers
+# never share the master's sockets). Each keeps its token and a keep-alive
+# connection pool instead of re-authorizing on every call.
+_clients = threading.local()
+
+def get_sheets_client():
+    client = getattr(_clients, 'client', None)
+    if client is None or _clients.pid != os.getpid():
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+        from requests.adapters import HTTPAdapter
+        if SHEETS_API_URL:
+            from google.auth.credentials import AnonymousCredentials
+            creds = AnonymousCredentials()
+        else:
+            creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_FILE, SCOPES)
+        client = gspread.authorize(creds, http_client=_rate_limited_http_client())
+        client.http_client.session.mount(SHEETS_API_URL or 'https://', HTTPAdapter(pool_maxsize=SHEETS_POOL_SIZE))
+        _clients.client, _clients.pid = client, os.getpid()
+    return client
+
+def ensure_sheet_and_headers(sheet_name, headers, allow_destructive=None):
+    import gspread
+    client = get_sheets_client()
+    spreadsheet = client.open_by_key(SPREADSHEET_ID)
+    try:
+        worksheet = spreadsheet.worksheet(sheet_name)
+    except gspread.exceptions.WorksheetNotFound:
+        try:
+            worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=len(headers))
+        except gspread.exceptions.APIError:
+            # Another worker created it first
+            worksheet = spreadsheet.worksheet(sheet_name)
+        worksheet.update(values=[headers], range_name='A1')
+    if not schema_migration.is_current(sheet_name, headers):
+        existing_headers = worksheet.row_values(1)
+        if existing_headers != headers:
+            if allow_destructive is None:
+                allow_destructive = SHEETS_ALLOW_DESTRUCTIVE_MIGRATION
+            with shared_cache.lease(f'migrate:{sheet_name}', timeout=MIGRATION_LEASE_TIMEOUT):
+                # Read the header again under the lease: another worker may
+                # have migrated the sheet since, and rewriting it from the old
+                # layout would scramble the columns
+                existing_headers = worksheet.row_values(1)
+                if existing_headers != headers:
+                    schema_migration.migrate(worksheet, existing_headers, headers, SHEET_COLUMN_RENAMES.get(sheet_name), allow_destructive)
+                    shared_cache.publish_invalidation(sheet_name)
+        schema_migration.mark_current(sheet_name, headers)
+    return worksheet
+
+def get_sheet_records(sheet_key):
+    # Served from the shared cache; only a miss opens the sheet.
+    sheet_name = SHEET_NAMES[sheet_key]
+    return cached_records(sheet_name, lambda: ensure_sheet_and_headers(sheet_name, PREDETERMINED_HEADERS[sheet_name]).get_all_records())
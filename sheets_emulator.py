@@ -0,0 +1,417 @@
+import argparse
+import collections
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Local stand-in for the part of the Sheets v4 API that gspread uses here:
+# spreadsheet metadata, batchUpdate (add/resize/delete sheets) and the
+# values get/update/append/clear/batchUpdate calls. It is meant for load
+# tests, so it can add latency drawn from a distribution, answer 429 like the
+# real per-minute quota and keep its data in a JSON file between runs. Point
+# the app at it with SHEETS_API_URL=http://127.0.0.1:8085.
+#
+#   python sheets_emulator.py --latency lognormal:80:0.6 --quota-per-minute 300 --data /tmp/sheets.json
+
+DEFAULT_ROWS, DEFAULT_COLS = 1000, 26
+CELL = re.compile(r'^([A-Z]*)(\d*)$')
+
+
+class ApiError(Exception):
+    def __init__(self, code, message, status):
+        super().__init__(message)
+        self.code, self.message, self.status = code, message, status
+
+
+def parse_latency(spec):
+    # "fixed:MS", "uniform:LOW_MS:HIGH_MS" or "lognormal:MEDIAN_MS:SIGMA"; returns seconds
+    kind, _, args = (spec or 'fixed:0').partition(':')
+    values = [float(v) for v in args.split(':') if v]
+    if kind == 'fixed':
+        return lambda: values[0] / 1000 if values else 0
+    if kind == 'uniform':
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == 'lognormal':
+        import math
+        return lambda: random.lognormvariate(math.log(values[0]), values[1]) / 1000
+    raise ValueError(f'Unknown latency distribution {spec!r}')
+
+
+def _column_number(letters):
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - 64
+    return number
+
+
+def _column_letters(number):
+    letters = ''
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def split_range(range_name):
+    # "'Sheet ''1'''!A1:B2" -> ("Sheet '1'", (row0, col0, row1, col1)); bounds
+    # are 0-based and inclusive, None where the range is open-ended
+    title, bang, cells = range_name.rpartition('!')
+    if not bang:
+        title, cells = range_name, ''
+    if len(title) > 1 and title[0] == title[-1] == "'":
+        title = title[1:-1].replace("''", "'")
+    if not cells:
+        return title, (0, 0, None, None)
+    start, _, end = cells.upper().partition(':')
+    bounds = []
+    for index, cell in enumerate((start, end or start)):
+        match = CELL.match(cell)
+        if not match:
+            raise ApiError(400, f'Unable to parse range: {range_name}', 'INVALID_ARGUMENT')
+        letters, digits = match.groups()
+        first = index == 0
+        bounds.append((int(digits) - 1 if digits else (0 if first else None),
+                       _column_number(letters) - 1 if letters else (0 if first else None)))
+    (row0, col0), (row1, col1) = bounds
+    return title, (row0, col0, row1, col1)
+
+
+def _trim(rows):
+    rows = [list(row) for row in rows]
+    for row in rows:
+        while row and row[-1] in ('', None):
+            row.pop()
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+def _user_entered(value):
+    if isinstance(value, str) and value and not value.startswith('='):
+        try:
+            number = float(value.replace(',', ''))
+            return int(number) if number.is_integer() and '.' not in value else number
+        except ValueError:
+            return value
+    return value
+
+
+def _formatted(value):
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return value if isinstance(value, str) else str(value)
+
+
+class SheetsEmulator:
+    def __init__(self, latency='fixed:0', quota_per_minute=0, error_rate=0.0, data_path=None):
+        self.latency = parse_latency(latency)
+        self.quota_per_minute = quota_per_minute
+        self.error_rate = error_rate
+        self.data_path = data_path
+        self.lock = threading.Lock()
+        self.recent = collections.deque()
+        self.stats = collections.Counter()
+        self.spreadsheets = {}
+        self.dirty = False
+        if data_path and os.path.exists(data_path):
+            with open(data_path) as f:
+                self.spreadsheets = json.load(f)
+
+    # Quota and latency
+    def admit(self):
+        time.sleep(self.latency())
+        with self.lock:
+            now = time.monotonic()
+            while self.recent and self.recent[0] <= now - 60:
+                self.recent.popleft()
+            over_quota = self.quota_per_minute and len(self.recent) >= self.quota_per_minute
+            if over_quota or (self.error_rate and random.random() < self.error_rate):
+                self.stats['throttled'] += 1
+                raise ApiError(429, "Quota exceeded for quota metric 'Read requests' and limit 'Read requests per minute per user'", 'RESOURCE_EXHAUSTED')
+            self.recent.append(now)
+            self.stats['requests'] += 1
+
+    # Storage
+    def _spreadsheet(self, spreadsheet_id):
+        spreadsheet = self.spreadsheets.get(spreadsheet_id)
+        if spreadsheet is None:
+            # Any key opens a spreadsheet, created empty on first use
+            spreadsheet = self.spreadsheets[spreadsheet_id] = {'title': spreadsheet_id, 'next_id': 1, 'sheets': []}
+            self.dirty = True
+        return spreadsheet
+
+    def _sheet(self, spreadsheet, title=None, sheet_id=None):
+        for sheet in spreadsheet['sheets']:
+            if sheet['title'] == title or sheet['sheetId'] == sheet_id:
+                return sheet
+        raise ApiError(400, f'Unable to parse range: {title or sheet_id}', 'INVALID_ARGUMENT')
+
+    def _properties(self, spreadsheet, sheet):
+        return {
+            'sheetId': sheet['sheetId'], 'title': sheet['title'], 'index': spreadsheet['sheets'].index(sheet),
+            'sheetType': 'GRID', 'gridProperties': {'rowCount': sheet['rowCount'], 'columnCount': sheet['columnCount']}
+        }
+
+    def _a1(self, sheet, row0, col0, row1, col1):
+        title = "'" + sheet['title'].replace("'", "''") + "'"
+        return f'{title}!{_column_letters(col0 + 1)}{row0 + 1}:{_column_letters(col1 + 1)}{row1 + 1}'
+
+    def _write(self, sheet, row0, col0, values, input_option):
+        convert = _user_entered if input_option == 'USER_ENTERED' else (lambda value: value)
+        grid = sheet['values']
+        for offset, row in enumerate(values):
+            while len(grid) <= row0 + offset:
+                grid.append([])
+            target = grid[row0 + offset]
+            if len(target) < col0 + len(row):
+                target.extend([''] * (col0 + len(row) - len(target)))
+            target[col0:col0 + len(row)] = [convert(value) for value in row]
+        width = max((len(row) for row in values), default=0)
+        sheet['rowCount'] = max(sheet['rowCount'], row0 + len(values))
+        sheet['columnCount'] = max(sheet['columnCount'], col0 + width)
+        self.dirty = True
+        return {'updatedRange': self._a1(sheet, row0, col0, row0 + max(len(values), 1) - 1, col0 + max(width, 1) - 1),
+                'updatedRows': len(values), 'updatedColumns': width, 'updatedCells': sum(len(row) for row in values)}
+
+    # API
+    def metadata(self, spreadsheet_id):
+        with self.lock:
+            spreadsheet = self._spreadsheet(spreadsheet_id)
+            return {
+                'spreadsheetId': spreadsheet_id,
+                'properties': {'title': spreadsheet['title'], 'locale': 'en_US', 'timeZone': 'Etc/GMT'},
+                'sheets': [{'properties': self._properties(spreadsheet, sheet)} for sheet in spreadsheet['sheets']]
+            }
+
+    def batch_update(self, spreadsheet_id, body):
+        with self.lock:
+            spreadsheet = self._spreadsheet(spreadsheet_id)
+            replies = []
+            for request in body.get('requests', []):
+                (kind, args), = request.items()
+                if kind == 'addSheet':
+                    properties = args.get('properties', {})
+                    title = properties.get('title') or f"Sheet{spreadsheet['next_id']}"
+                    if any(sheet['title'] == title for sheet in spreadsheet['sheets']):
+                        raise ApiError(400, f'A sheet with the name "{title}" already exists.', 'INVALID_ARGUMENT')
+                    grid = properties.get('gridProperties', {})
+                    sheet = {'sheetId': spreadsheet['next_id'], 'title': title, 'values': [],
+                             'rowCount': grid.get('rowCount', DEFAULT_ROWS), 'columnCount': grid.get('columnCount', DEFAULT_COLS)}
+                    spreadsheet['next_id'] += 1
+                    spreadsheet['sheets'].insert(properties.get('index', len(spreadsheet['sheets'])), sheet)
+                    replies.append({'addSheet': {'properties': self._properties(spreadsheet, sheet)}})
+                elif kind == 'updateSheetProperties':
+                    properties = args['properties']
+                    sheet = self._sheet(spreadsheet, sheet_id=properties.get('sheetId', 0))
+                    grid = properties.get('gridProperties', {})
+                    sheet['title'] = properties.get('title', sheet['title'])
+                    sheet['rowCount'] = grid.get('rowCount', sheet['rowCount'])
+                    sheet['columnCount'] = grid.get('columnCount', sheet['columnCount'])
+                    del sheet['values'][sheet['rowCount']:]
+                    for row in sheet['values']:
+                        del row[sheet['columnCount']:]
+                    replies.append({})
+                elif kind == 'appendDimension':
+                    sheet = self._sheet(spreadsheet, sheet_id=args.get('sheetId', 0))
+                    sheet['rowCount' if args.get('dimension') == 'ROWS' else 'columnCount'] += args.get('length', 0)
+                    replies.append({})
+                elif kind == 'deleteSheet':
+                    spreadsheet['sheets'].remove(self._sheet(spreadsheet, sheet_id=args.get('sheetId')))
+                    replies.append({})
+                else:
+                    raise ApiError(400, f'{kind} is not supported by the emulator', 'INVALID_ARGUMENT')
+            self.dirty = True
+            return {'spreadsheetId': spreadsheet_id, 'replies': replies}
+
+    def values_get(self, spreadsheet_id, range_name, render_option=None):
+        with self.lock:
+            title, (row0, col0, row1, col1) = split_range(range_name)
+            sheet = self._sheet(self._spreadsheet(spreadsheet_id), title)
+            row1 = sheet['rowCount'] - 1 if row1 is None else row1
+            col1 = sheet['columnCount'] - 1 if col1 is None else col1
+            rows = _trim(row[col0:col1 + 1] for row in sheet['values'][row0:row1 + 1])
+            if render_option not in ('UNFORMATTED_VALUE', 'FORMULA'):
+                rows = [[_formatted(value) for value in row] for row in rows]
+            result = {'range': self._a1(sheet, row0, col0, row1, col1), 'majorDimension': 'ROWS'}
+            if rows:
+                result['values'] = rows
+            return result
+
+    def values_update(self, spreadsheet_id, range_name, body, input_option):
+        with self.lock:
+            title, (row0, col0, _, _) = split_range(range_name)
+            sheet = self._sheet(self._spreadsheet(spreadsheet_id), title)
+            return dict(self._write(sheet, row0, col0, body.get('values', []), input_option), spreadsheetId=spreadsheet_id)
+
+    def values_append(self, spreadsheet_id, range_name, body, input_option):
+        with self.lock:
+            title, (row0, col0, _, _) = split_range(range_name)
+            sheet = self._sheet(self._spreadsheet(spreadsheet_id), title)
+            # Rows go after the last row with data in the table
+            last = len(_trim(sheet['values']))
+            updates = self._write(sheet, max(row0, last), col0, body.get('values', []), input_option)
+            return {'spreadsheetId': spreadsheet_id, 'tableRange': self._a1(sheet, row0, col0, max(row0, last - 1), sheet['columnCount'] - 1),
+                    'updates': dict(updates, spreadsheetId=spreadsheet_id)}
+
+    def values_batch_update(self, spreadsheet_id, body):
+        with self.lock:
+            spreadsheet = self._spreadsheet(spreadsheet_id)
+            responses = []
+            for value_range in body.get('data', []):
+                title, (row0, col0, _, _) = split_range(value_range['range'])
+                sheet = self._sheet(spreadsheet, title)
+                responses.append(dict(self._write(sheet, row0, col0, value_range.get('values', []), body.get('valueInputOption', 'RAW')), spreadsheetId=spreadsheet_id))
+            return {'spreadsheetId': spreadsheet_id, 'totalUpdatedCells': sum(r['updatedCells'] for r in responses), 'responses': responses}
+
+    def values_clear(self, spreadsheet_id, range_names):
+        with self.lock:
+            spreadsheet = self._spreadsheet(spreadsheet_id)
+            for range_name in range_names:
+                title, (row0, col0, row1, col1) = split_range(range_name)
+                sheet = self._sheet(spreadsheet, title)
+                for row in sheet['values'][row0:None if row1 is None else row1 + 1]:
+                    for column in range(col0, len(row) if col1 is None else min(col1 + 1, len(row))):
+                        row[column] = ''
+            self.dirty = True
+            return {'spreadsheetId': spreadsheet_id, 'clearedRanges': list(range_names)}
+
+    def flush(self):
+        with self.lock:
+            if not (self.data_path and self.dirty):
+                return
+            snapshot = json.dumps(self.spreadsheets)
+            self.dirty = False
+        temporary = f'{self.data_path}.tmp'
+        with open(temporary, 'w') as f:
+            f.write(snapshot)
+        os.replace(temporary, self.data_path)
+
+
+ROUTES = [
+    ('GET', re.compile(r'^/v4/spreadsheets/([^/:]+)$'), 'metadata'),
+    ('POST', re.compile(r'^/v4/spreadsheets/([^/:]+):batchUpdate$'), 'batch_update'),
+    ('POST', re.compile(r'^/v4/spreadsheets/([^/:]+)/values:batchClear$'), 'batch_clear'),
+    ('POST', re.compile(r'^/v4/spreadsheets/([^/:]+)/values:batchUpdate$'), 'batch_values'),
+    ('POST', re.compile(r'^/v4/spreadsheets/([^/:]+)/values/([^/:]+):append$'), 'append'),
+    ('POST', re.compile(r'^/v4/spreadsheets/([^/:]+)/values/([^/:]+):clear$'), 'clear'),
+    ('GET', re.compile(r'^/v4/spreadsheets/([^/:]+)/values/([^/:]+)$'), 'get'),
+    ('PUT', re.compile(r'^/v4/spreadsheets/([^/:]+)/values/([^/:]+)$'), 'update'),
+]
+
+
+def make_handler(emulator):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=UTF-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+            except ValueError as e:
+                raise ApiError(400, f'Invalid JSON payload received. {e}', 'INVALID_ARGUMENT')
+            if not isinstance(body, dict):
+                raise ApiError(400, 'Invalid JSON payload received. Expected an object.', 'INVALID_ARGUMENT')
+            return body
+
+        def _handle(self, method):
+            url = urlsplit(self.path)
+            query = {name: values[0] for name, values in parse_qs(url.query).items()}
+            try:
+                body = self._body()
+                if url.path == '/_emulator/stats':
+                    return self._send(200, dict(emulator.stats))
+                for route_method, pattern, action in ROUTES:
+                    match = pattern.match(url.path) if route_method == method else None
+                    if match:
+                        break
+                else:
+                    raise ApiError(404, f'No emulated endpoint for {method} {url.path}', 'NOT_FOUND')
+                emulator.admit()
+                args = [unquote(group) for group in match.groups()]
+                input_option = query.get('valueInputOption', 'RAW')
+                if action == 'metadata':
+                    result = emulator.metadata(*args)
+                elif action == 'batch_update':
+                    result = emulator.batch_update(*args, body)
+                elif action == 'batch_values':
+                    result = emulator.values_batch_update(*args, body)
+                elif action == 'batch_clear':
+                    result = emulator.values_clear(*args, body.get('ranges', []))
+                elif action == 'append':
+                    result = emulator.values_append(*args, body, input_option)
+                elif action == 'clear':
+                    result = emulator.values_clear(args[0], [args[1]])
+                elif action == 'get':
+                    result = emulator.values_get(*args, query.get('valueRenderOption'))
+                else:
+                    result = emulator.values_update(*args, body, input_option)
+                self._send(200, result)
+            except ApiError as e:
+                self._send(e.code, {'error': {'code': e.code, 'message': e.message, 'status': e.status}})
+            except (KeyError, TypeError, ValueError) as e:
+                self._send(400, {'error': {'code': 400, 'message': f'Invalid request: {e!r}', 'status': 'INVALID_ARGUMENT'}})
+
+        def do_GET(self):
+            self._handle('GET')
+
+        def do_POST(self):
+            self._handle('POST')
+
+        def do_PUT(self):
+            self._handle('PUT')
+
+    return Handler
+
+
+def serve(emulator, host='127.0.0.1', port=8085, flush_interval=1.0):
+    server = ThreadingHTTPServer((host, port), make_handler(emulator))
+    server.daemon_threads = True
+
+    def flush_periodically():
+        while True:
+            time.sleep(flush_interval)
+            emulator.flush()
+    threading.Thread(target=flush_periodically, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Google Sheets API stand-in for load tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8085)
+    parser.add_argument('--latency', default='fixed:0', help='fixed:MS, uniform:LOW_MS:HIGH_MS or lognormal:MEDIAN_MS:SIGMA')
+    parser.add_argument('--quota-per-minute', type=int, default=0, help='answer 429 beyond this many requests per minute (0: unlimited)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 429 regardless of quota')
+    parser.add_argument('--data', help='JSON file the spreadsheets are loaded from and saved to')
+    args = parser.parse_args()
+    emulator = SheetsEmulator(args.latency, args.quota_per_minute, args.error_rate, args.data)
+    server = serve(emulator, args.host, args.port)
+    print(f'Sheets emulator on http://{args.host}:{server.server_port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.flush()
+
+
+if __name__ == '__main__':
+    main()
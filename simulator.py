@@ -0,0 +1,111 @@
+# What-if grids for the health score and budget tools. The formulas mirror
+# calculate_health_score and calculate_budget in finance.py, evaluated over
+# every combination of the requested parameter values in one NumPy pass.
+# Nothing is persisted. numpy is imported lazily so workers boot without it.
+
+MAX_AXIS_STEPS = 101
+MAX_GRID_CELLS = 20_000
+MAX_RATIO = 1e15
+
+HEALTH_SCORE_PARAMS = ('income_revenue', 'expenses_costs', 'debt_loan', 'debt_interest_rate')
+BUDGET_PARAMS = ('monthly_income', 'housing_expenses', 'food_expenses', 'transport_expenses', 'other_expenses')
+# Tighter bounds than api.MAX_NUMBER, as the scalar endpoints apply them
+MAXIMUMS = {'debt_interest_rate': 100}
+
+
+class SimulationError(ValueError):
+    pass
+
+
+def _values(name, spec, maximum=None):
+    # A parameter is a number, a list of numbers or {"min", "max", "steps"},
+    # every value between 0 and maximum (api.MAX_NUMBER by default, the
+    # bound the scalar endpoints apply, so grid sums stay finite).
+    import numpy as np
+    from api import MAX_NUMBER
+    if maximum is None:
+        maximum = MAX_NUMBER
+    if isinstance(spec, dict):
+        steps = spec.get('steps', 11)
+        if not isinstance(steps, int) or not 1 <= steps <= MAX_AXIS_STEPS:
+            raise SimulationError(f'{name}.steps must be between 1 and {MAX_AXIS_STEPS}')
+    elif isinstance(spec, (list, tuple)) and not 1 <= len(spec) <= MAX_AXIS_STEPS:
+        raise SimulationError(f'{name} must list between 1 and {MAX_AXIS_STEPS} values')
+    try:
+        if isinstance(spec, dict):
+            values = np.linspace(float(spec['min']), float(spec['max']), steps)
+        elif isinstance(spec, (list, tuple)):
+            values = np.asarray(spec, dtype=float)
+        else:
+            values = np.asarray([float(spec or 0)])
+    except (KeyError, TypeError, ValueError):
+        raise SimulationError(f'{name} must be a number, a list of numbers or a min/max/steps range')
+    if not np.isfinite(values).all() or (values < 0).any():
+        raise SimulationError(f'{name} must be non-negative')
+    if (values > maximum).any():
+        raise SimulationError(f'{name} must be at most {maximum:g}')
+    return values
+
+
+def build_grid(params, names):
+    # Ranged parameters become grid axes in the order given; fixed ones
+    # broadcast. Returns the axes and one broadcastable array per name.
+    import numpy as np
+    values = {name: _values(name, params.get(name), MAXIMUMS.get(name)) for name in names}
+    axes = [name for name in names if isinstance(params.get(name), (dict, list, tuple))]
+    shape = tuple(len(values[name]) for name in axes)
+    if int(np.prod(shape, dtype=np.int64)) > MAX_GRID_CELLS:
+        raise SimulationError(f'Grid is limited to {MAX_GRID_CELLS} cells')
+    arrays = {}
+    for name in names:
+        if name in axes:
+            index = axes.index(name)
+            arrays[name] = values[name].reshape(tuple(-1 if i == index else 1 for i in range(len(axes))))
+        else:
+            arrays[name] = values[name][0]
+    return {name: values[name].tolist() for name in axes}, shape, arrays
+
+
+def health_score_grid(income, expenses, debt, interest_rate):
+    import numpy as np
+    income, expenses, debt, interest_rate = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (income, expenses, debt, interest_rate)))
+    positive = income > 0
+    safe_income = np.where(positive, income, 1.0)
+    # A tiny income overflows the ratios to infinity; the clip below still
+    # lands those scores on 0
+    with np.errstate(over='ignore'):
+        savings_ratio = np.where(positive, (income - expenses) / safe_income, 0.0)
+        debt_to_income = np.where(positive, debt / safe_income, 1.0)
+        score = 100 * (0.5 * savings_ratio - 0.3 * debt_to_income - 0.2 * (interest_rate / 100))
+    return np.clip(np.round(score), 0, 100).astype(np.int16)
+
+
+def budget_grid(monthly_income, housing, food, transport, other):
+    import numpy as np
+    total_expenses = np.asarray(housing, dtype=float) + food + transport + other
+    savings = np.asarray(monthly_income, dtype=float) - total_expenses
+    return total_expenses, savings
+
+
+def simulate_health_score(params):
+    axes, shape, arrays = build_grid(params, HEALTH_SCORE_PARAMS)
+    scores = health_score_grid(*(arrays[name] for name in HEALTH_SCORE_PARAMS)).reshape(shape)
+    return {'axes': axes, 'shape': list(shape), 'scores': scores.tolist()}
+
+
+def simulate_budget(params):
+    import numpy as np
+    axes, shape, arrays = build_grid(params, BUDGET_PARAMS)
+    _, savings = budget_grid(*(arrays[name] for name in BUDGET_PARAMS))
+    savings = np.broadcast_to(savings, shape)
+    income = np.broadcast_to(arrays['monthly_income'], shape)
+    with np.errstate(over='ignore'):
+        ratio = np.divide(savings, income, out=np.zeros(shape), where=income > 0)
+    # A tiny income overflows the ratio; keep it finite for JSON
+    ratio = np.clip(ratio, -MAX_RATIO, MAX_RATIO)
+    return {
+        'axes': axes,
+        'shape': list(shape),
+        'savings': np.round(savings, 2).tolist(),
+        'savings_ratio': np.round(ratio, 4).tolist()
+    }
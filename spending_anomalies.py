@@ -0,0 +1,203 @@
+import math
+from datetime import date, timedelta
+
+from columnar import NO_DATE, get_columns
+from shared_cache import LeaseTimeout, cache, clear_stale, get_data_version, is_stale, lease, mark_stale
+from translation_catalogs import catalogs
+
+# Streaming anomaly detection on expenses. Each user keeps, per category and
+# for their spending as a whole, a Welford mean/variance of expense amounts
+# and two exponentially weighted spend rates (a fast and a slow one). Every
+# recorded expense is checked against the statistics as they stood before it
+# and then folded in, so flagging a transaction costs the same however long
+# the user's history is:
+#   - an unusual transaction is one more than Z_THRESHOLD deviations above
+#     the category's mean amount;
+#   - a spending spike is the fast spend rate reaching SPIKE_RATIO times the
+#     slow one, flagged once when it starts, per category or overall.
+# The state is cached per user with the data version it reflects, like the
+# spending cube; expense writes patch it in place and anything else makes
+# the next reader replay the user's expenses.
+
+SHEET_NAME = 'ExpenseTracker'
+ALL = '*'
+Z_THRESHOLD = 3.0
+# Identical amounts have no variance; this fraction of the mean stands in
+MIN_SPREAD = 0.5
+MIN_HISTORY = 5
+FAST_DAYS = 7
+SLOW_DAYS = 60
+SPIKE_RATIO = 2.0
+# Days of history a rate needs before it can spike
+MIN_SPAN_DAYS = 30
+MAX_ALERTS = 20
+ALERT_DAYS = 30
+
+
+def _new_stats(day):
+    return {'count': 0, 'mean': 0.0, 'm2': 0.0, 'first': day, 'last': day, 'fast': 0.0, 'slow': 0.0, 'spiking': False}
+
+
+def _decay(days, tau):
+    return math.exp(-days / tau)
+
+
+def _add_rate(stats, day, amount):
+    # Kernel sum of amount * exp(-age / tau) / tau, kept as of `last`; an
+    # expense dated before `last` enters already decayed, so arrival order
+    # does not matter
+    if day >= stats['last']:
+        stats['fast'] *= _decay(day - stats['last'], FAST_DAYS)
+        stats['slow'] *= _decay(day - stats['last'], SLOW_DAYS)
+        stats['last'] = day
+    stats['fast'] += amount * _decay(stats['last'] - day, FAST_DAYS) / FAST_DAYS
+    stats['slow'] += amount * _decay(stats['last'] - day, SLOW_DAYS) / SLOW_DAYS
+    stats['first'] = min(stats['first'], day)
+
+
+def rate(stats, name):
+    # Spend per day, corrected for the window not yet being full of history
+    tau = FAST_DAYS if name == 'fast' else SLOW_DAYS
+    span = stats['last'] - stats['first'] + 1
+    return stats[name] / (1 - _decay(span, tau))
+
+
+def stddev(stats):
+    spread = math.sqrt(stats['m2'] / (stats['count'] - 1)) if stats['count'] > 1 else 0.0
+    return max(spread, MIN_SPREAD * abs(stats['mean']))
+
+
+class AnomalyState:
+    def __init__(self, version=None):
+        self.stats = {}
+        self.alerts = []
+        self.version = version
+
+    def add(self, expense_id, category, day, amount):
+        if day == NO_DATE:
+            return []
+        found = []
+        stats = self.stats.setdefault(category, _new_stats(day))
+        if stats['count'] >= MIN_HISTORY and amount > stats['mean']:
+            z = (amount - stats['mean']) / stddev(stats)
+            if z >= Z_THRESHOLD:
+                found.append({'kind': 'transaction', 'id': expense_id, 'category': category, 'date': day,
+                              'amount': amount, 'mean': stats['mean']})
+        for name in (category, ALL):
+            stats = self.stats.setdefault(name, _new_stats(day))
+            stats['count'] += 1
+            delta = amount - stats['mean']
+            stats['mean'] += delta / stats['count']
+            stats['m2'] += delta * (amount - stats['mean'])
+            _add_rate(stats, day, amount)
+            spiking = (stats['count'] >= MIN_HISTORY and stats['last'] - stats['first'] >= MIN_SPAN_DAYS
+                       and rate(stats, 'fast') >= SPIKE_RATIO * rate(stats, 'slow'))
+            # One alert per expense: a spike that an unusual transaction
+            # set off is already explained by it
+            if spiking and not stats['spiking'] and not found:
+                found.append({'kind': 'spike', 'id': expense_id, 'category': name, 'date': day,
+                              'ratio': rate(stats, 'fast') / rate(stats, 'slow')})
+            stats['spiking'] = spiking
+        self.alerts = (self.alerts + found)[-MAX_ALERTS:]
+        return found
+
+    def remove(self, expense_id, category, day, amount):
+        # Welford and the kernel sums run backwards exactly
+        self.alerts = [alert for alert in self.alerts if alert['id'] != expense_id]
+        if day == NO_DATE:
+            return
+        for name in (category, ALL):
+            stats = self.stats.get(name)
+            if not stats or not stats['count']:
+                continue
+            stats['count'] -= 1
+            if not stats['count']:
+                self.stats[name] = _new_stats(stats['last'])
+                continue
+            delta = amount - stats['mean']
+            stats['mean'] -= delta / stats['count']
+            stats['m2'] = max(0.0, stats['m2'] - delta * (amount - stats['mean']))
+            _add_rate(stats, day, -amount)
+            stats['fast'], stats['slow'] = max(0.0, stats['fast']), max(0.0, stats['slow'])
+
+
+def _ordinal(value):
+    try:
+        return date.fromisoformat(value).toordinal()
+    except (TypeError, ValueError):
+        return NO_DATE
+
+
+def _amount(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def build(email):
+    state = AnomalyState(current_version(email))
+    columns = get_columns('expense_tracker')
+    ids, amounts, dates = columns.columns['ID'], columns.columns['Amount'], columns.columns['Date']
+    for row in columns.rows_for(email):
+        state.add(ids[row], columns.label('Category', row), dates[row], amounts[row])
+    return state
+
+
+def _key(email):
+    return f'spending_anomalies:{email}'
+
+
+def current_version(email):
+    return get_data_version(SHEET_NAME, email)
+
+
+def get_state(email):
+    version = current_version(email)
+    state = cache.get(_key(email))
+    if state is None or state.version != version or is_stale(_key(email)):
+        clear_stale(_key(email))
+        state = build(email)
+        cache.set(_key(email), state)
+    return state
+
+
+def record(email, since, added=None, removed=None):
+    # Fold one written row into the user's statistics and return the alerts
+    # it raised. `since` is the data version read before the write; state
+    # that does not reflect it missed another change and is dropped, and the
+    # next reader's replay surfaces the row's alerts as insights instead.
+    try:
+        with lease(_key(email)):
+            state = cache.get(_key(email))
+            if state is None:
+                return []
+            if state.version != since or is_stale(_key(email)):
+                cache.delete(_key(email))
+                return []
+            if removed:
+                state.remove(removed['ID'], removed['Category'], _ordinal(removed['Date']), _amount(removed['Amount']))
+            found = []
+            if added:
+                found = state.add(added['ID'], added['Category'], _ordinal(added['Date']), _amount(added['Amount']))
+            state.version = current_version(email)
+            cache.set(_key(email), state)
+            return found
+    except LeaseTimeout:
+        mark_stale(_key(email))
+        return []
+
+
+def message(alert, language='English'):
+    strings = catalogs[language]
+    category = strings.get(alert['category'], alert['category'])
+    if alert['kind'] == 'transaction':
+        return strings['Unusual Expense Alert'].format(amount=alert['amount'], category=category, mean=alert['mean'])
+    if alert['category'] == ALL:
+        return strings['Spending Spike Alert'].format(ratio=alert['ratio'])
+    return strings['Category Spending Spike Alert'].format(ratio=alert['ratio'], category=category)
+
+
+def recent_messages(email, today=None, language='English'):
+    since = (today or date.today()) - timedelta(days=ALERT_DAYS)
+    return [message(alert, language) for alert in get_state(email).alerts if alert['date'] >= since.toordinal()]
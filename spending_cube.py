@@ -0,0 +1,161 @@
+import calendar
+from array import array
+from datetime import date, timedelta
+from itertools import accumulate
+
+from columnar import NO_DATE, get_columns
+from shared_cache import LeaseTimeout, cache, clear_stale, get_data_version, is_stale, lease, mark_stale
+
+# Per-user spending cube: one running total per category over a day axis, so
+# the spend for any date range and category is two lookups and a
+# subtraction. Weeks and months are ranges of days, so every bucket size is
+# answered from the same prefix sums. The cube is cached per user together
+# with the data version it reflects; expense_submit and expense_edit patch it
+# in place, and any other change to the sheet makes the next reader rebuild it.
+
+SHEET_NAME = 'ExpenseTracker'
+BUCKETS = ('day', 'week', 'month')
+MAX_BUCKETS = 400
+
+
+class SpendingCube:
+    def __init__(self, version=None):
+        self.first = None
+        self.days = 0
+        self.prefix = {}
+        self.version = version
+
+    def _cover(self, day):
+        if self.first is None:
+            self.first = day
+        if day < self.first:
+            shift = self.first - day
+            for category, sums in self.prefix.items():
+                self.prefix[category] = array('d', bytes(8 * shift)) + sums
+            self.first, self.days = day, self.days + shift
+        if day >= self.first + self.days:
+            grow = day - self.first - self.days + 1
+            for sums in self.prefix.values():
+                sums.extend([sums[-1] if sums else 0.0] * grow)
+            self.days += grow
+
+    def add(self, category, day, amount):
+        if day == NO_DATE:
+            return
+        self._cover(day)
+        sums = self.prefix.setdefault(category, array('d', bytes(8 * self.days)))
+        for index in range(day - self.first, self.days):
+            sums[index] += amount
+
+    def _through(self, sums, index):
+        if index < 0 or not sums:
+            return 0.0
+        return sums[min(index, self.days - 1)]
+
+    def total(self, start=None, end=None, category=None):
+        # Spend within [start, end], both inclusive; open ends mean all time
+        if not self.days:
+            return 0.0
+        low = start.toordinal() - self.first if start else 0
+        high = end.toordinal() - self.first if end else self.days - 1
+        if high < low:
+            return 0.0
+        categories = [category] if category else list(self.prefix)
+        return sum(self._through(self.prefix.get(c), high) - self._through(self.prefix.get(c), low - 1) for c in categories)
+
+    def by_category(self, start=None, end=None):
+        return {category: self.total(start, end, category) for category in self.prefix}
+
+    def series(self, start, end, bucket='month', category=None):
+        result = []
+        for low, high in bucket_ranges(start, end, bucket):
+            result.append({'start': low.isoformat(), 'end': high.isoformat(), 'total': round(self.total(low, high, category), 2)})
+        return result
+
+
+def bucket_ranges(start, end, bucket):
+    # Calendar buckets covering [start, end], clipped to it; weeks start on Monday
+    low = start
+    while low <= end:
+        if bucket == 'day':
+            high = low
+        elif bucket == 'week':
+            high = low + timedelta(days=6 - low.weekday())
+        else:
+            high = low.replace(day=calendar.monthrange(low.year, low.month)[1])
+        high = min(high, end)
+        yield low, high
+        low = high + timedelta(days=1)
+
+
+def build(email):
+    cube = SpendingCube(current_version(email))
+    columns = get_columns('expense_tracker')
+    rows = [row for row in columns.rows_for(email) if columns.columns['Date'][row] != NO_DATE]
+    if not rows:
+        return cube
+    dates, amounts, codes = columns.columns['Date'], columns.columns['Amount'], columns.columns['Category']
+    # Rows come sorted by date, so the axis is known up front
+    cube.first = dates[rows[0]]
+    cube.days = dates[rows[-1]] - cube.first + 1
+    daily = {}
+    for row in rows:
+        spend = daily.setdefault(codes[row], array('d', bytes(8 * cube.days)))
+        spend[dates[row] - cube.first] += amounts[row]
+    labels = columns.labels['Category']
+    cube.prefix = {labels[code]: array('d', accumulate(spend)) for code, spend in daily.items()}
+    return cube
+
+
+def _key(email):
+    return f'spending_cube:{email}'
+
+
+def current_version(email):
+    return get_data_version(SHEET_NAME, email)
+
+
+def get_cube(email):
+    version = current_version(email)
+    cube = cache.get(_key(email))
+    if cube is None or cube.version != version or is_stale(_key(email)):
+        clear_stale(_key(email))
+        cube = build(email)
+        cache.set(_key(email), cube)
+    return cube
+
+
+def apply_change(email, since, added=None, removed=None):
+    # Patch the cached cube for one written row. `since` is the user's data
+    # version read before the write; a cube that does not reflect it missed
+    # another change and is dropped instead.
+    try:
+        with lease(_key(email)):
+            cube = cache.get(_key(email))
+            if cube is None:
+                return
+            if cube.version != since or is_stale(_key(email)):
+                cache.delete(_key(email))
+                return
+            for expense, sign in ((removed, -1), (added, 1)):
+                if expense:
+                    cube.add(expense['Category'], _ordinal(expense['Date']), sign * float(expense['Amount'] or 0))
+            cube.version = current_version(email)
+            cache.set(_key(email), cube)
+    except LeaseTimeout:
+        mark_stale(_key(email))
+
+
+def _ordinal(value):
+    try:
+        return date.fromisoformat(value).toordinal()
+    except (TypeError, ValueError):
+        return NO_DATE
+
+
+def month_over_month(cube, today):
+    # Month to date against the same number of days of the previous month
+    start = today.replace(day=1)
+    last_start = (start - timedelta(days=1)).replace(day=1)
+    last_end = last_start.replace(day=min(today.day, calendar.monthrange(last_start.year, last_start.month)[1]))
+    return {category: (cube.total(start, today, category), cube.total(last_start, last_end, category)) for category in cube.prefix}
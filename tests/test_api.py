@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app import create_app
+
+
+class TestApiV1(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.client = self.app.test_client()
+
+    def test_health_score(self):
+        response = self.client.post('/api/v1/health-score', json={'income_revenue': 1000, 'expenses_costs': 200, 'debt_loan': 0, 'debt_interest_rate': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['score'], 40)
+
+    def test_invalid_number_is_400(self):
+        response = self.client.get('/api/v1/net-worth?assets=abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('assets', response.get_json()['error'])
+
+    def test_non_finite_numbers_are_400(self):
+        for query in ('net-worth?assets=nan', 'net-worth?assets=1e309', 'health-score?income_revenue=inf', 'budget?monthly_income=1e308&housing_expenses=1e308'):
+            response = self.client.get(f'/api/v1/{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn('error', response.get_json())
+
+    def test_non_object_bodies_are_400(self):
+        self.assertEqual(self.client.post('/api/v1/net-worth', json=[1]).status_code, 400)
+        self.assertEqual(self.client.post('/api/v1/batch', json=[1]).status_code, 400)
+        response = self.client.post('/api/v1/batch', json={'requests': [{'path': '/net-worth', 'body': [1]}]})
+        self.assertEqual(response.get_json()['responses'][0]['status'], 400)
+
+    def test_budget_via_query_string(self):
+        response = self.client.get('/api/v1/budget?monthly_income=500&housing_expenses=100&food_expenses=50')
+        self.assertEqual(response.get_json(), {'total_expenses': 150.0, 'savings': 350.0})
+
+    def test_expenses_requires_sign_in(self):
+        self.assertEqual(self.client.get('/api/v1/expenses').status_code, 401)
+
+    def test_bills_are_sorted_and_support_etags(self):
+        worksheet = MagicMock()
+        worksheet.get_all_records.return_value = [
+            {'ID': '2', 'User Email': 'ada@example.com', 'Bill Name': 'Water', 'Amount': 10, 'Due Date': '2026-12-01', 'Status': 'Pending', 'Timestamp': ''},
+            {'ID': '1', 'User Email': 'ada@example.com', 'Bill Name': 'Rent', 'Amount': 100, 'Due Date': '2026-11-01', 'Status': 'Pending', 'Timestamp': ''},
+            {'ID': '3', 'User Email': 'bob@example.com', 'Bill Name': 'Gym', 'Amount': 5, 'Due Date': '2026-10-01', 'Status': 'Paid', 'Timestamp': ''},
+        ]
+        with self.client.session_transaction() as sess:
+            sess['user_email'] = 'ada@example.com'
+        with patch('sheets.ensure_sheet_and_headers', return_value=worksheet):
+            response = self.client.get('/api/v1/bills')
+            self.assertEqual([b['name'] for b in response.get_json()['bills']], ['Rent', 'Water'])
+            cached = self.client.get('/api/v1/bills', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_batch(self):
+        response = self.client.post('/api/v1/batch', json={'requests': [
+            {'path': '/net-worth', 'body': {'assets': 300, 'liabilities': 100}},
+            {'path': '/health-score', 'body': {'income_revenue': -1}},
+            {'path': '/nope'},
+        ]})
+        statuses = [r['status'] for r in response.get_json()['responses']]
+        self.assertEqual(statuses, [200, 400, 404])
+        self.assertEqual(response.get_json()['responses'][0]['body'], {'net_worth': 200.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from flask import Flask, render_template_string
+
+import assets
+
+
+class TestAssetPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        os.makedirs(os.path.join(root, 'static', 'css'))
+        os.makedirs(os.path.join(root, 'templates'))
+        with open(os.path.join(root, 'static', 'css', 'bootstrap.min.css'), 'w') as f:
+            f.write('.btn{color:red}.unused{color:blue}@media (min-width:1px){.card,.nope{margin:0}.gone{padding:0}}')
+        with open(os.path.join(root, 'templates', 'page.html'), 'w') as f:
+            f.write('<div class="btn card alert-{{ category }}"></div>')
+        self.app = Flask(__name__, root_path=root, static_folder='static', template_folder='templates')
+        self.app.config['ASSETS_BUILD_DIR'] = os.path.join(root, 'build')
+        assets.init_app(self.app)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_purge_css_keeps_only_used_selectors(self):
+        css = '.btn{a:b}.unused{c:d}@media (x){.card,.nope{e:f}.gone{g:h}}.alert-info{i:j}'
+        purged = assets.purge_css(css, {'btn', 'card'}, ('alert-',))
+        self.assertEqual(purged, '.btn{a:b}@media (x){.card{e:f}}.alert-info{i:j}')
+
+    def test_url_for_rewrites_static_to_fingerprinted_asset(self):
+        with self.app.test_request_context():
+            url = render_template_string("{{ url_for('static', filename='css/bootstrap.min.css') }}")
+        self.assertRegex(url, r'^/assets/css/bootstrap\.min\.[0-9a-f]{12}\.css$')
+
+    def test_serves_precompressed_variant_with_immutable_caching(self):
+        with self.app.test_request_context():
+            url = render_template_string("{{ url_for('static', filename='css/bootstrap.min.css') }}")
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        plain = self.client.get(url, headers={'Accept-Encoding': 'identity'})
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertNotIn(b'unused', plain.data)
+
+    def test_refused_encodings_are_not_sent(self):
+        with self.app.test_request_context():
+            url = render_template_string("{{ url_for('static', filename='css/bootstrap.min.css') }}")
+        refused = self.client.get(url, headers={'Accept-Encoding': 'br;q=0, gzip;q=0'})
+        self.assertNotIn('Content-Encoding', refused.headers)
+        self.assertEqual(self.client.get(url, headers={'Accept-Encoding': 'br;q=0, gzip'}).headers['Content-Encoding'], 'gzip')
+
+    def test_unknown_asset_is_404(self):
+        self.assertEqual(self.client.get('/assets/css/missing.css').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from app import create_app
+from sheets import RateLimiter, SheetsRateLimitExceeded
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_in_flight_requests_are_capped(self):
+        limiter = RateLimiter(requests_per_minute=6000, max_concurrency=3, burst=100)
+        lock = threading.Lock()
+        state = {'current': 0, 'peak': 0}
+
+        def call():
+            with limiter.limit():
+                with lock:
+                    state['current'] += 1
+                    state['peak'] = max(state['peak'], state['current'])
+                time.sleep(0.02)
+                with lock:
+                    state['current'] -= 1
+
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            list(pool.map(lambda _: call(), range(24)))
+        self.assertEqual(state['peak'], 3)
+
+    def test_rate_beyond_burst_waits_then_gives_up(self):
+        limiter = RateLimiter(requests_per_minute=60, max_concurrency=5, burst=2)
+        for _ in range(2):
+            with limiter.limit():
+                pass
+        with self.assertRaises(SheetsRateLimitExceeded):
+            with limiter.limit(timeout=0.1):
+                pass
+
+
+class TestAsyncSheets(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'CACHE_TYPE': 'SimpleCache', 'SHEETS_IO_THREADS': 4})
+        self.storage = self.app.extensions['async_sheets']
+
+    def test_calls_run_off_loop_with_app_context(self):
+        def blocking():
+            time.sleep(0.1)
+            return current_app.name, threading.current_thread().name
+
+        async def main():
+            return await asyncio.gather(*(self.storage.run(blocking) for _ in range(4)))
+
+        with self.app.app_context():
+            start = time.perf_counter()
+            results = asyncio.run(main())
+            elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 0.3)
+        self.assertTrue(all(name == self.app.name and thread.startswith('sheets-io') for name, thread in results))
+
+    def test_gather_reports_each_call(self):
+        def broken():
+            raise RuntimeError('quota')
+
+        with self.app.app_context():
+            results = asyncio.run(self.storage.gather({'ok': lambda: 1, 'slow': lambda: time.sleep(0.5), 'broken': broken}, timeout=0.2))
+        self.assertEqual(results['ok'], {'status': 'ok', 'data': 1})
+        self.assertEqual(results['slow']['status'], 'timeout')
+        self.assertEqual(results['broken']['status'], 'error')
+
+
+if __name__ == '__main__':
+    unittest.main()
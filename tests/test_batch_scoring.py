@@ -0,0 +1,128 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from app import create_app
+import batch_scoring
+import schema_migration
+import sheets
+from sheets_emulator import SheetsEmulator, serve
+from shared_cache import cache
+
+
+def submission(n, email, income, expenses, debt=0, language='English'):
+    return [f's{n}', f'User{n}', 'Test', email, '', language, '', 'Individual', income, expenses, debt, 0, f'2026-10-{n:02d} 09:00:00']
+
+
+class TestBatchScoring(unittest.TestCase):
+    def setUp(self):
+        self.emulator = SheetsEmulator()
+        self.server = serve(self.emulator, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        patcher = patch('sheets.SHEETS_API_URL', f'http://127.0.0.1:{self.server.server_port}')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sheets._clients.__dict__.clear()
+        self.addCleanup(sheets._clients.__dict__.clear)
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        cache.clear()
+        schema_migration._verified.clear()
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+        self.submissions = sheets.ensure_sheet_and_headers('Submissions', sheets.PREDETERMINED_HEADERS['Submissions'])
+
+    def add(self, *rows):
+        self.submissions.append_rows([list(row) for row in rows])
+
+    def results(self):
+        rows = self.emulator.values_get(sheets.SPREADSHEET_ID, "'FicoreAIResults'", 'UNFORMATTED_VALUE')['values'][1:]
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def reports(self):
+        tail = cache.get(batch_scoring.QUEUE_TAIL_KEY) or 0
+        return [cache.get(f'score_reports:{position}') for position in range(1, tail + 1)]
+
+    def test_scores_match_the_notebook(self):
+        def score(income, expenses, debt, rate):
+            return batch_scoring.score_row({'Income/Revenue': income, 'Expenses/Costs': expenses, 'Debt/Loan': debt, 'Debt Interest Rate': rate})
+        self.assertEqual(score(1000, 500, 500, 10), 49.95)
+        self.assertEqual(score(1000, 1500, 2000, 40), 0)
+        self.assertEqual(score(0, 100, 0, 0), 66.6)
+        self.assertEqual(score('', None, 'n/a', -5), 66.6)
+
+    def test_checkpoint_defaults_under_the_instance_folder(self):
+        self.assertEqual(os.path.dirname(self.app.config['SCORING_CHECKPOINT_PATH']), self.app.instance_path)
+
+    def test_run_lock_is_refreshed_per_chunk(self):
+        self.add(*[submission(n, f'user{n}@example.com', 1000, 100 * n) for n in range(1, 6)])
+        refresh = batch_scoring._refresh_lock
+        held = []
+
+        def recording_refresh(token):
+            held.append(cache.get(batch_scoring.RUNNING_KEY) == token)
+            refresh(token)
+        with patch('batch_scoring._refresh_lock', side_effect=recording_refresh):
+            batch_scoring.run(self.checkpoint, chunk_size=2)
+        self.assertEqual(held, [True, True])
+        self.assertIsNone(cache.get(batch_scoring.RUNNING_KEY))
+        cache.set(batch_scoring.RUNNING_KEY, 'another run')
+        with self.assertRaises(batch_scoring.ScoringInProgress):
+            batch_scoring._refresh_lock('this run')
+
+    def test_incremental_runs(self):
+        self.add(submission(1, 'ada@example.com', 1000, 200), submission(2, 'bob@example.com', 1000, 900), submission(3, 'cy@example.com', 1000, 900))
+        summary = batch_scoring.run(self.checkpoint)
+        self.assertEqual(summary, {'submissions': 3, 'rows_written': 3, 'reports': 3})
+        self.assertEqual(self.results(), {'ada@example.com': (93.24, 1), 'bob@example.com': (69.93, 2), 'cy@example.com': (69.93, 2)})
+
+        # Nothing new: nothing read beyond the watermark, nothing written
+        self.assertEqual(batch_scoring.run(self.checkpoint), {'submissions': 0, 'rows_written': 0, 'reports': 0})
+
+        # A new leader moves everyone down; bob resubmits the same score
+        self.add(submission(4, 'dee@example.com', 1000, 0), submission(5, 'bob@example.com', 1000, 900))
+        summary = batch_scoring.run(self.checkpoint)
+        self.assertEqual(summary, {'submissions': 2, 'rows_written': 4, 'reports': 1})
+        self.assertEqual(self.results()['dee@example.com'], (99.9, 1))
+        self.assertEqual(self.results()['cy@example.com'], (69.93, 3))
+        self.assertEqual([(r['email'], r['rank'], r['total_users']) for r in self.reports()][-1], ('dee@example.com', 1, 4))
+
+    def test_resumes_from_the_last_checkpoint(self):
+        self.add(*[submission(n, f'user{n}@example.com', 1000, 100 * n) for n in range(1, 8)])
+        merge = batch_scoring.merge_chunk
+        calls = []
+
+        def crash_on_third_chunk(*args):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RuntimeError('worker killed')
+            return merge(*args)
+
+        with patch('batch_scoring.merge_chunk', side_effect=crash_on_third_chunk):
+            with self.assertRaises(RuntimeError):
+                batch_scoring.run(self.checkpoint, chunk_size=2)
+        self.assertEqual(batch_scoring.load_checkpoint(self.checkpoint)['watermark'], 4)
+        summary = batch_scoring.run(self.checkpoint, chunk_size=2)
+        self.assertEqual(summary['submissions'], 3)
+        self.assertEqual(len(self.reports()), 7)
+        self.assertEqual(sorted(rank for _, rank in self.results().values()), [1, 2, 3, 4, 5, 6, 7])
+
+    def test_adopts_rows_the_notebook_wrote(self):
+        results = sheets.ensure_sheet_and_headers('FicoreAIResults', sheets.PREDETERMINED_HEADERS['FicoreAIResults'])
+        results.append_rows([['bob@example.com', 69.93, 1], ['zed@example.com', 30, 2]])
+        self.add(submission(1, 'bob@example.com', 1000, 900))
+        batch_scoring.run(self.checkpoint, notify=False)
+        self.assertEqual(self.results(), {'bob@example.com': (69.93, 1), 'zed@example.com': (30, 2)})
+        self.assertEqual(self.reports(), [])
+        with self.assertRaises(batch_scoring.ScoringInProgress):
+            cache.add(batch_scoring.RUNNING_KEY, 1)
+            batch_scoring.run(self.checkpoint)
+
+
+if __name__ == '__main__':
+    unittest.main()
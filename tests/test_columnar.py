@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app import create_app
+from columnar import SCHEMAS, ColumnarSheet, get_columns
+from finance import calculate_running_balance, generate_insights
+import shared_cache
+from shared_cache import cache, publish_invalidation
+
+EMAIL = 'ada@example.com'
+EXPENSES = [
+    {'ID': 'e1', 'User Email': EMAIL, 'Amount': 300, 'Category': 'Food and Groceries', 'Date': '2026-10-03', 'Description': 'Market', 'Timestamp': ''},
+    {'ID': 'e2', 'User Email': 'bob@example.com', 'Amount': 50, 'Category': 'Transport', 'Date': '2026-10-01', 'Description': 'Bus', 'Timestamp': ''},
+    {'ID': 'e3', 'User Email': EMAIL, 'Amount': '100.5', 'Category': 'Transport', 'Date': '2026-10-01', 'Description': 'Taxi', 'Timestamp': ''},
+    {'ID': 'e4', 'User Email': EMAIL, 'Amount': 20, 'Category': 'Food and Groceries', 'Date': '2026-10-02', 'Description': 'Bread', 'Timestamp': ''},
+]
+
+
+class TestColumnarSheet(unittest.TestCase):
+    def test_columns_and_user_offsets(self):
+        columns = ColumnarSheet(EXPENSES, SCHEMAS['expense_tracker'], 'Date')
+        self.assertEqual(columns.columns['Amount'].typecode, 'd')
+        self.assertEqual(columns.columns['Date'].typecode, 'i')
+        self.assertEqual(columns.labels['Category'], ['Food and Groceries', 'Transport'])
+        self.assertEqual(list(columns.rows_for(EMAIL)), [2, 3, 0])
+        self.assertEqual(list(columns.rows_for('nobody@example.com')), [])
+        self.assertEqual(columns.row(2)['Amount'], 100.5)
+        self.assertEqual(columns.row(2)['Date'], '2026-10-01')
+        self.assertEqual(columns.numpy('Amount').sum(), 470.5)
+
+
+class TestColumnarFinance(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        cache.clear()
+        self.worksheet = MagicMock(title='ExpenseTracker')
+        headers = list(SCHEMAS['expense_tracker'])
+        self.worksheet.get_all_values.return_value = [headers] + [[str(e[name]) for name in headers] for e in EXPENSES]
+        patcher = patch('sheets.ensure_sheet_and_headers', return_value=self.worksheet)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_running_balance_and_insights(self):
+        rows, balance = calculate_running_balance(EMAIL)
+        self.assertEqual([r['ID'] for r in rows], ['e3', 'e4', 'e1'])
+        self.assertEqual([r['Running Balance'] for r in rows], [-100.5, -120.5, -420.5])
+        self.assertEqual(balance, -420.5)
+        insights = generate_insights(EMAIL)
+        self.assertIn('You spent 76.1% of your expenses on Food and Groceries', insights[0])
+        self.assertEqual(len(insights), 2)
+
+    def test_built_once_per_generation(self):
+        first = get_columns('expense_tracker')
+        self.assertIs(get_columns('expense_tracker'), first)
+        publish_invalidation('ExpenseTracker', EMAIL)
+        self.assertIsNot(get_columns('expense_tracker'), first)
+
+    def test_records_are_not_cached_alongside(self):
+        shared_cache._local_generations.clear()
+        columns = get_columns('expense_tracker')
+        self.assertEqual(columns.row(2), EXPENSES[2] | {'Amount': 100.5})
+        self.worksheet.get_all_records.assert_not_called()
+        self.assertEqual(shared_cache._local_generations.keys(), {('columns', 'ExpenseTracker')})
+
+
+if __name__ == '__main__':
+    unittest.main()
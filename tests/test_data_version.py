@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app import create_app, SHEET_NAMES
+from shared_cache import bump_data_version, cache, get_data_version
+
+
+class TestConditionalDataPages(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user_email'] = 'ada@example.com'
+        self.worksheet = MagicMock()
+        self.worksheet.get_all_records.return_value = [
+            {'ID': '1', 'User Email': 'ada@example.com', 'Bill Name': 'Rent', 'Amount': 100, 'Due Date': '2026-11-01', 'Status': 'Pending', 'Timestamp': ''}
+        ]
+        patchers = [
+            patch('sheets.ensure_sheet_and_headers', return_value=self.worksheet),
+            patch('app.render_template', return_value='<html>bills</html>'),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_versions_only_increase(self):
+        with self.app.app_context():
+            first = get_data_version('BillPlanner', 'ada@example.com')
+            second = bump_data_version('BillPlanner', 'ada@example.com')
+            third = bump_data_version('BillPlanner', 'ada@example.com')
+        self.assertLess(first, second)
+        self.assertLess(second // 1_000_000, third // 1_000_000)
+
+    def test_lost_version_is_reseeded_above_what_clients_saw(self):
+        with self.app.app_context():
+            # A burst of bumps runs the version seconds ahead of the clock
+            for _ in range(5):
+                seen = bump_data_version('BillPlanner', 'ada@example.com')
+            cache.delete('data_version:BillPlanner:ada@example.com')
+            reseeded = get_data_version('BillPlanner', 'ada@example.com')
+        self.assertLess(seen // 1_000_000, reseeded // 1_000_000)
+
+    def test_unchanged_data_is_answered_with_304_without_touching_sheets(self):
+        response = self.client.get('/bill_planner')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response.headers)
+        self.worksheet.get_all_records.reset_mock()
+        cached = self.client.get('/bill_planner', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(cached.status_code, 304)
+        self.worksheet.get_all_records.assert_not_called()
+
+    def test_dashboard_is_not_answered_from_a_stale_etag(self):
+        response = self.client.get('/dashboard?health_score=60')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+        self.assertEqual(self.client.get('/dashboard?health_score=60', headers={'If-None-Match': '*'}).status_code, 200)
+
+    def test_write_invalidates_etag(self):
+        etag = self.client.get('/bill_planner').headers['ETag']
+        with self.app.app_context():
+            bump_data_version(SHEET_NAMES['bill_planner'], 'ada@example.com')
+        response = self.client.get('/bill_planner', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_if_modified_since(self):
+        response = self.client.get('/bill_planner')
+        cached = self.client.get('/bill_planner', headers={'If-Modified-Since': response.headers['Last-Modified']})
+        self.assertEqual(cached.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
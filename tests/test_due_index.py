@@ -0,0 +1,110 @@
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from app import create_app
+import due_index
+from shared_cache import LeaseTimeout, cache
+
+EMAIL = 'ada@example.com'
+SHEETS = {
+    'bill_planner': [
+        {'ID': 'b1', 'User Email': EMAIL, 'Bill Name': 'Water', 'Amount': 10, 'Due Date': '2026-10-25', 'Status': 'Pending'},
+        {'ID': 'b2', 'User Email': EMAIL, 'Bill Name': 'Gym', 'Amount': 20, 'Due Date': '2026-10-01', 'Status': 'Pending'},
+        {'ID': 'b3', 'User Email': EMAIL, 'Bill Name': 'Phone', 'Amount': 5, 'Due Date': '2026-10-05', 'Status': 'Paid'},
+        {'ID': 'b4', 'User Email': 'bob@example.com', 'Bill Name': 'Rent', 'Amount': 90, 'Due Date': '2026-10-20', 'Status': 'Pending'},
+        {'ID': 'r1@2026-09-20', 'User Email': EMAIL, 'Bill Name': 'Internet', 'Amount': 15, 'Due Date': '2026-09-20', 'Status': 'Paid'},
+        {'ID': 'r1@2026-10-20', 'User Email': EMAIL, 'Bill Name': 'Internet', 'Amount': 15, 'Due Date': '2026-10-20', 'Status': 'Paid'},
+        {'ID': 'r1@2026-12-20', 'User Email': EMAIL, 'Bill Name': 'Internet', 'Amount': 15, 'Due Date': '2026-12-20', 'Status': 'Paid'},
+    ],
+    'bill_recurrence': [
+        {'ID': 'r1', 'User Email': EMAIL, 'Bill Name': 'Internet', 'Amount': 15, 'Start Date': '2026-09-20', 'Frequency': 'Monthly', 'Interval': 1, 'End Date': '', 'Timestamp': ''},
+    ],
+}
+
+
+class TestDueIndex(unittest.TestCase):
+    def test_next_for_walks_the_heap_and_skips_stale_items(self):
+        index = due_index.DueIndex()
+        for day in range(28, 0, -1):
+            index.upsert(f'b{day}', f'2026-11-{day:02d}', EMAIL, 'Bill', day)
+        index.upsert('other', '2026-10-01', 'bob@example.com', 'Bill', 1)
+        index.upsert('b1', '2026-12-01', EMAIL, 'Bill', 1)
+        index.remove('b2')
+        self.assertEqual([b['id'] for b in index.next_for(EMAIL, 3)], ['b3', 'b4', 'b5'])
+
+    def test_pop_due_reminds_each_entry_once(self):
+        index = due_index.DueIndex()
+        index.upsert('a', '2026-10-20', EMAIL, 'A', 1)
+        index.upsert('b', '2026-10-22', EMAIL, 'B', 1)
+        index.upsert('c', '2026-11-22', EMAIL, 'C', 1)
+        self.assertEqual(index.pop_due('2026-10-31', 10), ['a', 'b'])
+        self.assertEqual(index.pop_due('2026-10-31', 10), [])
+        self.assertEqual(len(index.next_for(EMAIL, 10)), 3)
+
+
+class TestSharedDueIndex(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        cache.clear()
+        due_index._local.update(version=None, index=None)
+        patcher = patch('due_index.get_sheet_records', side_effect=lambda key: SHEETS[key])
+        self.records = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_built_once_then_updated_incrementally(self):
+        with patch('due_index.date') as fake_date:
+            fake_date.today.return_value = date(2026, 10, 19)
+            self.assertEqual([b['id'] for b in due_index.next_bills(EMAIL, 3)], ['b2', 'b1', 'r1@2026-11-20'])
+        self.assertEqual(self.records.call_count, 2)
+        due_index.track_bill({'ID': 'b9', 'User Email': EMAIL, 'Bill Name': 'Fees', 'Amount': 3, 'Due Date': '2026-09-01', 'Status': 'Pending'})
+        due_index.mark_paid('b2')
+        due_index.mark_paid('r1@2026-11-20')
+        self.assertEqual([b['id'] for b in due_index.next_bills(EMAIL, 3)], ['b9', 'b1', 'r1@2027-01-20'])
+        self.assertEqual(self.records.call_count, 2)
+
+    def test_sweep_enqueues_batches_and_advances_rules(self):
+        with patch('due_index.date') as fake_date:
+            fake_date.today.return_value = date(2026, 10, 19)
+            due_index.get_index()
+        queued = due_index.sweep(today=date(2026, 11, 18), lead_days=3, batch_size=2)
+        batches = [cache.get(f'reminders:{position}')['reminders'] for position in queued]
+        self.assertEqual([[b['id'] for b in batch] for batch in batches], [['b2', 'b4'], ['b1', 'r1@2026-11-20']])
+        self.assertEqual(due_index.sweep(today=date(2026, 11, 18), lead_days=3), [])
+        self.assertEqual(due_index.next_bills(EMAIL, 5)[-1]['id'], 'r1@2027-01-20')
+
+    def test_rebuilt_index_does_not_remind_again(self):
+        with patch('due_index.date') as fake_date:
+            fake_date.today.return_value = date(2026, 11, 18)
+            self.assertEqual(len(due_index.sweep(lead_days=3)), 1)
+            cache.delete(due_index.INDEX_KEY)
+            due_index._local.update(version=None, index=None)
+            self.assertEqual(due_index.sweep(lead_days=3), [])
+            self.assertEqual([b['id'] for b in due_index.next_bills(EMAIL, 5)], ['b2', 'b1', 'r1@2027-01-20'])
+            fake_date.today.return_value = date(2027, 1, 18)
+            queued = due_index.sweep(lead_days=3)
+        self.assertEqual([b['id'] for b in cache.get(f'reminders:{queued[0]}')['reminders']], ['r1@2027-01-20'])
+
+    def test_sweep_on_an_empty_cache_builds_the_index(self):
+        with patch('due_index.date') as fake_date:
+            fake_date.today.return_value = date(2026, 10, 19)
+            queued = due_index.sweep(lead_days=3)
+        self.assertEqual([b['id'] for b in cache.get(f'reminders:{queued[0]}')['reminders']], ['b2', 'b4'])
+
+    def test_write_that_misses_the_lease_marks_the_index_stale(self):
+        with patch('due_index.date') as fake_date:
+            fake_date.today.return_value = date(2026, 10, 19)
+            due_index.get_index()
+            SHEETS['bill_planner'].append({'ID': 'b9', 'User Email': EMAIL, 'Bill Name': 'Fees', 'Amount': 3, 'Due Date': '2026-09-01', 'Status': 'Pending'})
+            self.addCleanup(SHEETS['bill_planner'].pop)
+            with patch('due_index.lease', side_effect=LeaseTimeout('due_index')):
+                due_index.track_bill(SHEETS['bill_planner'][-1])
+            self.assertEqual(due_index.next_bills(EMAIL, 1)[0]['id'], 'b9')
+        self.assertEqual(self.records.call_count, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import re
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app import create_app
+
+EXPENSE = {'amount': '2500', 'category': 'Transport', 'date': '2026-10-01', 'description': 'bus fare'}
+
+
+class TestIdempotentSubmissions(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache', 'WTF_CSRF_ENABLED': False})
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user_email'] = 'ada@example.com'
+        patchers = [
+            patch('app.ensure_sheet_and_headers', return_value=MagicMock(title='ExpenseTracker')),
+            patch('app.append_row'),
+        ]
+        self.append_row = patchers[1].start()
+        patchers[0].start()
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def post(self, **extra):
+        return self.client.post('/expense_submit', data=dict(EXPENSE, **extra))
+
+    def test_repeated_submission_is_replayed_without_writing(self):
+        first = self.post(idempotency_key='k1')
+        second = self.post(idempotency_key='k1')
+        self.assertEqual(self.append_row.call_count, 1)
+        self.assertEqual(second.status_code, first.status_code)
+        self.assertEqual(second.location, first.location)
+        with self.client.session_transaction() as sess:
+            self.assertEqual(len(sess['_flashes']), 2)
+
+    def test_new_key_or_new_payload_writes_again(self):
+        self.post(idempotency_key='k1')
+        self.post(idempotency_key='k2')
+        self.post(idempotency_key='k2', amount='3000')
+        self.assertEqual(self.append_row.call_count, 3)
+
+    def test_submissions_without_key_are_not_deduplicated(self):
+        self.post()
+        self.post()
+        self.assertEqual(self.append_row.call_count, 2)
+
+    def test_cached_form_pages_get_a_fresh_key_per_request(self):
+        keys = []
+        for _ in range(2):
+            body = self.client.get('/net_worth').get_data(as_text=True)
+            self.assertNotIn('__ficore_', body)
+            keys.append(re.search(r'name="idempotency_key" type="hidden" value="(\w+)"', body).group(1))
+        self.assertNotEqual(keys[0], keys[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from app import create_app
+import overview
+
+
+def _slow(email):
+    time.sleep(0.5)
+    return {'net_worth': 1}
+
+
+class TestOverview(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache', 'OVERVIEW_SOURCE_TIMEOUT': 0.2})
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user_email'] = 'ada@example.com'
+
+    def fake_sources(self, **overrides):
+        sources = {name: (lambda email, name=name: {'source': name}) for name in overview.SOURCES}
+        sources.update(overrides)
+        return patch.dict(overview.SOURCES, sources)
+
+    def test_sources_run_concurrently(self):
+        def sleepy(email):
+            time.sleep(0.1)
+            return {'ok': True}
+        with self.fake_sources(**{name: sleepy for name in overview.SOURCES}), self.app.app_context():
+            start = time.perf_counter()
+            result = overview.fetch_overview('ada@example.com', timeout=1)
+            elapsed = time.perf_counter() - start
+        self.assertTrue(all(r['status'] == 'ok' for r in result.values()))
+        self.assertLess(elapsed, 0.1 * len(overview.SOURCES) / 2)
+
+    def test_slow_and_failing_sources_render_partial_results(self):
+        def broken(email):
+            raise RuntimeError('quota')
+        with self.fake_sources(net_worth=_slow, quiz=broken):
+            response = self.client.get('/api/v1/overview')
+        body = response.get_json()
+        self.assertEqual(body['net_worth']['status'], 'timeout')
+        self.assertEqual(body['quiz']['status'], 'error')
+        self.assertEqual(body['budget'], {'status': 'ok', 'data': {'source': 'budget'}})
+
+    def test_overview_page_renders(self):
+        empty = {name: (lambda email: None) for name in overview.SOURCES}
+        empty['net_worth'] = _slow
+        with self.fake_sources(**empty):
+            response = self.client.get('/overview')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Temporarily unavailable', response.data)
+        self.assertIn(b'No data yet', response.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
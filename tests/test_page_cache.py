@@ -0,0 +1,79 @@
+import re
+import unittest
+from unittest.mock import patch
+
+from flask import session
+from flask_wtf.csrf import validate_csrf
+
+import app as ficore_app
+from app import create_app
+import page_cache
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.client = self.app.test_client()
+
+    def csrf_token(self, html):
+        return re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', html).group(1)
+
+    def test_form_page_is_rendered_once_and_gets_a_live_csrf_token(self):
+        with patch('app.render_template', wraps=ficore_app.render_template) as render:
+            first = self.client.get('/net_worth').get_data(as_text=True)
+            second = self.client.get('/net_worth').get_data(as_text=True)
+        self.assertEqual(render.call_count, 1)
+        self.assertNotIn(page_cache.CSRF_PLACEHOLDER, second)
+        with self.client.session_transaction() as sess:
+            raw_token = sess['csrf_token']
+        with self.app.test_request_context():
+            session['csrf_token'] = raw_token
+            validate_csrf(self.csrf_token(second))
+        self.assertEqual(re.sub(r'value="[^"]+"', '', first), re.sub(r'value="[^"]+"', '', second))
+
+    def test_if_none_match_returns_304(self):
+        response = self.client.get('/financial_health')
+        etag = response.headers['ETag']
+        self.assertEqual(response.headers['Cache-Control'], 'private, no-cache')
+        cached = self.client.get('/financial_health', headers={'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b'')
+
+    def test_cache_is_keyed_by_language(self):
+        english = self.client.get('/').headers['ETag']
+        with self.client.session_transaction() as sess:
+            sess['language'] = 'Hausa'
+        hausa = self.client.get('/')
+        self.assertNotEqual(english, hausa.headers['ETag'])
+        self.assertIn(b'lang="Hausa"', hausa.data)
+
+    def test_unread_query_parameters_share_one_entry(self):
+        with patch('app.render_template', wraps=ficore_app.render_template) as render:
+            for n in range(3):
+                self.client.get(f'/financial_health?utm_source={n}')
+        self.assertEqual(render.call_count, 1)
+
+    def test_declared_parameters_are_part_of_the_key(self):
+        flask_app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        calls = []
+
+        @page_cache.cached_page(params=('tab',))
+        def tabbed():
+            calls.append(1)
+            return 'tab'
+        flask_app.add_url_rule('/tabbed', 'tabbed', tabbed)
+        client = flask_app.test_client()
+        for query in ('tab=a&x=1', 'x=2&tab=a', 'tab=b'):
+            client.get(f'/tabbed?{query}')
+        self.assertEqual(len(calls), 2)
+
+    def test_pending_flash_messages_bypass_the_cache(self):
+        self.client.get('/quiz')
+        with self.client.session_transaction() as sess:
+            sess['_flashes'] = [('error', 'Something went wrong')]
+        response = self.client.get('/quiz')
+        self.assertNotIn('ETag', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
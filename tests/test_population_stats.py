@@ -0,0 +1,71 @@
+import random
+import statistics
+import unittest
+from unittest.mock import patch
+
+from app import create_app
+import population_stats
+
+
+class TestPopulationStats(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+
+    def test_running_moments_and_quantiles_track_the_data(self):
+        rng = random.Random(7)
+        values = [rng.gauss(50, 15) for _ in range(2000)]
+        for value in values:
+            population_stats.record('health_score', value)
+        summary = population_stats.summary('health_score')
+        self.assertEqual(summary['count'], len(values))
+        self.assertAlmostEqual(summary['mean'], statistics.fmean(values), places=6)
+        self.assertAlmostEqual(summary['stddev'], statistics.stdev(values), places=6)
+        self.assertEqual(sum(summary['histogram']['counts']), len(values))
+        for q, estimate in summary['quantiles'].items():
+            exact = statistics.quantiles(values, n=100)[round(float(q) * 100) - 1]
+            self.assertAlmostEqual(estimate, exact, delta=2.0)
+
+    def test_comparison_uses_the_most_specific_segment_with_enough_peers(self):
+        for score in range(100):
+            population_stats.record('health_score', score, {'language': 'English', 'user_type': 'Business'})
+        population_stats.record('health_score', 10, {'language': 'Hausa', 'user_type': 'Individual'})
+        business = population_stats.compare('health_score', 90, {'language': 'English', 'user_type': 'Business'})
+        self.assertEqual(business['segment'], 'language=English|user_type=Business')
+        self.assertEqual(business['count'], 100)
+        self.assertLessEqual(business['rank'], 12)
+        lonely = population_stats.compare('health_score', 90, {'language': 'Hausa', 'user_type': 'Individual'})
+        self.assertEqual(lonely['segment'], 'all')
+        self.assertEqual(lonely['count'], 101)
+
+    def test_categorical_counts(self):
+        for personality in ('Financial Guru', 'Free Spirit', 'Financial Guru'):
+            population_stats.record_category('personality', personality, {'language': 'Hausa'})
+        self.assertEqual(population_stats.summary('personality', 'language=Hausa')['counts'], {'Financial Guru': 2, 'Free Spirit': 1})
+
+    def test_rebuild_replays_the_sheets(self):
+        rows = {
+            'submissions': [{'Language': 'English', 'User Type': 'Individual', 'Income/Revenue': 1000, 'Expenses/Costs': 500, 'Debt/Loan': 0, 'Debt Interest Rate': 0}],
+            'net_worth': [{'Language': 'English', 'Net Worth': 250000}],
+            'emergency_fund': [], 'budget': [{'Language': 'Hausa', 'Monthly Income': 100, 'Savings': 20}], 'quiz': []
+        }
+        population_stats.record('net_worth', 1)
+        with patch('sheets.get_sheet_records', side_effect=lambda key: rows[key]):
+            self.assertEqual(population_stats.rebuild(), 3)
+        self.assertEqual(population_stats.summary('net_worth')['mean'], 250000)
+        self.assertEqual(population_stats.summary('health_score')['mean'], 25)
+        self.assertAlmostEqual(population_stats.summary('savings_ratio', 'language=Hausa')['mean'], 0.2)
+
+    def test_population_api(self):
+        for score in (20, 40, 60, 80):
+            population_stats.record('health_score', score)
+        body = self.app.test_client().get('/api/v1/population?metric=health_score&value=70').get_json()
+        self.assertEqual(body['summary']['count'], 4)
+        self.assertEqual(body['comparison']['rank'], 2)
+        self.assertEqual(self.app.test_client().get('/api/v1/population?metric=nope').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
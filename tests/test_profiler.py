@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from flask import render_template_string
+
+from app import create_app
+import profiler
+
+TOKEN = 'let-me-profile'
+
+
+class TestProfiler(unittest.TestCase):
+    def make_app(self, **config):
+        self.directory = tempfile.mkdtemp()
+        app = create_app(dict({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache',
+                               'PROFILE_TOKEN': TOKEN, 'PROFILE_DIR': self.directory, 'PROFILE_INTERVAL_MS': 1}, **config))
+
+        @app.route('/_slow')
+        def slow():
+            with profiler.span('sheets GET'):
+                time.sleep(0.05)
+            return render_template_string('{{ 1 + 1 }}')
+
+        @app.route('/_broken')
+        def broken():
+            with profiler.span('build page'):
+                return render_template_string('{{ 1 // 0 }}')
+
+        @app.errorhandler(ZeroDivisionError)
+        def division_error(e):
+            return 'oops', 500
+
+        return app
+
+    def events(self, filename):
+        with open(os.path.join(self.directory, filename)) as f:
+            document = json.load(f)
+        names = [frame['name'] for frame in document['shared']['frames']]
+        return [(event['type'], names[event['frame']]) for event in document['profiles'][1]['events']]
+
+    def test_token_writes_a_speedscope_profile(self):
+        client = self.make_app().test_client()
+        response = client.get('/_slow', headers={profiler.HEADER: TOKEN})
+        filename = response.headers['X-Profile-Id']
+        self.assertTrue(filename.endswith('.speedscope.json'))
+        profiler.flush()
+        with open(os.path.join(self.directory, filename)) as f:
+            document = json.load(f)
+        sampled, evented = document['profiles']
+        names = [frame['name'] for frame in document['shared']['frames']]
+        self.assertIn('[sheets GET]', names)
+        self.assertIn('slow', names)
+        self.assertGreater(len(sampled['samples']), 5)
+        self.assertEqual(len(sampled['samples']), len(sampled['weights']))
+        opened = [event for event in evented['events'] if event['type'] == 'O']
+        self.assertEqual(len(opened), len([event for event in evented['events'] if event['type'] == 'C']))
+        self.assertIn('[sheets GET]', [names[event['frame']] for event in opened])
+
+    def test_collapsed_output(self):
+        client = self.make_app(PROFILE_FORMAT='collapsed').test_client()
+        filename = client.get('/_slow', headers={profiler.HEADER: TOKEN}).headers['X-Profile-Id']
+        profiler.flush()
+        with open(os.path.join(self.directory, filename)) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(any(line.startswith('[sheets GET];') for line in lines))
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+
+    def test_unprofiled_requests(self):
+        client = self.make_app().test_client()
+        self.assertNotIn('X-Profile-Id', client.get('/_slow').headers)
+        self.assertNotIn('X-Profile-Id', client.get('/_slow', headers={profiler.HEADER: 'guess'}).headers)
+        self.assertEqual(os.listdir(self.directory), [])
+        with profiler.span('outside a request'):
+            pass
+
+    def test_retention(self):
+        client = self.make_app(PROFILE_KEEP=2, PROFILE_INTERVAL_MS=20).test_client()
+        ids = [client.get('/_slow', headers={profiler.HEADER: TOKEN}).headers['X-Profile-Id'] for _ in range(4)]
+        profiler.flush()
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(ids[-2:]))
+
+    def test_template_that_raises_closes_its_render_span(self):
+        client = self.make_app().test_client()
+        response = client.get('/_broken', headers={profiler.HEADER: TOKEN})
+        self.assertEqual(response.status_code, 500)
+        profiler.flush()
+        self.assertEqual(self.events(response.headers['X-Profile-Id']), [
+            ('O', '[build page]'), ('O', '[render None]'), ('C', '[render None]'), ('C', '[build page]'),
+        ])
+
+    def test_write_happens_off_the_request(self):
+        client = self.make_app().test_client()
+        with patch('profiler.write', side_effect=lambda *job: time.sleep(0.5)) as write:
+            started = time.perf_counter()
+            response = client.get('/_slow', headers={profiler.HEADER: TOKEN})
+            self.assertLess(time.perf_counter() - started, 0.5)
+            profiler.flush()
+        self.assertEqual(write.call_args[0][-1], response.headers['X-Profile-Id'])
+
+
+if __name__ == '__main__':
+    unittest.main()
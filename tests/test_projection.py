@@ -0,0 +1,91 @@
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from app import create_app, SHEET_NAMES
+from columnar import SCHEMAS, ColumnarSheet
+from shared_cache import bump_data_version
+import projection
+
+EMAIL = 'ada@example.com'
+ROWS = {
+    'budget': [
+        {'Email': EMAIL, 'Monthly Income': 100000, 'Housing Expenses': 30000, 'Food Expenses': 20000, 'Transport Expenses': 10000, 'Other Expenses': 5000, 'Timestamp': '2026-09-01 10:00:00'},
+        {'Email': EMAIL, 'Monthly Income': 1, 'Housing Expenses': 0, 'Food Expenses': 0, 'Transport Expenses': 0, 'Other Expenses': 0, 'Timestamp': '2026-01-01 10:00:00'},
+    ],
+    'expense_tracker': [
+        {'User Email': EMAIL, 'Amount': 9000, 'Category': 'Food and Groceries', 'Date': '2026-08-10'},
+        {'User Email': EMAIL, 'Amount': 15000, 'Category': 'Food and Groceries', 'Date': '2026-09-12'},
+        {'User Email': EMAIL, 'Amount': 99999, 'Category': 'Food and Groceries', 'Date': '2026-10-02'},
+        {'User Email': 'bob@example.com', 'Amount': 50000, 'Category': 'Transport', 'Date': '2026-09-01'},
+    ],
+    'bill_planner': [
+        {'ID': 'b1', 'User Email': EMAIL, 'Amount': 40000, 'Due Date': '2026-12-15', 'Status': 'Pending'},
+        {'ID': 'b2', 'User Email': EMAIL, 'Amount': 7000, 'Due Date': '2026-09-30', 'Status': 'Pending'},
+        {'ID': 'b3', 'User Email': EMAIL, 'Amount': 5000, 'Due Date': '2026-11-01', 'Status': 'Paid'},
+    ],
+    'bill_recurrence': [
+        {'ID': 'r1', 'User Email': EMAIL, 'Bill Name': 'Internet', 'Amount': 1000, 'Start Date': '2026-11-05', 'Frequency': 'Monthly', 'Interval': 1, 'End Date': '2027-01-31', 'Timestamp': ''},
+    ],
+    'emergency_fund': [],
+}
+
+
+class TestProjection(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        records = lambda key: [dict(r) for r in ROWS[key]]
+        patcher = patch('projection.get_sheet_records', side_effect=records)
+        self.records = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('recurrence.get_sheet_records', side_effect=records)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        expenses = ColumnarSheet(ROWS['expense_tracker'], SCHEMAS['expense_tracker'], 'Date')
+        patcher = patch('projection.get_columns', return_value=expenses)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_combines_budget_tracked_spend_and_bills(self):
+        result = projection.project(EMAIL, months=12, today=date(2026, 10, 19))
+        self.assertEqual(result['months'][:3], ['2026-10', '2026-11', '2026-12'])
+        # Food is tracked: 24,000 over the two complete months with history
+        self.assertEqual(result['expenses']['food'][0], 12000)
+        self.assertEqual(result['expense_sources']['food'], 'expense_tracker')
+        self.assertEqual(result['expenses']['housing'][0], 30000)
+        self.assertEqual(result['bills'][:5], [7000, 1000, 41000, 1000, 0])
+        self.assertEqual(result['savings'][1], 100000 - 57000 - 1000)
+        self.assertEqual(result['balance'][2], 3 * 43000 - 7000 - 42000)
+        fund = result['emergency_fund']
+        self.assertEqual(fund['target'], 6 * 57000)
+        self.assertEqual(fund['attained_month'], '2027-07')
+
+    def test_growth_rates(self):
+        result = projection.project(EMAIL, months=3, income_growth=0.1, today=date(2026, 10, 19))
+        self.assertEqual(result['income'], [100000, 110000, 121000])
+
+    def test_cached_per_data_version(self):
+        first = projection.cached_projection(EMAIL, months=6)
+        calls = self.records.call_count
+        self.assertEqual(projection.cached_projection(EMAIL, months=6), first)
+        self.assertEqual(self.records.call_count, calls)
+        bump_data_version(SHEET_NAMES['expense_tracker'], EMAIL)
+        projection.cached_projection(EMAIL, months=6)
+        self.assertGreater(self.records.call_count, calls)
+
+    def test_api(self):
+        client = self.app.test_client()
+        self.assertEqual(client.get('/api/v1/projection').status_code, 401)
+        with client.session_transaction() as sess:
+            sess['user_email'] = EMAIL
+        response = client.get('/api/v1/projection?months=24')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['balance']), 24)
+        self.assertEqual(client.get('/api/v1/projection?months=36').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
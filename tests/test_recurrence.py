@@ -0,0 +1,75 @@
+import unittest
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+from app import create_app
+import recurrence
+
+EMAIL = 'ada@example.com'
+
+
+def rule(**fields):
+    base = {'ID': 'r1', 'User Email': EMAIL, 'Bill Name': 'Rent', 'Amount': 50000, 'Start Date': '2026-01-31', 'Frequency': 'Monthly', 'Interval': 1, 'End Date': '', 'Timestamp': ''}
+    base.update(fields)
+    return base
+
+
+class TestOccurrences(unittest.TestCase):
+    def test_monthly_clamps_to_month_end(self):
+        dates = list(recurrence.occurrences(rule(), date(2026, 1, 1), date(2026, 4, 30)))
+        self.assertEqual(dates, [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30)])
+
+    def test_weekly_custom_and_end_date(self):
+        weekly = list(recurrence.occurrences(rule(**{'Start Date': '2026-10-01', 'Frequency': 'Weekly', 'Interval': 2}), date(2026, 10, 10), date(2026, 11, 30)))
+        self.assertEqual(weekly, [date(2026, 10, 15), date(2026, 10, 29), date(2026, 11, 12), date(2026, 11, 26)])
+        custom = list(recurrence.occurrences(rule(**{'Start Date': '2026-10-01', 'Frequency': 'Custom', 'Interval': 10, 'End Date': '2026-10-25'}), date(2026, 1, 1), date(2027, 1, 1)))
+        self.assertEqual(custom, [date(2026, 10, 1), date(2026, 10, 11), date(2026, 10, 21)])
+
+    def test_generation_is_lazy_over_unbounded_rules(self):
+        daily = recurrence.occurrences(rule(**{'Start Date': '1900-01-01', 'Frequency': 'Custom'}), date(2026, 10, 19), date(9999, 12, 31))
+        self.assertEqual(next(daily), date(2026, 10, 19))
+
+    def test_paid_occurrences_replace_generated_ones(self):
+        sheets = {
+            'bill_planner': [{'ID': 'r1@2026-10-31', 'User Email': EMAIL, 'Bill Name': 'Rent', 'Amount': 50000, 'Due Date': '2026-10-31', 'Status': 'Paid', 'Timestamp': ''}],
+            'bill_recurrence': [rule(), rule(**{'ID': 'r2', 'User Email': 'bob@example.com'})],
+        }
+        with patch('recurrence.get_sheet_records', side_effect=lambda key: sheets[key]):
+            bills = recurrence.user_bills(EMAIL, date(2026, 10, 1), date(2026, 12, 31))
+        self.assertEqual([(b['ID'], b['Status']) for b in bills], [('r1@2026-10-31', 'Paid'), ('r1@2026-11-30', 'Pending'), ('r1@2026-12-31', 'Pending')])
+
+
+class TestRecurringBillRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache', 'WTF_CSRF_ENABLED': False})
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user_email'] = EMAIL
+        self.worksheets = {}
+        patchers = [
+            patch('app.ensure_sheet_and_headers', side_effect=lambda name, headers: self.worksheets.setdefault(name, MagicMock(title=name))),
+            patch('app.append_row'),
+        ]
+        self.append_row = patchers[1].start()
+        patchers[0].start()
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def test_recurring_bill_is_stored_once_as_a_rule(self):
+        self.client.post('/bill_submit', data={'bill_name': 'Rent', 'amount': '50000', 'due_date': '2026-11-01', 'status': 'Pending', 'recurrence': 'Monthly', 'interval': '1'})
+        self.assertEqual(self.append_row.call_count, 1)
+        worksheet, row, email = self.append_row.call_args.args
+        self.assertEqual(worksheet.title, 'BillRecurrence')
+        self.assertEqual(row[4:7], ['2026-11-01', 'Monthly', 1])
+
+    def test_paying_an_occurrence_materializes_it(self):
+        self.worksheets['BillPlanner'] = MagicMock(title='BillPlanner', **{'get_all_records.return_value': []})
+        with patch('recurrence.get_sheet_records', return_value=[rule()]):
+            self.client.post('/bill_complete/r1@2026-02-28')
+        row = self.append_row.call_args.args[1]
+        self.assertEqual(row[0], 'r1@2026-02-28')
+        self.assertEqual(row[5], 'Paid')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app import create_app
+import schema_migration
+from schema_migration import SchemaMigrationError, migrate, plan
+from shared_cache import cache
+from sheets import ensure_sheet_and_headers
+
+
+class FakeWorksheet:
+    def __init__(self, title, values):
+        self.title = title
+        self.values = [list(row) for row in values]
+        self.col_count = max(len(row) for row in values)
+        self.updates = []
+        self.header_reads = 0
+
+    def row_values(self, row):
+        self.header_reads += 1
+        return list(self.values[row - 1])
+
+    def get_all_values(self, value_render_option=None):
+        return [list(row) for row in self.values]
+
+    def add_cols(self, cols):
+        self.col_count += cols
+
+    def update(self, values, range_name):
+        self.updates.append(range_name)
+        for offset, row in enumerate(values):
+            if offset == len(self.values):
+                self.values.append([])
+            self.values[offset] = list(row) + self.values[offset][len(row):]
+
+
+class TestPlan(unittest.TestCase):
+    def test_added_renamed_and_dropped(self):
+        migration = plan(['ID', 'Email', 'Notes', 'Amount'], ['ID', 'Amount', 'User Email', 'Category'], {'Email': 'User Email'})
+        self.assertEqual(migration.sources, [0, 3, 1, None])
+        self.assertEqual(migration.added, ['Category'])
+        self.assertEqual(migration.renamed, [('Email', 'User Email')])
+        self.assertEqual(migration.dropped, ['Notes'])
+
+
+class TestMigrate(unittest.TestCase):
+    def test_appended_columns_only_touch_the_header(self):
+        sheet = FakeWorksheet('Budget', [['ID', 'Amount'], ['1', 5]])
+        migrate(sheet, ['ID', 'Amount'], ['ID', 'Amount', 'Note'])
+        self.assertEqual(sheet.values, [['ID', 'Amount', 'Note'], ['1', 5]])
+        self.assertEqual(sheet.col_count, 3)
+
+    def test_reordered_and_renamed_columns_rewrite_once(self):
+        sheet = FakeWorksheet('Budget', [['ID', 'Email', 'Amount'], ['1', 'a@example.com', 5], ['2', 'b@example.com', 7]])
+        migrate(sheet, sheet.row_values(1), ['ID', 'Amount', 'User Email'], {'Email': 'User Email'})
+        self.assertEqual(sheet.values, [['ID', 'Amount', 'User Email'], ['1', 5, 'a@example.com'], ['2', 7, 'b@example.com']])
+        self.assertEqual(sheet.updates, ['A1'])
+
+    def test_dropping_data_needs_opt_in(self):
+        sheet = FakeWorksheet('Budget', [['ID', 'Notes', 'Amount'], ['1', 'keep me', 5]])
+        with self.assertRaises(SchemaMigrationError):
+            migrate(sheet, sheet.row_values(1), ['ID', 'Amount'])
+        self.assertEqual(sheet.values[1], ['1', 'keep me', 5])
+        migrate(sheet, sheet.row_values(1), ['ID', 'Amount'], allow_destructive=True)
+        self.assertEqual(sheet.values, [['ID', 'Amount', ''], ['1', 5, '']])
+
+
+class TestEnsureSheet(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        cache.clear()
+        schema_migration._verified.clear()
+        self.sheet = FakeWorksheet('ExpenseTracker', [['ID', 'User Email', 'Amount'], ['1', 'a@example.com', 5]])
+        client = MagicMock()
+        client.open_by_key.return_value.worksheet.return_value = self.sheet
+        patcher = patch('sheets.get_sheets_client', return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_migrates_once_then_skips_the_header_read(self):
+        headers = ['ID', 'User Email', 'Amount', 'Category']
+        ensure_sheet_and_headers('ExpenseTracker', headers)
+        # Once to notice the change, once more under the migration lease
+        self.assertEqual(self.sheet.header_reads, 2)
+        ensure_sheet_and_headers('ExpenseTracker', headers)
+        self.assertEqual(self.sheet.values, [headers, ['1', 'a@example.com', 5]])
+        self.assertEqual(self.sheet.header_reads, 2)
+
+    def test_migrates_under_the_lease(self):
+        headers = ['ID', 'Amount', 'User Email']
+        real_migrate = schema_migration.migrate
+
+        def check_lease(*args):
+            self.assertIsNotNone(cache.get('migrate:ExpenseTracker:lease'))
+            real_migrate(*args)
+        with patch('schema_migration.migrate', side_effect=check_lease) as migrate_mock:
+            ensure_sheet_and_headers('ExpenseTracker', headers)
+        migrate_mock.assert_called_once()
+        self.assertEqual(self.sheet.values, [headers, ['1', 5, 'a@example.com']])
+        self.assertIsNone(cache.get('migrate:ExpenseTracker:lease'))
+
+    def test_sheet_migrated_by_another_worker_is_left_alone(self):
+        headers = ['ID', 'Amount', 'User Email']
+        stale_read = self.sheet.row_values
+
+        def migrated_meanwhile(row):
+            # The first read sees the old layout; another worker migrates
+            # the sheet before this one takes the lease
+            values = stale_read(row)
+            self.sheet.row_values = stale_read
+            migrate(self.sheet, values, headers)
+            return values
+        self.sheet.row_values = migrated_meanwhile
+        ensure_sheet_and_headers('ExpenseTracker', headers)
+        self.assertEqual(self.sheet.values, [headers, ['1', 5, 'a@example.com']])
+        self.assertEqual(self.sheet.updates, ['A1'])
+
+    def test_destructive_change_keeps_the_data(self):
+        with self.assertRaises(SchemaMigrationError):
+            ensure_sheet_and_headers('ExpenseTracker', ['ID', 'Amount'])
+        self.assertEqual(self.sheet.values[1], ['1', 'a@example.com', 5])
+        with self.assertRaises(SchemaMigrationError):
+            ensure_sheet_and_headers('ExpenseTracker', ['ID', 'Amount'])
+
+
+if __name__ == '__main__':
+    unittest.main()
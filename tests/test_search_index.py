@@ -0,0 +1,116 @@
+import unittest
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from app import create_app
+from columnar import SCHEMAS, SORT_FIELDS, ColumnarSheet
+import recurrence
+from shared_cache import cache, publish_invalidation
+import search_index
+
+EMAIL = 'ada@example.com'
+# Recurring occurrences are listed in a window around today
+RULE_START = date.today() - timedelta(days=25)
+SHEETS = {
+    'expense_tracker': [
+        {'ID': 'e1', 'User Email': EMAIL, 'Amount': 1500, 'Category': 'Transport', 'Date': '2026-10-01', 'Description': 'Taxi to the airport', 'Timestamp': ''},
+        {'ID': 'e2', 'User Email': EMAIL, 'Amount': 800, 'Category': 'Transport', 'Date': '2026-10-03', 'Description': 'taxi ride home', 'Timestamp': ''},
+        {'ID': 'e3', 'User Email': EMAIL, 'Amount': 5000, 'Category': 'Food and Groceries', 'Date': '2026-10-04', 'Description': 'Market: rice, taxes', 'Timestamp': ''},
+        {'ID': 'e4', 'User Email': 'bob@example.com', 'Amount': 700, 'Category': 'Transport', 'Date': '2026-10-04', 'Description': 'Taxi', 'Timestamp': ''},
+    ],
+    'bill_planner': [
+        {'ID': 'b1', 'User Email': EMAIL, 'Bill Name': 'Water bill', 'Amount': 300, 'Due Date': '2026-10-25', 'Status': 'Pending', 'Timestamp': ''},
+        {'ID': 'b2', 'User Email': EMAIL, 'Bill Name': 'Electricity', 'Amount': 900, 'Due Date': '2026-10-10', 'Status': 'Paid', 'Timestamp': ''},
+    ],
+    'bill_recurrence': [
+        {'ID': 'r1', 'User Email': EMAIL, 'Bill Name': 'Internet', 'Amount': 150, 'Start Date': RULE_START.isoformat(), 'Frequency': 'Weekly', 'Interval': 2, 'End Date': '', 'Timestamp': ''},
+    ],
+}
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        cache.clear()
+        self.records = patch('columnar.load_columns', side_effect=lambda key: ColumnarSheet(SHEETS[key], SCHEMAS[key], SORT_FIELDS.get(key))).start()
+        patch('recurrence.get_sheet_records', side_effect=lambda key: SHEETS[key]).start()
+        self.addCleanup(patch.stopall)
+
+    def ids(self, kind, **params):
+        return [row['ID'] for row in search_index.search(kind, EMAIL, search_index.parse_filters(params))]
+
+    def test_prefix_terms_and_filters(self):
+        self.assertEqual(self.ids('expenses', q='taxi'), ['e2', 'e1'])
+        self.assertEqual(self.ids('expenses', q='TAX'), ['e3', 'e2', 'e1'])
+        self.assertEqual(self.ids('expenses', q='tax ho'), ['e2'])
+        self.assertEqual(self.ids('expenses', q='taxi nowhere'), [])
+        self.assertEqual(self.ids('expenses', q='tax', category='Transport', min_amount='1000'), ['e1'])
+        self.assertEqual(self.ids('expenses', start='2026-10-02', end='2026-10-03'), ['e2'])
+        with self.assertRaises(ValueError):
+            search_index.parse_filters({'start': 'yesterday'})
+
+    def test_recurring_bills_match_through_their_occurrences(self):
+        occurrences = [bill['ID'] for bill in recurrence.rule_bills(SHEETS['bill_recurrence'][0])]
+        self.assertEqual(occurrences[0], f'r1@{RULE_START.isoformat()}')
+        self.assertEqual(self.ids('bills', q='inter'), occurrences[::-1])
+        self.assertEqual(sorted(self.ids('bills', status='Pending')), sorted(occurrences + ['b1']))
+        self.assertEqual(self.ids('bills', status='Recurring'), [])
+        second = (RULE_START + timedelta(days=14)).isoformat()
+        self.assertEqual(self.ids('bills', q='internet', start=second, end=second), [f'r1@{second}'])
+        # Paying an occurrence replaces its generated row
+        since = search_index.current_version('bills', EMAIL)
+        publish_invalidation('BillPlanner', EMAIL)
+        paid = dict(recurrence.rule_bills(SHEETS['bill_recurrence'][0])[1], Status='Paid')
+        search_index.apply_change('bills', EMAIL, since, added=[paid])
+        self.assertEqual(self.ids('bills', status='Paid', q='inter'), [f'r1@{second}'])
+        self.assertNotIn(f'r1@{second}', self.ids('bills', status='Pending'))
+
+    def test_page_filtering_is_not_capped(self):
+        index = search_index.SearchIndex('Description', 'Date')
+        for n in range(250):
+            index.add({'ID': f'e{n}', 'Amount': 1, 'Category': 'Transport', 'Date': '2026-10-01', 'Description': 'Taxi'})
+        self.assertEqual(len(index.search('taxi')), 250)
+        self.assertEqual(len(index.search('taxi', limit=10)), 10)
+
+    def test_writes_patch_the_index(self):
+        self.ids('expenses', q='taxi')
+        loads = self.records.call_count
+        since = search_index.current_version('expenses', EMAIL)
+        publish_invalidation('ExpenseTracker', EMAIL)
+        search_index.apply_change('expenses', EMAIL, since, added=[
+            {'ID': 'e2', 'User Email': EMAIL, 'Amount': 900, 'Category': 'Transport', 'Date': '2026-10-03', 'Description': 'Bus home', 'Timestamp': ''},
+            {'ID': 'e5', 'User Email': EMAIL, 'Amount': 50, 'Category': 'Transport', 'Date': '2026-10-06', 'Description': 'Taxi again', 'Timestamp': ''},
+        ])
+        self.assertEqual(self.ids('expenses', q='taxi'), ['e5', 'e1'])
+        self.assertEqual(self.ids('expenses', q='bu'), ['e2'])
+        self.assertEqual(self.records.call_count, loads)
+        index = search_index.get_index('expenses', EMAIL)
+        self.assertNotIn('ride', index.vocabulary)
+        self.assertEqual(index.vocabulary, sorted(index.postings))
+
+    def test_missed_write_drops_the_index(self):
+        self.ids('expenses')
+        publish_invalidation('ExpenseTracker', EMAIL)
+        since = search_index.current_version('expenses', EMAIL)
+        publish_invalidation('ExpenseTracker', EMAIL)
+        search_index.apply_change('expenses', EMAIL, since, added=[SHEETS['expense_tracker'][0]])
+        self.assertIsNone(cache.get(search_index._key('expenses', EMAIL)))
+
+    def test_api(self):
+        client = self.app.test_client()
+        self.assertEqual(client.get('/api/v1/expenses/search?q=taxi').status_code, 401)
+        with client.session_transaction() as sess:
+            sess['user_email'] = EMAIL
+        body = client.get('/api/v1/expenses/search?q=taxi&max_amount=1000').get_json()
+        self.assertEqual(body['expenses'], [{'id': 'e2', 'amount': 800, 'category': 'Transport', 'date': '2026-10-03', 'description': 'taxi ride home'}])
+        self.assertFalse(body['truncated'])
+        body = client.get('/api/v1/bills/search?q=w').get_json()
+        self.assertEqual([bill['name'] for bill in body['bills']], ['Water bill'])
+        self.assertEqual(client.get('/api/v1/bills/search?min_amount=lots').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app import create_app
+from shared_cache import LeaseTimeout, SQLiteCache, append_row, cache, cached_records, lease
+
+
+def _increment(path, times):
+    backend = SQLiteCache(path)
+    for _ in range(times):
+        backend.inc('counter')
+
+
+class TestSQLiteCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'cache.sqlite3')
+        self.backend = SQLiteCache(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_file_is_private_to_its_owner(self):
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+        app = create_app({'TESTING': True})
+        self.assertEqual(app.config['CACHE_SQLITE_PATH'], os.path.join(app.instance_path, 'cache.sqlite3'))
+
+    def test_get_set_add_delete(self):
+        self.assertIsNone(self.backend.get('k'))
+        self.assertTrue(self.backend.add('k', {'a': 1}))
+        self.assertFalse(self.backend.add('k', {'a': 2}))
+        self.assertEqual(self.backend.get('k'), {'a': 1})
+        self.backend.set('k', [1, 2])
+        self.assertEqual(self.backend.get('k'), [1, 2])
+        self.assertTrue(self.backend.delete('k'))
+        self.assertFalse(self.backend.has('k'))
+
+    def test_expired_entries_are_misses(self):
+        self.backend.set('k', 'v', timeout=1)
+        with patch('shared_cache.time.time', return_value=time.time() + 2):
+            self.assertIsNone(self.backend.get('k'))
+            self.assertTrue(self.backend.add('k', 'w'))
+
+    def test_entries_without_timeout_survive_the_threshold(self):
+        backend = SQLiteCache(self.path, threshold=10)
+        backend.set('version', 7, timeout=0)
+        backend.inc('version')
+        for i in range(200):
+            backend.set(f'k{i}', i)
+        self.assertEqual(backend.get('version'), 8)
+        self.assertIsNone(backend.get('k0'))
+        expires = backend._connection().execute("SELECT expires FROM cache WHERE key = 'version'").fetchone()[0]
+        self.assertEqual(expires, 0)
+
+    def test_inc_is_atomic_across_processes(self):
+        workers = [multiprocessing.Process(target=_increment, args=(self.path, 50)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.backend.get('counter'), 200)
+
+
+class TestWriteInvalidation(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        config = {'TESTING': True, 'CACHE_SQLITE_PATH': os.path.join(self.tmp.name, 'cache.sqlite3')}
+        # Two app instances over one store stand in for two gunicorn workers.
+        self.worker_a, self.worker_b = create_app(config), create_app(config)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write_in_one_worker_invalidates_reads_in_another(self):
+        rows = [{'ID': '1', 'User Email': 'ada@example.com', 'Amount': 5}]
+        loader = MagicMock(side_effect=lambda: list(rows))
+        with self.worker_a.app_context():
+            self.assertEqual(len(cached_records('ExpenseTracker', loader)), 1)
+            self.assertEqual(len(cached_records('ExpenseTracker', loader)), 1)
+        self.assertEqual(loader.call_count, 1)
+
+        worksheet = MagicMock(title='ExpenseTracker')
+        with self.worker_b.app_context():
+            append_row(worksheet, ['2', 'ada@example.com', 7], 'ada@example.com')
+        rows.append({'ID': '2', 'User Email': 'ada@example.com', 'Amount': 7})
+
+        with self.worker_a.app_context():
+            self.assertEqual(len(cached_records('ExpenseTracker', loader)), 2)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_cached_records_are_copies(self):
+        with self.worker_a.app_context():
+            records = cached_records('BillPlanner', lambda: [{'Status': 'Pending'}])
+            records[0]['Status'] = 'Paid'
+            self.assertEqual(cached_records('BillPlanner', lambda: [])[0]['Status'], 'Pending')
+
+
+class TestLease(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.app = create_app({'TESTING': True, 'CACHE_SQLITE_PATH': os.path.join(self.tmp.name, 'cache.sqlite3')})
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+
+    def test_timeout_raises_without_running_the_body(self):
+        cache.add('entry:lease', 'other holder', timeout=60)
+        entered = []
+        with self.assertRaises(LeaseTimeout):
+            with lease('entry', timeout=0.05):
+                entered.append(True)
+        self.assertEqual(entered, [])
+        self.assertEqual(cache.get('entry:lease'), 'other holder')
+
+    def test_expired_lease_taken_over_is_not_released(self):
+        with lease('entry', timeout=1):
+            # Our lease expired and another worker took it
+            cache.set('entry:lease', 'other holder', timeout=60)
+        self.assertEqual(cache.get('entry:lease'), 'other holder')
+        cache.delete('entry:lease')
+        with lease('entry'):
+            self.assertIsNotNone(cache.get('entry:lease'))
+        self.assertIsNone(cache.get('entry:lease'))
+
+
+if __name__ == '__main__':
+    unittest.main()
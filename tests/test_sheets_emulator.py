@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from gspread.exceptions import APIError
+
+from app import create_app
+import schema_migration
+import sheets
+from sheets_emulator import SheetsEmulator, serve, split_range
+from shared_cache import append_row, cache
+
+
+class TestRanges(unittest.TestCase):
+    def test_split_range(self):
+        self.assertEqual(split_range("'Bill ''A'''!A2:G2"), ("Bill 'A'", (1, 0, 1, 6)))
+        self.assertEqual(split_range("'Budget'!A1:1"), ('Budget', (0, 0, 0, None)))
+        self.assertEqual(split_range("'Budget'"), ('Budget', (0, 0, None, None)))
+
+
+class TestEmulatedSheets(unittest.TestCase):
+    def setUp(self):
+        self.data_path = os.path.join(tempfile.mkdtemp(), 'sheets.json')
+        self.emulator = SheetsEmulator(data_path=self.data_path)
+        self.server = serve(self.emulator, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        patcher = patch('sheets.SHEETS_API_URL', f'http://127.0.0.1:{self.server.server_port}')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sheets._clients.__dict__.clear()
+        self.addCleanup(sheets._clients.__dict__.clear)
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        cache.clear()
+        schema_migration._verified.clear()
+
+    def test_round_trip_through_gspread(self):
+        headers = sheets.PREDETERMINED_HEADERS['BillPlanner']
+        worksheet = sheets.ensure_sheet_and_headers('BillPlanner', headers)
+        append_row(worksheet, ['b1', 'ada@example.com', 'Rent', 120.5, '2026-11-01', 'Pending', ''], 'ada@example.com')
+        append_row(worksheet, ['b2', 'ada@example.com', 'Water', 10, '2026-11-05', 'Pending', ''], 'ada@example.com')
+        worksheet.update(values=[['Paid']], range_name='F3')
+        records = sheets.get_sheet_records('bill_planner')
+        self.assertEqual([(r['ID'], r['Amount'], r['Status']) for r in records], [('b1', 120.5, 'Pending'), ('b2', 10, 'Paid')])
+        self.assertEqual(worksheet.row_values(1), headers)
+
+        self.emulator.flush()
+        reloaded = SheetsEmulator(data_path=self.data_path)
+        self.assertEqual(len(reloaded.values_get('your-spreadsheet-id', "'BillPlanner'")['values']), 3)
+
+    def test_quota_errors(self):
+        sheets.ensure_sheet_and_headers('Quiz', sheets.PREDETERMINED_HEADERS['Quiz'])
+        self.emulator.quota_per_minute = self.emulator.stats['requests']
+        with self.assertRaises(APIError) as raised:
+            sheets.ensure_sheet_and_headers('Quiz', sheets.PREDETERMINED_HEADERS['Quiz'])
+        self.assertEqual(raised.exception.response.status_code, 429)
+        self.assertGreater(self.emulator.stats['throttled'], 0)
+
+    def test_malformed_json_is_a_400(self):
+        url = f'http://127.0.0.1:{self.server.server_port}/v4/spreadsheets/your-spreadsheet-id:batchUpdate'
+        for payload in (b'{"requests": [', b'[]'):
+            with self.assertRaises(HTTPError) as raised:
+                urlopen(Request(url, data=payload, headers={'Content-Type': 'application/json'}))
+            self.assertEqual(raised.exception.code, 400)
+            error = json.loads(raised.exception.read())['error']
+            self.assertEqual((error['code'], error['status']), (400, 'INVALID_ARGUMENT'))
+        self.assertEqual(sheets.ensure_sheet_and_headers('Quiz', sheets.PREDETERMINED_HEADERS['Quiz']).title, 'Quiz')
+
+
+if __name__ == '__main__':
+    unittest.main()
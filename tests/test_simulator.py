@@ -0,0 +1,72 @@
+import json
+import random
+import unittest
+from unittest.mock import patch
+
+from app import create_app
+from finance import calculate_budget, calculate_health_score
+import simulator
+
+
+class TestSimulator(unittest.TestCase):
+    def test_grid_matches_scalar_health_score(self):
+        rng = random.Random(3)
+        params = {
+            'income_revenue': [0] + [rng.uniform(0, 500000) for _ in range(9)],
+            'expenses_costs': [rng.uniform(0, 500000) for _ in range(7)],
+            'debt_loan': {'min': 0, 'max': 1000000, 'steps': 5},
+            'debt_interest_rate': 25
+        }
+        result = simulator.simulate_health_score(params)
+        self.assertEqual(result['shape'], [10, 7, 5])
+        self.assertEqual(list(result['axes']), ['income_revenue', 'expenses_costs', 'debt_loan'])
+        for i, income in enumerate(result['axes']['income_revenue']):
+            for j, expenses in enumerate(result['axes']['expenses_costs']):
+                for k, debt in enumerate(result['axes']['debt_loan']):
+                    expected = calculate_health_score({'income_revenue': income, 'expenses_costs': expenses, 'debt_loan': debt, 'debt_interest_rate': 25})
+                    self.assertEqual(result['scores'][i][j][k], expected)
+
+    def test_budget_grid(self):
+        result = simulator.simulate_budget({'monthly_income': {'min': 0, 'max': 200000, 'steps': 3}, 'housing_expenses': 50000, 'food_expenses': [10000, 30000]})
+        self.assertEqual(result['shape'], [3, 2])
+        self.assertEqual(result['savings'][2][1], calculate_budget(200000, 50000, 30000, 0, 0)[1])
+        self.assertEqual(result['savings_ratio'][0], [0.0, 0.0])
+        self.assertEqual(result['savings_ratio'][1][0], 0.4)
+
+    def test_limits_and_bad_input(self):
+        with self.assertRaises(simulator.SimulationError):
+            simulator.simulate_health_score({'income_revenue': {'min': 0, 'max': 1, 'steps': 1000}})
+        with self.assertRaises(simulator.SimulationError):
+            simulator.simulate_health_score({name: {'min': 0, 'max': 1, 'steps': 101} for name in simulator.HEALTH_SCORE_PARAMS})
+        with self.assertRaises(simulator.SimulationError):
+            simulator.simulate_budget({'monthly_income': [-1]})
+
+    def test_endpoint_is_side_effect_free(self):
+        client = create_app({'TESTING': True, 'CACHE_TYPE': 'SimpleCache'}).test_client()
+        with patch('shared_cache.append_row') as append_row:
+            response = client.post('/api/v1/simulate/health-score', json={'income_revenue': 100000, 'expenses_costs': {'min': 0, 'max': 100000, 'steps': 3}})
+            append_row.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['scores'], [50, 25, 0])
+        bad = client.post('/api/v1/simulate/budget', json={'monthly_income': 'lots'})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_very_large_inputs(self):
+        client = create_app({'TESTING': True, 'CACHE_TYPE': 'SimpleCache'}).test_client()
+        for payload in ({'income_revenue': 1e308},
+                        {'income_revenue': [1, 1e308]},
+                        {'income_revenue': 1, 'debt_loan': {'min': 0, 'max': 1e308, 'steps': 3}},
+                        {'income_revenue': 1, 'debt_interest_rate': 101}):
+            response = client.post('/api/v1/simulate/health-score', json=payload)
+            self.assertEqual(response.status_code, 400, payload)
+        extreme = {'monthly_income': [1e-300, 1e15], 'housing_expenses': 1e15, 'food_expenses': 1e15, 'transport_expenses': 1e15, 'other_expenses': 1e15}
+        response = client.post('/api/v1/simulate/budget', json=extreme)
+        self.assertEqual(response.status_code, 200)
+        body = json.loads(response.get_data(as_text=True), parse_constant=lambda name: self.fail(f'{name} in the response'))
+        self.assertEqual(body['savings'], [-4e15, -3e15])
+        score = client.post('/api/v1/simulate/health-score', json={'income_revenue': 1e-300, 'expenses_costs': 1e15, 'debt_loan': 1e15, 'debt_interest_rate': 100})
+        self.assertEqual(score.get_json()['scores'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
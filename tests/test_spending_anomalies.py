@@ -0,0 +1,103 @@
+import unittest
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+
+from app import create_app
+from columnar import SCHEMAS
+from finance import generate_insights
+from shared_cache import cache, publish_invalidation
+import spending_anomalies
+
+EMAIL = 'ada@example.com'
+START = date(2026, 7, 1)
+
+
+def _expense(expense_id, category, day, amount, email=EMAIL):
+    return {'ID': expense_id, 'User Email': email, 'Amount': amount, 'Category': category,
+            'Date': (START + timedelta(days=day)).isoformat(), 'Description': '', 'Timestamp': ''}
+
+
+EXPENSES = (
+    [_expense(f'f{i}', 'Food and Groceries', 7 * i, amount) for i, amount in enumerate([90, 110, 100, 95, 105, 100, 98, 102, 100, 100, 96])]
+    + [_expense(f't{i}', 'Transport', 3 * i, 20) for i in range(26)]
+    + [_expense('x1', 'Food and Groceries', 70, 5000, email='bob@example.com')]
+)
+
+
+def sheet_values(records):
+    # The rows as get_all_values returns them
+    headers = list(SCHEMAS['expense_tracker'])
+    return [headers] + [[str(record.get(name, '')) for name in headers] for record in records]
+
+
+class TestSpendingAnomalies(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        cache.clear()
+        self.worksheet = MagicMock(title='ExpenseTracker')
+        self.worksheet.get_all_values.return_value = sheet_values(EXPENSES)
+        patcher = patch('sheets.ensure_sheet_and_headers', return_value=self.worksheet)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, expense, removed=None):
+        since = spending_anomalies.current_version(EMAIL)
+        publish_invalidation('ExpenseTracker', EMAIL)
+        return spending_anomalies.record(EMAIL, since, added=expense, removed=removed)
+
+    def test_steady_history_raises_nothing(self):
+        state = spending_anomalies.get_state(EMAIL)
+        self.assertEqual(state.alerts, [])
+        food = state.stats['Food and Groceries']
+        self.assertEqual(food['count'], 11)
+        self.assertAlmostEqual(food['mean'], 1096 / 11)
+        self.assertEqual(state.stats[spending_anomalies.ALL]['count'], 37)
+
+    def test_unusual_transaction(self):
+        spending_anomalies.get_state(EMAIL)
+        loads = self.worksheet.get_all_values.call_count
+        self.assertEqual(self.record(_expense('f-small', 'Food and Groceries', 78, 120)), [])
+        alerts = self.record(_expense('f-big', 'Food and Groceries', 79, 900))
+        self.assertEqual([(a['kind'], a['id']) for a in alerts], [('transaction', 'f-big')])
+        self.assertEqual(self.worksheet.get_all_values.call_count, loads)
+        self.assertEqual(spending_anomalies.message(alerts[0]),
+                         'Unusual expense: ₦900.00 on Food and Groceries is well above your usual ₦101.33.')
+        self.assertIn('Abinci da Kayayyakin Abinci', spending_anomalies.message(alerts[0], 'Hausa'))
+
+    def test_spike_is_flagged_once(self):
+        spending_anomalies.get_state(EMAIL)
+        kinds = []
+        for i in range(4):
+            kinds += [(a['kind'], a['category']) for a in self.record(_expense(f'burst{i}', 'Transport', 76, 40))]
+        self.assertEqual(kinds.count(('spike', 'Transport')), 1)
+        self.assertNotIn(('transaction', 'Transport'), kinds)
+        insights = generate_insights(EMAIL, today=START + timedelta(days=80))
+        self.assertIn('Spending spike on Transport', insights[0])
+        self.assertTrue(generate_insights(EMAIL, today=START + timedelta(days=80), language='Hausa')[0].startswith('Hauhawar kashe kuɗi akan Sufuri'))
+        self.assertFalse(any('Spending spike' in insight for insight in generate_insights(EMAIL, today=START + timedelta(days=120))))
+
+    def test_edit_reverses_the_old_row(self):
+        before = spending_anomalies.get_state(EMAIL).stats['Food and Groceries'].copy()
+        self.record(_expense('f-big', 'Food and Groceries', 79, 900))
+        self.record(_expense('f-big', 'Food and Groceries', 79, 100), removed=_expense('f-big', 'Food and Groceries', 79, 900))
+        state = spending_anomalies.get_state(EMAIL)
+        self.assertEqual(state.alerts, [])
+        food = state.stats['Food and Groceries']
+        self.assertEqual(food['count'], before['count'] + 1)
+        self.assertAlmostEqual(food['mean'], (1096 + 100) / 12)
+
+    def test_missed_write_drops_the_state(self):
+        spending_anomalies.get_state(EMAIL)
+        publish_invalidation('ExpenseTracker', EMAIL)
+        self.worksheet.get_all_values.return_value = sheet_values(EXPENSES + [_expense('f-big', 'Food and Groceries', 79, 900)])
+        self.assertEqual(self.record(_expense('f-big', 'Food and Groceries', 79, 900)), [])
+        self.assertIsNone(cache.get(spending_anomalies._key(EMAIL)))
+        insights = generate_insights(EMAIL, today=START + timedelta(days=80))
+        self.assertTrue(insights[0].startswith('Unusual expense: ₦900.00 on Food and Groceries'))
+
+
+if __name__ == '__main__':
+    unittest.main()
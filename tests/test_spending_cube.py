@@ -0,0 +1,93 @@
+import unittest
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+from app import create_app
+from columnar import SCHEMAS
+from finance import generate_insights
+from shared_cache import cache, publish_invalidation
+import spending_cube
+
+EMAIL = 'ada@example.com'
+EXPENSES = [
+    {'ID': 'e1', 'User Email': EMAIL, 'Amount': 100, 'Category': 'Food and Groceries', 'Date': '2026-09-05', 'Description': '', 'Timestamp': ''},
+    {'ID': 'e2', 'User Email': EMAIL, 'Amount': 40, 'Category': 'Transport', 'Date': '2026-09-28', 'Description': '', 'Timestamp': ''},
+    {'ID': 'e3', 'User Email': EMAIL, 'Amount': 250, 'Category': 'Food and Groceries', 'Date': '2026-10-03', 'Description': '', 'Timestamp': ''},
+    {'ID': 'e4', 'User Email': 'bob@example.com', 'Amount': 999, 'Category': 'Food and Groceries', 'Date': '2026-10-03', 'Description': '', 'Timestamp': ''},
+    {'ID': 'e5', 'User Email': EMAIL, 'Amount': 10, 'Category': 'Transport', 'Date': '2026-10-06', 'Description': '', 'Timestamp': ''},
+]
+
+
+def sheet_values(records):
+    # The rows as get_all_values returns them
+    headers = list(SCHEMAS['expense_tracker'])
+    return [headers] + [[str(record.get(name, '')) for name in headers] for record in records]
+
+
+class TestSpendingCube(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        cache.clear()
+        self.worksheet = MagicMock(title='ExpenseTracker')
+        self.worksheet.get_all_values.return_value = sheet_values(EXPENSES)
+        patcher = patch('sheets.ensure_sheet_and_headers', return_value=self.worksheet)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_range_totals_match_a_scan(self):
+        cube = spending_cube.get_cube(EMAIL)
+        windows = [(date(2026, 9, 1), date(2026, 9, 30)), (date(2026, 9, 5), date(2026, 10, 3)), (date(2026, 10, 4), date(2027, 1, 1)), (date(2025, 1, 1), date(2026, 9, 4))]
+        for start, end in windows:
+            for category in (None, 'Food and Groceries', 'Transport', 'Housing'):
+                expected = sum(e['Amount'] for e in EXPENSES if e['User Email'] == EMAIL and start.isoformat() <= e['Date'] <= end.isoformat() and category in (None, e['Category']))
+                self.assertEqual(cube.total(start, end, category), expected)
+        self.assertEqual(cube.total(), 400)
+        series = cube.series(date(2026, 9, 20), date(2026, 10, 10), 'week')
+        self.assertEqual([(b['start'], b['total']) for b in series], [('2026-09-20', 0), ('2026-09-21', 0), ('2026-09-28', 290), ('2026-10-05', 10)])
+
+    def test_writes_patch_the_cached_cube(self):
+        spending_cube.get_cube(EMAIL)
+        loads = self.worksheet.get_all_values.call_count
+        since = spending_cube.current_version(EMAIL)
+        publish_invalidation('ExpenseTracker', EMAIL)
+        spending_cube.apply_change(EMAIL, since, added={'Category': 'Housing', 'Date': '2026-08-01', 'Amount': 500})
+        since = spending_cube.current_version(EMAIL)
+        publish_invalidation('ExpenseTracker', EMAIL)
+        spending_cube.apply_change(EMAIL, since, added={'Category': 'Transport', 'Date': '2026-10-06', 'Amount': 30}, removed=EXPENSES[4])
+        cube = spending_cube.get_cube(EMAIL)
+        self.assertEqual(self.worksheet.get_all_values.call_count, loads)
+        self.assertEqual(cube.total(date(2026, 8, 1), date(2026, 8, 31)), 500)
+        self.assertEqual(cube.total(category='Transport'), 70)
+
+    def test_missed_write_drops_the_cube(self):
+        spending_cube.get_cube(EMAIL)
+        since = spending_cube.current_version(EMAIL)
+        publish_invalidation('ExpenseTracker', EMAIL)
+        publish_invalidation('ExpenseTracker', EMAIL)
+        spending_cube.apply_change(EMAIL, spending_cube.current_version(EMAIL), added={'Category': 'Housing', 'Date': '2026-08-01', 'Amount': 500})
+        self.assertIsNone(cache.get(spending_cube._key(EMAIL)))
+        self.assertNotEqual(since, spending_cube.current_version(EMAIL))
+        self.assertEqual(spending_cube.get_cube(EMAIL).total(), 400)
+
+    def test_month_over_month_insights(self):
+        insights = generate_insights(EMAIL, today=date(2026, 10, 10))
+        self.assertIn('You have spent 150% more on Food and Groceries this month than by this point last month.', insights)
+        self.assertFalse(any('Transport this month' in insight for insight in insights))
+
+    def test_api(self):
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_email'] = EMAIL
+        body = client.get('/api/v1/spending?start=2026-09-01&end=2026-10-31&category=Transport').get_json()
+        self.assertEqual(body['total'], 50)
+        self.assertEqual(body['by_category'], {'Food and Groceries': 350, 'Transport': 50})
+        self.assertEqual([b['total'] for b in body['series']], [40, 10])
+        self.assertEqual(client.get('/api/v1/spending?bucket=year').status_code, 400)
+        self.assertEqual(client.get('/api/v1/spending?start=2026-10-02&end=2026-10-01').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_BUDGET_SECONDS = 1.0
+
+PROBE = '''
+import sys, time
+start = time.perf_counter()
+import app
+app.create_app()
+elapsed = time.perf_counter() - start
+heavy = [m for m in ('gspread', 'oauth2client', 'dateutil', 'pandas', 'plotly', 'reportlab') if m in sys.modules]
+print(elapsed)
+print(','.join(heavy))
+'''
+
+
+class TestStartup(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The first import may build the asset manifest; a deploy does that
+        # once, so warm it before measuring.
+        subprocess.run([sys.executable, '-c', 'import app'], cwd=ROOT, check=True, capture_output=True)
+
+    def run_probe(self):
+        result = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, check=True, capture_output=True, text=True)
+        elapsed, heavy = result.stdout.splitlines()[-2:]
+        return float(elapsed), [m for m in heavy.split(',') if m]
+
+    def test_import_and_factory_within_budget(self):
+        elapsed = min(self.run_probe()[0] for _ in range(3))
+        self.assertLess(elapsed, STARTUP_BUDGET_SECONDS)
+
+    def test_sheets_and_date_parsing_stacks_are_lazy(self):
+        self.assertEqual(self.run_probe()[1], [])
+
+    def test_create_app_returns_independent_instances(self):
+        sys.path.insert(0, ROOT)
+        from app import create_app
+        first, second = create_app({'TESTING': True}), create_app()
+        self.assertIsNot(first, second)
+        self.assertTrue(first.testing)
+        self.assertEqual(sorted(r.endpoint for r in first.url_map.iter_rules()), sorted(r.endpoint for r in second.url_map.iter_rules()))
+
+
+if __name__ == '__main__':
+    unittest.main()
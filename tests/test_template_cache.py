@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from flask import Flask, render_template
+
+import template_cache
+
+
+class TestTemplateCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        root = self.tmp.name
+        os.makedirs(os.path.join(root, 'templates'))
+        with open(os.path.join(root, 'templates', 'base.html'), 'w') as f:
+            f.write('<title>{% block title %}{% endblock %}</title>')
+        with open(os.path.join(root, 'templates', 'page.html'), 'w') as f:
+            f.write("{% extends 'base.html' %}{% block title %}{{ translations['Welcome'] }}{% endblock %}")
+        with open(os.path.join(root, 'templates', 'broken.html'), 'w') as f:
+            f.write('{{ amount|no_such_filter }}')
+        self.root = root
+
+    def create_app(self):
+        app = Flask(__name__, root_path=self.root, template_folder='templates')
+        app.config['TEMPLATE_CACHE_DIR'] = os.path.join(self.root, 'build', 'templates')
+        template_cache.init_app(app)
+        return app
+
+    def test_warm_up_compiles_before_the_first_render(self):
+        app = self.create_app()
+        report = app.extensions['template_warmup']
+        self.assertEqual(sorted(report['templates']), ['base.html', 'page.html'])
+        self.assertEqual(report['cached'], [])
+        self.assertIn('no_such_filter', report['errors']['broken.html'])
+        with patch.object(app.jinja_env, 'compile', side_effect=AssertionError('compiled on first render')):
+            with app.test_request_context():
+                self.assertEqual(render_template('page.html', translations={'Welcome': 'Barka da Zuwa'}), '<title>Barka da Zuwa</title>')
+
+    def test_restarted_worker_loads_bytecode(self):
+        self.create_app()
+        app = self.create_app()
+        self.assertEqual(sorted(app.extensions['template_warmup']['cached']), ['base.html', 'page.html'])
+        lines = template_cache.report_lines(app.extensions['template_warmup'])
+        self.assertTrue(lines[0].startswith('Loaded 2 templates in'))
+        self.assertTrue(lines[0].endswith('(2 from the bytecode cache)'))
+        self.assertTrue(lines[-1].startswith('broken.html does not compile'))
+
+    def test_edited_template_is_recompiled(self):
+        self.create_app()
+        with open(os.path.join(self.root, 'templates', 'base.html'), 'w') as f:
+            f.write('<h1>{% block title %}{% endblock %}</h1>')
+        app = self.create_app()
+        self.assertEqual(app.extensions['template_warmup']['cached'], ['page.html'])
+        with app.test_request_context():
+            self.assertEqual(render_template('page.html', translations={'Welcome': 'Welcome'}), '<h1>Welcome</h1>')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import gettext
+import os
+import tempfile
+import unittest
+
+from app import create_app
+import translation_catalogs
+from translation_catalogs import Catalogs, catalogs
+
+SOURCE = '''translations = {
+    'English': {
+        'Welcome': 'Welcome',
+        'Saved': 'Saved {amount:,.2f}',
+        'Only English': 'Only in English',
+    },
+    'Hausa': {
+        'Welcome': 'Barka da Zuwa',
+        'Saved': 'An ajiye {amount:,.2f}',
+    }
+}
+'''
+
+
+class TestTranslationCatalogs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.source = os.path.join(self.tmp.name, 'translations.py')
+        with open(self.source, 'w', encoding='utf-8') as f:
+            f.write(SOURCE)
+        self.build_dir = os.path.join(self.tmp.name, 'build')
+        self.catalogs = Catalogs(self.build_dir, self.source)
+
+    def test_fallbacks_are_compiled_in(self):
+        hausa = self.catalogs['Hausa']
+        self.assertEqual(hausa['Welcome'], 'Barka da Zuwa')
+        self.assertEqual(hausa['Only English'], 'Only in English')
+        self.assertEqual(hausa['Saved'].format(amount=1500), 'An ajiye 1,500.00')
+        self.assertEqual(hausa['Missing everywhere'], 'Missing everywhere')
+        self.assertEqual(hausa.get('Missing everywhere', 'x'), 'x')
+        self.assertEqual(len(hausa), 3)
+        self.assertIs(self.catalogs['French'], self.catalogs['English'])
+        self.assertEqual(self.catalogs.manifest()['languages']['Hausa']['fallbacks'], 1)
+
+    def test_catalogs_are_standard_mo_files(self):
+        self.catalogs.manifest()
+        with open(os.path.join(self.build_dir, 'Hausa.mo'), 'rb') as f:
+            compiled = gettext.GNUTranslations(f)
+        self.assertEqual(compiled.gettext('Welcome'), 'Barka da Zuwa')
+        self.assertEqual(compiled.gettext('Only English'), 'Only in English')
+
+    def test_recompiles_only_when_the_source_changes(self):
+        first = self.catalogs.manifest()
+        self.assertEqual(translation_catalogs.load_manifest(self.build_dir, self.source), first)
+        with open(self.source, 'w', encoding='utf-8') as f:
+            f.write(SOURCE.replace('Barka da Zuwa', 'Sannu'))
+        self.assertNotEqual(translation_catalogs.load_manifest(self.build_dir, self.source)['signature'], first['signature'])
+        self.assertEqual(Catalogs(self.build_dir, self.source)['Hausa']['Welcome'], 'Sannu')
+
+    def test_every_language_covers_english(self):
+        create_app({'TESTING': True})
+        english = set(catalogs['English'].keys())
+        for language in catalogs.languages():
+            self.assertEqual(set(catalogs[language].keys()), english)
+
+    def test_unknown_session_language_renders(self):
+        app = create_app({'TESTING': True, 'SESSION_COOKIE_SECURE': False, 'CACHE_TYPE': 'SimpleCache'})
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['language'] = 'French'
+        response = client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(catalogs['English']['Unlock Your Financial Freedom'], response.get_data(as_text=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
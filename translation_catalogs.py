@@ -0,0 +1,220 @@
+import ast
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+
+# Compiled translation catalogs. translations.py stays the source translators
+# edit; it is compiled into one GNU .mo file per language, with every key a
+# language lacks filled in from its fallback chain (ending in English) at
+# compile time. Catalogs are memory-mapped on first use, so forked workers
+# share the same pages instead of each holding the nested dict, and a lookup
+# is a binary search over the sorted keys of the mapping. A key missing from
+# every catalog comes back unchanged rather than raising.
+#
+#   flask compile-translations
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'translations.py')
+DEFAULT_BUILD_DIR = os.path.join(os.path.dirname(SOURCE), 'build', 'translations')
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_LANGUAGE = 'English'
+# Languages tried, in order, for keys a language does not translate
+FALLBACKS = {}
+MO_MAGIC = 0x950412de
+MO_HEADER = 'Content-Type: text/plain; charset=UTF-8\n'
+
+
+def fallback_chain(language):
+    chain = [language] + list(FALLBACKS.get(language, ()))
+    if DEFAULT_LANGUAGE not in chain:
+        chain.append(DEFAULT_LANGUAGE)
+    return chain
+
+
+def load_source(path=SOURCE):
+    # Read the dict literal without importing the module, so compiling does
+    # not leave the nested dict behind in the process
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(target, 'id', None) == 'translations' for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f'{path} does not define translations')
+
+
+def _signature(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def encode_mo(strings):
+    # Little-endian GNU .mo without a hash table: header, the sorted original
+    # strings' (length, offset) table, the translations' table, then the data
+    entries = sorted((key.encode('utf-8'), value.encode('utf-8')) for key, value in strings.items())
+    entries.insert(0, (b'', MO_HEADER.encode('utf-8')))
+    count = len(entries)
+    originals_at = 28
+    translations_at = originals_at + 8 * count
+    data_at = translations_at + 8 * count
+    tables, data = [b'', b''], bytearray()
+    for column in (0, 1):
+        for entry in entries:
+            tables[column] += struct.pack('<II', len(entry[column]), data_at + len(data))
+            data += entry[column] + b'\0'
+    header = struct.pack('<7I', MO_MAGIC, 0, count, originals_at, translations_at, 0, data_at)
+    return header + tables[0] + tables[1] + bytes(data)
+
+
+def _write(path, content):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def compile_catalogs(build_dir, source=SOURCE):
+    translations = load_source(source)
+    os.makedirs(build_dir, exist_ok=True)
+    languages = {}
+    for language in translations:
+        strings = {}
+        for fallback in reversed(fallback_chain(language)):
+            strings.update(translations.get(fallback, {}))
+        filename = f'{language}.mo'
+        _write(os.path.join(build_dir, filename), encode_mo(strings))
+        languages[language] = {'file': filename, 'keys': len(strings), 'fallbacks': len(strings) - len(translations[language])}
+    manifest = {'signature': _signature(source), 'languages': languages}
+    _write(os.path.join(build_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def load_manifest(build_dir, source=SOURCE):
+    # Reuse the previous compile while translations.py is unchanged
+    try:
+        with open(os.path.join(build_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('signature') == _signature(source):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return compile_catalogs(build_dir, source)
+
+
+class Catalog:
+    # Read-only view of one compiled .mo file
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, _, self._count, self._originals, self._translations = struct.unpack_from('<5I', self._map)
+        if magic != MO_MAGIC:
+            raise ValueError(f'{path} is not a little-endian .mo file')
+        self._keys = _KeyTable(self)
+
+    def _string(self, table, index):
+        length, offset = struct.unpack_from('<II', self._map, table + 8 * index)
+        return self._map[offset:offset + length]
+
+    def _find(self, key):
+        encoded = key.encode('utf-8') if isinstance(key, str) else None
+        if not encoded:
+            return None
+        index = bisect.bisect_left(self._keys, encoded)
+        if index < self._count and self._string(self._originals, index) == encoded:
+            return index
+        return None
+
+    def get(self, key, default=None):
+        index = self._find(key)
+        if index is None:
+            return default
+        return self._string(self._translations, index).decode('utf-8')
+
+    def __getitem__(self, key):
+        return self.get(key, key)
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __len__(self):
+        # The .mo metadata entry is not a key
+        return self._count - 1
+
+    def keys(self):
+        return [self._string(self._originals, index).decode('utf-8') for index in range(1, self._count)]
+
+
+class _KeyTable:
+    # Sequence of a catalog's original strings, for bisect
+    def __init__(self, catalog):
+        self._catalog = catalog
+
+    def __len__(self):
+        return self._catalog._count
+
+    def __getitem__(self, index):
+        return self._catalog._string(self._catalog._originals, index)
+
+
+class Catalogs:
+    # catalogs[language] -> Catalog, opened on first use; unknown languages
+    # get the default language's catalog
+    def __init__(self, build_dir=DEFAULT_BUILD_DIR, source=SOURCE):
+        self.build_dir = build_dir
+        self.source = source
+        self._manifest = None
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def configure(self, build_dir, source=SOURCE):
+        with self._lock:
+            self.build_dir, self.source = build_dir, source
+            self._manifest = None
+            self._open = {}
+
+    def manifest(self):
+        if self._manifest is None:
+            with self._lock:
+                if self._manifest is None:
+                    self._manifest = load_manifest(self.build_dir, self.source)
+        return self._manifest
+
+    def languages(self):
+        return sorted(self.manifest()['languages'])
+
+    def __getitem__(self, language):
+        catalog = self._open.get(language)
+        if catalog is not None:
+            return catalog
+        languages = self.manifest()['languages']
+        if language not in languages:
+            language = DEFAULT_LANGUAGE
+        with self._lock:
+            catalog = self._open.get(language)
+            if catalog is None:
+                catalog = self._open[language] = Catalog(os.path.join(self.build_dir, languages[language]['file']))
+        return catalog
+
+
+catalogs = Catalogs()
+
+
+def init_app(app):
+    app.config.setdefault('TRANSLATIONS_BUILD_DIR', os.path.join(app.root_path, 'build', 'translations'))
+    catalogs.configure(app.config['TRANSLATIONS_BUILD_DIR'], os.path.join(app.root_path, 'translations.py'))
+    # Compile (or confirm the compiled catalogs are current) before workers
+    # fork; the catalogs themselves are only mapped when first used
+    catalogs.manifest()
+
+    @app.cli.command('compile-translations')
+    def compile_translations_command():
+        manifest = compile_catalogs(catalogs.build_dir, catalogs.source)
+        for language, entry in sorted(manifest['languages'].items()):
+            print(f"{language}: {entry['keys']} strings, {entry['fallbacks']} from fallbacks")
+
+
+if __name__ == '__main__':
+    result = compile_catalogs(DEFAULT_BUILD_DIR)
+    print(f"Compiled {len(result['languages'])} catalogs")
@@ -237,7 +237,31 @@ translations = {
         'Get Started with Financial Personality Quiz': 'Get Started with Financial Personality Quiz',
         'Create a budget to manage your income and expenses effectively': 'Create a budget to manage your income and expenses effectively',
         'Helps you allocate your income across various expense categories': 'Helps you allocate your income across various expense categories',
-        'Get Started with Weekly Budget Planner': 'Get Started with Weekly Budget Planner'
+        'Get Started with Weekly Budget Planner': 'Get Started with Weekly Budget Planner',
+        'Your Overview': 'Your Overview',
+        'Net Worth': 'Net Worth',
+        'Emergency Fund': 'Emergency Fund',
+        'Financial Personality': 'Financial Personality',
+        'Monthly Savings': 'Monthly Savings',
+        'Running Balance': 'Running Balance',
+        'Pending Bills': 'Pending Bills',
+        'No data yet': 'No data yet',
+        'Temporarily unavailable': 'Temporarily unavailable. Refresh to try again.',
+        'Peer Average': 'Average score of people like you',
+        'Recurrence': 'Recurrence',
+        'Does not repeat': 'Does not repeat',
+        'Weekly': 'Weekly',
+        'Monthly': 'Monthly',
+        'Every N days': 'Every N days',
+        'Repeat every': 'Repeat every',
+        'End Date': 'End Date',
+        'Category Share Insight': 'You spent {percentage:.1f}% of your expenses on {category}. Consider reviewing this category for savings.',
+        'Month Increase Insight': 'You have spent {change:.0f}% more on {category} this month than by this point last month.',
+        'Month Decrease Insight': 'You have spent {change:.0f}% less on {category} this month than by this point last month. Keep it up!',
+        'Negative Balance Insight': 'Your running balance is negative. Prioritize reducing expenses or increasing income.',
+        'Unusual Expense Alert': 'Unusual expense: ₦{amount:,.2f} on {category} is well above your usual ₦{mean:,.2f}.',
+        'Spending Spike Alert': 'Spending spike: you are spending {ratio:.1f}x your usual daily rate.',
+        'Category Spending Spike Alert': 'Spending spike on {category}: {ratio:.1f}x your usual daily rate.'
     },
     'Hausa': {
         'Welcome': 'Barka da Zuwa',
@@ -477,6 +501,30 @@ translations = {
         'Get Started with Financial Personality Quiz': 'Fara da Gwajin Halin Kuɗi',
         'Create a budget to manage your income and expenses effectively': 'Ƙirƙiri kasafin kuɗi don sarrafa kuɗin shiga da kashe kuɗi yadda ya kamata',
         'Helps you allocate your income across various expense categories': 'Yana taimakawa wajen raba kuɗin shiga a cikin nau’ikan kashe kuɗi daban-daban',
-        'Get Started with Weekly Budget Planner': 'Fara da Mai Tsara Kasafin Mako-mako'
+        'Get Started with Weekly Budget Planner': 'Fara da Mai Tsara Kasafin Mako-mako',
+        'Your Overview': 'Taƙaitaccen Bayanin Ku',
+        'Net Worth': 'Darajar Dukiya',
+        'Emergency Fund': 'Kuɗin Gaggawa',
+        'Financial Personality': 'Halin Kuɗi',
+        'Monthly Savings': 'Ajiyar Wata-wata',
+        'Running Balance': 'Ragowar Kuɗi',
+        'Pending Bills': 'Kuɗaɗen da Ake Jiran Biya',
+        'No data yet': 'Babu bayani tukuna',
+        'Temporarily unavailable': 'Ba a samu ba a yanzu. Sake loda shafin don sake gwadawa.',
+        'Peer Average': 'Matsakaicin maki na mutane kamar ku',
+        'Recurrence': 'Maimaituwa',
+        'Does not repeat': 'Ba ya maimaituwa',
+        'Weekly': 'Mako-mako',
+        'Monthly': 'Wata-wata',
+        'Every N days': 'Kowane kwanaki N',
+        'Repeat every': 'Maimaita kowane',
+        'End Date': 'Ranar Ƙarewa',
+        'Category Share Insight': 'Ka kashe {percentage:.1f}% na kuɗaɗen ka akan {category}. Yi la’akari da duba wannan rukuni don tanadi.',
+        'Month Increase Insight': 'Ka kashe {change:.0f}% fiye akan {category} a wannan watan fiye da zuwa wannan lokacin a watan da ya gabata.',
+        'Month Decrease Insight': 'Ka kashe {change:.0f}% ƙasa akan {category} a wannan watan fiye da zuwa wannan lokacin a watan da ya gabata. Ci gaba da haka!',
+        'Negative Balance Insight': 'Ma’aunin kuɗin ka yana ƙasa da sifili. Ba da fifiko wajen rage kashe kuɗi ko ƙara samun kuɗi.',
+        'Unusual Expense Alert': 'Kashe kuɗi da ba a saba ba: ₦{amount:,.2f} akan {category} ya fi abin da ka saba kashewa na ₦{mean:,.2f} sosai.',
+        'Spending Spike Alert': 'Hauhawar kashe kuɗi: kana kashe kuɗi sau {ratio:.1f} na yadda ka saba kowace rana.',
+        'Category Spending Spike Alert': 'Hauhawar kashe kuɗi akan {category}: sau {ratio:.1f} na yadda ka saba kowace rana.'
     }
 }